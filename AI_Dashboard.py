@@ -1,37 +1,69 @@
-import streamlit as st
-from core.ai_engine.advisor import ProjectAdvisor
-from core.ai_engine_v2 import GraduationAI
-
-# إعدادات الواجهة
-st.set_page_config(page_title="BAU Strict Advisor", page_icon="🎓", layout="centered")
-
-st.markdown("<h1 style='text-align: center; color: #1E3A8A;'>🎓 مدقق الجودة لمشروع التخرج لطلبة كلية الذكاء الاصطناعي - BAU</h1>", unsafe_allow_html=True)
-st.markdown("<p style='text-align: center;'>دعم ملفات PDF و Word | فحص الفصول </p>", unsafe_allow_html=True)
-
-if "GROQ_API_KEY" in st.secrets:
-    advisor = ProjectAdvisor(st.secrets["GROQ_API_KEY"])
-    extractor = GraduationAI(st.secrets["GROQ_API_KEY"])
-
-    # السماح برفع النوعين
-    uploaded_file = st.file_uploader("📂 ارفع وثيقة المشروع (PDF أو Word)", type=['pdf', 'docx'])
-    
-    if uploaded_file:
-        with st.spinner("🔍 جاري الفحص والمطابقة مع شروط جامعة البلقاء..."):
-            text = extractor.extract_text(uploaded_file)
-            if text:
-                report = advisor.check_quality(text)
-                
-                st.divider()
-                # عرض جوهر الفكرة والتقرير بشكل منظم
-                if "# 💡 جوهر فكرة المشروع" in report:
-                    parts = report.split("## 📝 ملخص تقييم الحالة")
-                    st.info(parts[0]) 
-                    
-                    with st.expander("👁️ عرض التقرير الأكاديمي الكامل والنواقص", expanded=True):
-                        st.markdown("## 📝 ملخص تقييم الحالة" + parts[1])
-                else:
-                    st.markdown(report)
-                
-                st.download_button("📥 تحميل قائمة التعديلات", report, file_name="BAU_Mandatory_Edits.md")
-else:
+import time
+import uuid
+
+import streamlit as st
+from core.ai_engine.advisor import get_advisor
+from core.jobs import JobRejected, get_queue
+
+# إعدادات الواجهة
+st.set_page_config(page_title="BAU Strict Advisor", page_icon="🎓", layout="centered")
+
+st.markdown("<h1 style='text-align: center; color: #1E3A8A;'>🎓 مدقق الجودة لمشروع التخرج لطلبة كلية الذكاء الاصطناعي - BAU</h1>", unsafe_allow_html=True)
+st.markdown("<p style='text-align: center;'>دعم ملفات PDF و Word | فحص الفصول </p>", unsafe_allow_html=True)
+
+if "GROQ_API_KEY" in st.secrets:
+    advisor = get_advisor(st.secrets["GROQ_API_KEY"])
+    queue = get_queue()
+
+    # السماح برفع النوعين
+    uploaded_file = st.file_uploader("📂 ارفع وثيقة المشروع (PDF أو Word)", type=['pdf', 'docx'])
+    
+    if uploaded_file:
+        # التحليل بطابور الخلفية (core.jobs): الاستخراج بـprocess والـLLM على event loop مشترك
+        user = st.session_state.setdefault("user_id", uuid.uuid4().hex)
+        jobs = st.session_state.setdefault("advise_jobs", {})
+        job = queue.get(jobs.get(uploaded_file.file_id))
+        if job is None:
+            try:
+                job = queue.submit(uploaded_file.getvalue(), uploaded_file.name, user=user,
+                                   kind="advise", advisor=advisor)
+            except JobRejected as e:
+                st.warning(f"⏳ {e} — حاولي مرة ثانية بعد ~{e.retry_after:.0f} ثانية.")
+                st.stop()
+            jobs[uploaded_file.file_id] = job.id
+
+        if job.active:
+            label = "🔍 جاري الفحص والمطابقة مع شروط جامعة البلقاء..." if job.stage == "llm" else "📄 استخراج النص..."
+            if job.status == "queued":
+                label = f"⏳ بالانتظار ({queue.position(job)} ملف قبلك)"
+            st.progress(job.progress, text=label)
+            time.sleep(1)
+            st.rerun()
+        if job.status == "failed":
+            jobs.pop(uploaded_file.file_id, None)
+            st.error(f"تعذر تحليل الملف: {job.error}")
+            st.stop()
+
+        report = job.result
+        if report:
+            st.divider()
+            # عرض جوهر الفكرة والتقرير بشكل منظم
+            if "# 💡 جوهر فكرة المشروع" in report:
+                parts = report.split("## 📝 ملخص تقييم الحالة")
+                st.info(parts[0]) 
+                
+                with st.expander("👁️ عرض التقرير الأكاديمي الكامل والنواقص", expanded=True):
+                    st.markdown("## 📝 ملخص تقييم الحالة" + parts[1])
+            else:
+                st.markdown(report)
+            
+            st.download_button("📥 تحميل قائمة التعديلات", report, file_name="BAU_Mandatory_Edits.md")
+
+            cache_stats = advisor.processor.cache.stats()
+            st.caption(f"LLM cache: hit rate {cache_stats['hit_rate']:.0%} — saved tokens {cache_stats['saved_tokens']:,}")
+            context = advisor.processor.context_stats
+            if context["original_tokens"]:
+                st.caption(f"LLM context: ~{context['sent_tokens']:,} of ~{context['original_tokens']:,} tokens sent "
+                           f"({context['sent_tokens'] / context['original_tokens']:.0%}) over {context['calls']} analyses")
+else:
     st.error("⚠️ يرجى ضبط GROQ_API_KEY في ملف secrets.toml")
\ No newline at end of file
@@ -1,120 +1,216 @@
-# app.py
-import os
-import tempfile
-import streamlit as st
-
-# لازم تكون أول Streamlit command
-st.set_page_config(page_title="Graduation Project Checker", layout="wide")
-
-from core.extract import extract_docx, extract_pdf
-from core.checks import run_checks
-from core.llm import simple_summary
-from core.report import to_json
-from core.storage import save_report
-
-
-st.title("🎓 Graduation Project Checker (PDF/DOCX)")
-st.write("ارفع ملف مشروع التخرج (PDF أو Word) وسأفحصه حسب قالب الجامعة + أعطيك ملخص وتنبيهات.")
-
-uploaded = st.file_uploader("Upload your project file", type=["pdf", "docx"])
-
-if uploaded:
-    suffix = ".pdf" if uploaded.name.lower().endswith(".pdf") else ".docx"
-
-    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-        tmp.write(uploaded.read())
-        tmp_path = tmp.name
-
-    try:
-        # 1) Extract
-        if suffix == ".docx":
-            doc = extract_docx(tmp_path)
-        else:
-            doc = extract_pdf(tmp_path)
-
-        # 2) Rule-based checks
-        results = run_checks(doc.raw_text)
-        missing_titles = [r.title for r in results if not r.passed]
-
-        # 3) Summary (fallback)
-        summary = simple_summary(doc.raw_text)
-
-        # 5) Build report
-        report = to_json(results, summary)
-
-        # 6) DOCX Formatting Checks (Word only)
-        format_issues = []
-        if suffix == ".docx":
-            from docx import Document
-            from core.format_checks import check_abstract_format, check_captions
-
-            docx_obj = Document(tmp_path)
-            format_issues += check_abstract_format(docx_obj.paragraphs)
-            format_issues += check_captions(docx_obj.paragraphs)
-
-        report["format_issues"] = format_issues
-
-        # 7) 💾 Save report
-        saved_path = save_report(report, uploaded.name)
-        st.success(f"تم حفظ التقرير: {saved_path}")
-
-        # 8) UI
-        col1, col2 = st.columns([1, 1])
-
-        with col1:
-            st.subheader("✅ النتيجة العامة")
-            st.metric("Compliance Score", f"{report['score']}%")
-
-            st.subheader("🧾 Summary (ملخص الفكرة)")
-            st.write(
-                report["summary"]
-                if report["summary"]
-                else "لم أستطع توليد ملخص واضح من الملف."
-            )
-
-            st.subheader("🤖 LLM Feedback (ملخص + ملاحظات ذكية)")
-            st.info(
-                "تم تعطيل الذكاء الاصطناعي في وضع العرض الآمن.\n"
-                "يعتمد النظام حاليًا على فحص هيكلي وتقني قائم على القواعد الرسمية لقالب مشروع التخرج."
-            )
-
-            
-            st.subheader("🧩 DOCX Formatting Checks")
-            if suffix != ".docx":
-                st.info("فحص التنسيق متاح لملفات Word فقط (DOCX).")
-            elif len(report["format_issues"]) == 0:
-                st.success("ما تم رصد مشاكل تنسيق أساسية في ملف الـDOCX ✅")
-            else:
-                for it in report["format_issues"]:
-                    st.warning(f"**{it['what']}**\n\n**Fix:** {it['how']}")
-
-        with col2:
-            st.subheader("⚠️ Fix Suggestions (تنبيهات وإصلاحات)")
-            if len(report["fixes"]) == 0:
-                st.success("ملفك مستوفي الشروط الأساسية حسب القالب ✅")
-            else:
-                for f in report["fixes"]:
-                    tag = "🔴" if f["priority"] == "high" else ("🟠" if f["priority"] == "medium" else "🟡")
-                    st.warning(
-                        f"{tag} {f['what']} — {f['details']}\n\n**What to do:** {f['how']}"
-                    )
-
-        st.divider()
-        st.subheader("📋 Checklist (كل الفحوصات)")
-        for c in report["checks"]:
-            icon = "✅" if c["passed"] else "❌"
-            st.write(f"{icon} **{c['title']}** — {c['details']}")
-
-        st.divider()
-        st.download_button(
-            "Download report as JSON",
-            data=str(report).encode("utf-8"),
-            file_name="report.json",
-            mime="application/json"
-        )
-
-    finally:
-        try:
-            os.remove(tmp_path)
-        except Exception:
-            pass
+# app.py
+import streamlit as st
+
+# لازم تكون أول Streamlit command
+st.set_page_config(page_title="Graduation Project Checker", layout="wide")
+
+import json
+import time
+import uuid
+
+from core.extract import DocumentTooLarge
+from core.jobs import JobRejected, get_queue
+from core.templates import DEFAULT_TEMPLATE, available_templates
+from core import telemetry
+
+STAGE_LABELS = {"extract": "استخراج النص", "checks": "فحص الأقسام", "summary": "الملخص",
+                "format": "فحص التنسيق", "similarity": "التشابه", "save": "حفظ التقرير"}
+
+
+def show_partial(events):
+    """النتائج اللي وصلت من الـworker لهلأ (job.events)، وهو لسا بيكمل باقي المراحل."""
+    col1, col2 = st.columns([1, 1])
+    for ev in events:
+        d = ev.data
+        if ev.stage == "meta":
+            t = d["template"]
+            col1.caption(f"📄 {d['format'].upper()} — {d['pages']} صفحة، {d['words']:,} كلمة — "
+                         f"📐 {t['name']} ({t['version']})")
+        elif ev.stage == "checks":
+            with col2:
+                st.markdown(f"**{d['group']}**")
+                for c in d["checks"]:
+                    st.write(f"{'✅' if c['passed'] else '❌'} {c['title']} — {c['details']}")
+        elif ev.stage == "score":
+            col1.metric("Compliance Score", f"{d['score']}%")
+        elif ev.stage == "format":
+            n = len(d["issues"])
+            col1.write(f"🧩 Formatting Checks: {n} ملاحظة" if n else "🧩 ما تم رصد مشاكل تنسيق أساسية ✅")
+        elif ev.stage == "summary":
+            col1.subheader("🧾 Summary (ملخص الفكرة)")
+            col1.write(d["summary"] or "لم أستطع توليد ملخص واضح من الملف.")
+
+
+st.title("🎓 Graduation Project Checker (PDF/DOCX)")
+st.write("ارفع ملف مشروع التخرج (PDF أو Word) وسأفحصه حسب قالب الجامعة + أعطيك ملخص وتنبيهات.")
+
+# 🛠 Debug: توقيت كل مرحلة (أو CHECKER_TELEMETRY=1 لكل الـprocess)
+debug = st.sidebar.checkbox("🛠 Debug: stage timings", value=telemetry.enabled())
+if debug != telemetry.enabled():
+    telemetry.enable(debug)
+
+# القالب (templates/*.json): كل كلية إلها قالبها، والافتراضي قالب BAU
+templates = {t["id"]: t for t in available_templates()}
+template = DEFAULT_TEMPLATE
+if len(templates) > 1:
+    ids = sorted(templates)
+    template = st.sidebar.selectbox("📐 القالب", ids, index=ids.index(DEFAULT_TEMPLATE) if DEFAULT_TEMPLATE in ids else 0,
+                                    format_func=lambda t: f"{templates[t]['name']} ({templates[t]['version']})")
+
+# صاحب التقارير: الرقم الجامعي ثابت بين الجلسات والأيام، فالرفع الجاي بينقارن مع النسخة السابقة.
+# بدونه: هوية للجلسة بس (بدون مقارنة مع رفعات جلسات ثانية، وبدون كشف تقارير غيره)
+student_id = "".join(st.sidebar.text_input("🪪 الرقم الجامعي", help="لمقارنة كل نسخة جديدة من ملفك مع السابقة").split())
+user = student_id.lower() or st.session_state.setdefault("user_id", uuid.uuid4().hex)
+
+uploaded = st.file_uploader("Upload your project file", type=["pdf", "docx"])
+# أول تشغيل للـprocess: workers الطابور يبدأوا ويحملوا مكتبات الاستخراج وهو المستخدم لسا بيختار الملف
+queue = get_queue()
+
+if uploaded:
+    # 1-7) Extract → checks → format checks → summary → report → 💾 save
+    # بطابور الخلفية (core.jobs): الجلسة ما تعلق، ونفس المحتوى يرجع من الكاش أو ينضم لنفس الـjob
+    jobs = st.session_state.setdefault("jobs", {})
+    # نفس الملف بقالب ثاني (أو برقم جامعي ثاني) = فحص ثاني
+    job_key = f"{uploaded.file_id}:{template}:{user}"
+    job = queue.get(jobs.get(job_key))
+    if job is None:
+        try:
+            job = queue.submit(uploaded.getvalue(), uploaded.name, user=user, template=template)
+        except JobRejected as e:
+            st.warning(f"⏳ {e} — حاولي مرة ثانية بعد ~{e.retry_after:.0f} ثانية.")
+            st.stop()
+        jobs[job_key] = job.id
+
+    if job.active:
+        if job.status == "queued":
+            text = f"⏳ بالانتظار ({queue.position(job)} ملف قبلك)"
+        else:
+            text = f"🔍 {STAGE_LABELS.get(job.stage, 'بدء الفحص')}..."
+        st.progress(job.progress, text=text)
+        # كل مجموعة فحوصات بتنعرض أول ما تخلص، بدل صفحة فاضية لحد آخر مرحلة
+        show_partial(list(job.events))
+        time.sleep(0.5)
+        st.rerun()
+    if job.status == "failed":
+        jobs.pop(job_key, None)
+        if isinstance(job.exception, DocumentTooLarge):
+            st.error(f"الملف كبير جداً ولا يمكن فحصه: {job.exception}")
+        else:
+            st.error(f"تعذر فحص الملف: {job.error}")
+        st.stop()
+
+    # الـjob أو الكاش ممكن يكون من رفع مستخدم ثاني لنفس المحتوى: التقرير ينحفظ باسم هذا المستخدم
+    # (بدون تقرير الثاني ومقارنة نسخه)
+    entry, from_cache = queue.result_for(job, user), job.from_cache
+    report = entry.report
+    saved_path = entry.report_path
+
+    if from_cache or saved_path is None:
+        st.success("⚡ نفس الملف تم فحصه سابقاً" + (f" — التقرير: {saved_path}" if saved_path else ""))
+    else:
+        st.success(f"تم حفظ التقرير: {saved_path}")
+        if job.time_to_first_result is not None:
+            st.caption(f"⚡ أول نتيجة بعد {job.time_to_first_result:.1f}s من أصل {job.seconds:.1f}s")
+
+    if not student_id:
+        st.caption("🪪 أدخلي الرقم الجامعي بالشريط الجانبي حتى تنقارن النسخة الجاية من الملف مع هاي.")
+
+    if "revision" in report:
+        rev = report["revision"]
+        unit = "فقرة" if rev["unit"] == "paragraph" else "صفحة"
+        st.info(
+            f"🔄 نسخة جديدة من ملف سابق ({rev['previous']}): "
+            f"{rev['changed']} {unit} متغيرة، {rev['removed']} محذوفة، {rev['unchanged']} بدون تغيير — "
+            f"النتيجة {rev['score_before']}% → {rev['score_after']}%"
+        )
+        if rev["changed_sections"]:
+            st.write("الأقسام المعدلة: " + "، ".join(f"`{s}`" for s in rev["changed_sections"]))
+        for what in rev["fixes_landed"]:
+            st.write(f"✅ انحلت: **{what}**")
+        for what in rev["new_issues"]:
+            st.write(f"🆕 ملاحظة جديدة: **{what}**")
+
+    # 8) UI
+    col1, col2 = st.columns([1, 1])
+
+    with col1:
+        st.subheader("✅ النتيجة العامة")
+        st.metric("Compliance Score", f"{report['score']}%")
+        if "template" in report:
+            st.caption(f"📐 {report['template']['name']} — نسخة القالب {report['template']['version']}")
+
+        st.subheader("🧾 Summary (ملخص الفكرة)")
+        st.write(
+            report["summary"]
+            if report["summary"]
+            else "لم أستطع توليد ملخص واضح من الملف."
+        )
+
+        st.subheader("🤖 LLM Feedback (ملخص + ملاحظات ذكية)")
+        st.info(
+            "تم تعطيل الذكاء الاصطناعي في وضع العرض الآمن.\n"
+            "يعتمد النظام حاليًا على فحص هيكلي وتقني قائم على القواعد الرسمية لقالب مشروع التخرج."
+        )
+
+        
+        st.subheader("🧩 Formatting Checks")
+        if len(report["format_issues"]) == 0:
+            st.success("ما تم رصد مشاكل تنسيق أساسية في الملف ✅")
+        else:
+            for it in report["format_issues"]:
+                st.warning(f"**{it['what']}**\n\n**Fix:** {it['how']}")
+
+    with col2:
+        st.subheader("⚠️ Fix Suggestions (تنبيهات وإصلاحات)")
+        if len(report["fixes"]) == 0:
+            st.success("ملفك مستوفي الشروط الأساسية حسب القالب ✅")
+        else:
+            for f in report["fixes"]:
+                tag = "🔴" if f["priority"] == "high" else ("🟠" if f["priority"] == "medium" else "🟡")
+                st.warning(
+                    f"{tag} {f['what']} — {f['details']}\n\n**What to do:** {f['how']}"
+                )
+
+        if "similarity" in report:
+            sim = report["similarity"]
+            st.subheader("🔁 Similarity (تشابه مع مشاريع سابقة)")
+            if not sim["sections"] and not sim["document"]:
+                st.success(f"لا يوجد تشابه ملحوظ مع {sim['indexed_docs']} مشروع سابق ✅")
+            for m in sim["document"]:
+                st.warning(f"الوثيقة كاملة تشبه **{m['match']}** بنسبة {m['score']:.0%}")
+            for m in sim["sections"]:
+                st.warning(f"`{m['section']}` يشبه `{m['match_section']}` في **{m['match']}** بنسبة {m['score']:.0%}")
+
+    st.divider()
+    st.subheader("📋 Checklist (كل الفحوصات)")
+    for c in report["checks"]:
+        icon = "✅" if c["passed"] else "❌"
+        st.write(f"{icon} **{c['title']}** — {c['details']}")
+
+    st.divider()
+    # التقرير النهائي من الكاش (entry.report) كـJSON فعلي، مش repr تبع الـdict
+    st.download_button(
+        "Download report as JSON",
+        data=json.dumps(report, ensure_ascii=False, indent=2).encode("utf-8"),
+        file_name="report.json",
+        mime="application/json"
+    )
+
+if telemetry.enabled():
+    snap = telemetry.snapshot(recent=20)
+    with st.sidebar:
+        st.subheader("⏱ Stage timings")
+        if snap["active"]:
+            st.write("شغال هلأ: " + "، ".join(f"`{a['stage']}` ({a['running_seconds']}s)" for a in snap["active"]))
+        st.dataframe(
+            [{"stage": name, "calls": s["calls"], "avg ms": round(s["avg_seconds"] * 1000, 1),
+              "max ms": round(s["max_seconds"] * 1000, 1), "errors": s["errors"]}
+             for name, s in sorted(snap["stages"].items())],
+            hide_index=True,
+        )
+        with st.expander("آخر الـspans"):
+            st.json(snap["recent"])
+        st.download_button("telemetry.json", data=telemetry.to_json(), file_name="telemetry.json",
+                           mime="application/json")
+        st.download_button("metrics.prom", data=telemetry.prometheus(), file_name="metrics.prom",
+                           mime="text/plain")
@@ -0,0 +1,227 @@
+# benchmarks/bench_pipeline.py
+"""
+Benchmark لكل مرحلة من الـpipeline + end-to-end على رسائل اصطناعية (benchmarks/synth.py):
+wall time (أفضل تكرار)، peak RSS، و throughput (صفحات/ثانية)، وزمن أول نتيجة (first_result:
+لحد ما iter_check_source يطلع أول مجموعة فحوصات، يعني أول إشي بيشوفه الطالب بالواجهة).
+كل حالة تشتغل بـprocess جديد حتى يكون الـpeak RSS تبعها هي بس.
+
+    python -m benchmarks.bench_pipeline                       # مقارنة مع benchmarks/baseline.json
+    python -m benchmarks.bench_pipeline --update              # حفظ النتائج كـbaseline جديد
+    python -m benchmarks.bench_pipeline --pages 20 100 --missing chapter_4,references
+
+الأوقات تنقارن بعد التطبيع بسرعة الجهاز: كل تشغيل يقيس شغل ثابت (_calibrate) وينحفظ بـmeta،
+فالـbaseline المحفوظ من جهاز ثاني بينقارن بنسبة calibration الجهازين.
+أي مرحلة أبطأ من الـbaseline بأكثر من --threshold (أو RSS أعلى) تنطبع كتحذير؛ exit code 1 بس مع
+--strict أو CHECKER_BENCH_STRICT=1 (CI على نفس الجهاز)، لأن ضجيج القياس بين الأجهزة أكبر من الـthreshold.
+"""
+from __future__ import annotations
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import re
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+STRICT_ENV = "CHECKER_BENCH_STRICT"
+
+
+def _rss_mb() -> float:
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux: KB، macOS: bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _measure(fn: Callable[[], Any], repeat: int) -> Dict[str, Any]:
+    best = float("inf")
+    out = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return {"seconds": round(best, 5), "peak_rss_mb": _rss_mb(), "_out": out}
+
+
+def _calibrate(repeat: int = 5) -> float:
+    """زمن شغل ثابت (regex + dict + sort على نص ثابت، مثل الفحوصات) بالثواني: وحدة سرعة الجهاز."""
+    text = " ".join(f"word{i % 997} Chapter {i % 13}." for i in range(20000))
+
+    def work():
+        counts: Dict[str, int] = {}
+        for w in re.findall(r"\w+", text):
+            counts[w] = counts.get(w, 0) + 1
+        return sorted(counts.items(), key=lambda kv: (-kv[1], kv[0]))
+
+    return _measure(work, repeat)["seconds"]
+
+
+def _first_result(events) -> None:
+    for ev in events:
+        if ev.stage == "checks":
+            break
+    events.close()
+
+
+def run_case(path: str, repeat: int) -> Dict[str, Dict[str, Any]]:
+    """يشتغل داخل process منفصل: كل مراحل الـpipeline على ملف واحد."""
+    from core.checks import build_index, run_checks
+    from core.extract import extract_docx, extract_pdf
+    from core.format_checks import audit_formatting, audit_pdf_formatting, check_captions
+    from core.llm import simple_summary
+    from core.pipeline import check_source, iter_check_source
+    from core.report import to_json
+
+    suffix = os.path.splitext(path)[1].lower()
+    with open(path, "rb") as f:
+        data = f.read()
+    extract = extract_docx if suffix == ".docx" else extract_pdf
+
+    stages: Dict[str, Dict[str, Any]] = {}
+    stages["extract"] = _measure(lambda: extract(data), repeat)
+    doc = stages["extract"]["_out"]
+    raw = doc.raw_text
+    stages["build_index"] = _measure(lambda: build_index(raw), repeat)
+    index = stages["build_index"]["_out"]
+    stages["run_checks"] = _measure(lambda: run_checks(raw, index), repeat)
+    results = stages["run_checks"]["_out"]
+    stages["simple_summary"] = _measure(lambda: simple_summary(raw, index=index), repeat)
+    summary = stages["simple_summary"]["_out"]
+    stages["to_json"] = _measure(lambda: to_json(results, summary), repeat)
+    audit = audit_formatting if suffix == ".docx" else audit_pdf_formatting
+    stages["audit_formatting"] = _measure(lambda: audit(doc), repeat)
+    stages["check_captions"] = _measure(lambda: check_captions(doc.text_lines()), repeat)
+    stages["first_result"] = _measure(lambda: _first_result(iter_check_source(data, suffix, pdf_workers=1)), repeat)
+    stages["end_to_end"] = _measure(lambda: check_source(data, suffix, pdf_workers=1), repeat)
+
+    for name, st in stages.items():
+        st.pop("_out")
+        st["pages_per_sec"] = round(doc.pages / st["seconds"], 1) if st["seconds"] else None
+    stages["end_to_end"]["pages"] = doc.pages
+    stages["end_to_end"]["mb_per_sec"] = round(len(data) / 1e6 / stages["end_to_end"]["seconds"], 2)
+    return stages
+
+
+def run_all(pages: List[int], formats: List[str], missing: List[str], repeat: int,
+            seed: int = 0) -> Dict[str, Dict[str, Any]]:
+    from benchmarks.synth import thesis_blocks, write_docx, write_pdf
+
+    variants = [("full", [])] + ([("missing", missing)] if missing else [])
+    results: Dict[str, Dict[str, Any]] = {}
+    ctx = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in pages:
+            for variant, miss in variants:
+                blocks = thesis_blocks(n, miss, seed)
+                for fmt in formats:
+                    path = os.path.join(tmp, f"{variant}-{n}.{fmt}")
+                    (write_pdf if fmt == "pdf" else write_docx)(blocks, path)
+                    name = f"{fmt}-{n}p-{variant}"
+                    with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as ex:
+                        for stage, st in ex.submit(run_case, path, repeat).result().items():
+                            results[f"{name}/{stage}"] = st
+                    print(f"  {name}: end_to_end {results[f'{name}/end_to_end']['seconds'] * 1000:.0f} ms, "
+                          f"first result {results[f'{name}/first_result']['seconds'] * 1000:.0f} ms", file=sys.stderr)
+    return results
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]],
+            threshold: float, min_ms: float, scale: float = 1.0) -> List[str]:
+    """
+    قائمة الـregressions (وقت أو RSS أعلى من الـbaseline بأكثر من threshold).
+    scale: calibration هالجهاز ÷ calibration جهاز الـbaseline (أوقات الـbaseline تنضرب فيه).
+    """
+    bad = []
+    for key, st in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        t, bt = st["seconds"] * 1000, base["seconds"] * 1000 * scale
+        # المراحل الصغيرة جداً (أقل من min_ms) ضجيج القياس فيها أكبر من الفرق
+        if max(t, bt) >= min_ms and t > bt * (1 + threshold):
+            bad.append(f"{key}: {bt:.1f} ms → {t:.1f} ms (+{(t / bt - 1) * 100:.0f}%)")
+        r, br = st["peak_rss_mb"], base["peak_rss_mb"]
+        if r > br * (1 + threshold) and r - br >= 1:
+            bad.append(f"{key}: peak RSS {br:.0f} MB → {r:.0f} MB (+{(r / br - 1) * 100:.0f}%)")
+    return bad
+
+
+def _table(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], scale: float = 1.0) -> str:
+    rows = [f"{'case/stage':<40} {'ms':>10} {'base ms':>10} {'Δ':>7} {'RSS MB':>8} {'pages/s':>10}"]
+    for key, st in results.items():
+        base = baseline.get(key)
+        ms = st["seconds"] * 1000
+        bms = f"{base['seconds'] * 1000 * scale:10.1f}" if base else f"{'-':>10}"
+        delta = (f"{(ms / (base['seconds'] * 1000 * scale) - 1) * 100:+6.0f}%" if base and base["seconds"]
+                 else f"{'':>7}")
+        pps = st["pages_per_sec"] if st["pages_per_sec"] is not None else "-"
+        rows.append(f"{key:<40} {ms:10.1f} {bms} {delta} {st['peak_rss_mb']:8.0f} {pps:>10}")
+    return "\n".join(rows)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(prog="python -m benchmarks.bench_pipeline")
+    ap.add_argument("--pages", type=int, nargs="+", default=[20, 100, 500])
+    ap.add_argument("--formats", nargs="+", default=["docx", "pdf"], choices=["docx", "pdf"])
+    ap.add_argument("--missing", default="", help="also run a variant without these sections (check ids)")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--baseline", default=BASELINE)
+    ap.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown (0.25 = +25%%)")
+    ap.add_argument("--min-ms", type=float, default=5.0, help="ignore timing changes of stages faster than this")
+    ap.add_argument("--update", action="store_true", help="write the results as the new baseline")
+    ap.add_argument("--strict", action="store_true", default=os.environ.get(STRICT_ENV) == "1",
+                    help=f"exit 1 on regressions (also {STRICT_ENV}=1); otherwise only report them")
+    ap.add_argument("--out", help="also write this run's results to a JSON file")
+    args = ap.parse_args()
+
+    missing = [m for m in args.missing.split(",") if m]
+    calibration = _calibrate()
+    results = run_all(args.pages, args.formats, missing, args.repeat)
+    payload = {
+        "meta": {"python": platform.python_version(), "platform": platform.platform(),
+                 "cpus": os.cpu_count(), "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+                 "repeat": args.repeat, "calibration_seconds": calibration},
+        "results": results,
+    }
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2)
+
+    baseline: Dict[str, Dict[str, Any]] = {}
+    scale = 1.0
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            saved = json.load(f)
+        baseline = saved["results"]
+        base_cal = saved["meta"].get("calibration_seconds")
+        if base_cal:
+            scale = calibration / base_cal
+    print(_table(results, baseline, scale))
+    print(f"\nmachine speed vs baseline: ×{1 / scale:.2f} (calibration {calibration * 1000:.1f} ms)", file=sys.stderr)
+
+    if args.update or not baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2)
+        print(f"\nbaseline written: {args.baseline}", file=sys.stderr)
+        return
+
+    bad = compare(results, baseline, args.threshold, args.min_ms, scale)
+    if bad:
+        print(f"\n{'!' * 60}\nPERFORMANCE REGRESSION (threshold +{args.threshold:.0%}):", file=sys.stderr)
+        for line in bad:
+            print(f"  {line}", file=sys.stderr)
+        print("!" * 60, file=sys.stderr)
+        if args.strict:
+            sys.exit(1)
+        print(f"(report only; --strict or {STRICT_ENV}=1 to fail)", file=sys.stderr)
+        return
+    print(f"\nno regressions vs {args.baseline} (threshold +{args.threshold:.0%})", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# benchmarks/bench_rules.py
+"""
+Micro-benchmark: فحص العناوين بمرور واحد (RuleSet.scan) مقابل re.search لكل قاعدة.
+زمن scan بيتبع طول النص وعدد الـhits، مش عدد القواعد.
+
+    python -m benchmarks.bench_rules --words 150000
+"""
+from __future__ import annotations
+import argparse
+import random
+import re
+import string
+import time
+
+from core.checks import run_checks
+from core.rules import RuleSet, marker
+from core.templates import get_template
+
+FILLER = ("the system uses data model network learning training results method "
+          "analysis approach design user interface performance accuracy").split()
+
+def _text(n_words: int, seed: int = 0) -> str:
+    rnd = random.Random(seed)
+    body = " ".join(rnd.choice(FILLER) for _ in range(n_words))
+    return "ABSTRACT\n" + body + "\nCHAPTER 1\nProject Objectives\n1. one\n2. two\n3. three\nReferences"
+
+def _extra_rules(n: int, seed: int = 1) -> RuleSet:
+    """
+    قواعد إضافية كلها بتبدأ بـ5 كلمات من المتن (كثير من القواعد لنفس الكلمة الأولى)، فالمسح بيوصل للتحقق:
+    أول 80 عبارة كلمتين من المتن (بتطابق)، والباقي 3 كلمات: أول ثنتين من المتن والثالثة ما بتظهر
+    (بتفشل بالكلمة الأخيرة بس). فعدد الـhits بيوقف عند 80 قاعدة، والزيادة بعدها عدد قواعد بس.
+    """
+    rnd = random.Random(seed)
+    anchors = ("system", "data", "model", "design", "user")
+    extra = []
+    for i in range(n):
+        j = i // len(anchors)
+        phrase = f"{anchors[i % len(anchors)]} {FILLER[j % len(FILLER)]}"
+        if j >= len(FILLER):
+            phrase += " " + "".join(rnd.choice(string.ascii_lowercase) for _ in range(rnd.randint(5, 10)))
+        extra.append(marker(f"extra_{i}", phrase))
+    return RuleSet(list(get_template().rules.markers) + extra)
+
+def _best(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--words", type=int, default=150_000)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    text = _text(args.words)
+    print(f"text: {len(text):,} chars")
+    print(f"run_checks: {_best(lambda: run_checks(text), args.repeat):8.1f} ms")
+    print(f"{'rules':>6} {'hits':>8} {'scan ms':>10} {'re.search ms':>14}")
+    for extra in (0, 25, 100, 400):
+        rs = _extra_rules(extra)
+        naive = [re.compile(m.pattern.pattern, flags=re.IGNORECASE) for m in rs.markers]
+        t_scan = _best(lambda: rs.scan(text), args.repeat)
+        t_naive = _best(lambda: [p.search(text) for p in naive], args.repeat)
+        print(f"{len(rs):>6} {len(rs.scan(text)):>8,} {t_scan:>10.1f} {t_naive:>14.1f}")
+
+if __name__ == "__main__":
+    main()
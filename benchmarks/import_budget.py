@@ -0,0 +1,108 @@
+# benchmarks/import_budget.py
+"""
+زمن الـimport لنقطتي الدخول (app.py و AI_Dashboard.py) بصيغة `python -X importtime`:
+كل ملف imports تبعه (بعد streamlit نفسه، اللي ينقاس لحاله) بـprocess جديد،
+والمجموع لازم يبقى تحت الـbudget، والمكتبات الثقيلة (fitz, docx, pypdf, groq, ...) لازم
+ما تتحمل وقت الـimport أصلاً — بتتحمل lazy عند أول استخدام.
+
+    python -m benchmarks.import_budget
+    python -m benchmarks.import_budget --top 20 --repeat 5
+
+exit code 1 لو تجاوزنا الـbudget أو انحملت مكتبة ثقيلة.
+"""
+from __future__ import annotations
+import argparse
+import ast
+import os
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENTRY_POINTS = ("app.py", "AI_Dashboard.py")
+FRAMEWORK = "streamlit"
+# ms فوق streamlit، على جهاز التطوير (1 CPU)؛ عدّليها مع أي تغيير مقصود
+BUDGET_MS = {"app.py": 75.0, "AI_Dashboard.py": 75.0}
+LAZY = ("fitz", "docx", "pypdf", "groq", "httpx", "numpy", "lxml")
+_MARK = "---entry-point---"
+
+# (self µs, cumulative µs, depth, module)
+Row = Tuple[int, int, int, str]
+
+
+def entry_imports(path: str) -> List[str]:
+    """كل جمل الـimport بالمستوى الأعلى للملف (بدون streamlit و __future__)."""
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), path)
+    out = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names = [a.name for a in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0:
+            names = [node.module or ""]
+        else:
+            continue
+        if any(n == "__future__" or n.split(".")[0] == FRAMEWORK for n in names):
+            continue
+        out.append(ast.unparse(node))
+    return out
+
+
+def _parse(lines: List[str]) -> List[Row]:
+    rows = []
+    for line in lines:
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cum_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        rows.append((int(self_us), int(cum_us), depth, name.strip()))
+    return rows
+
+
+def measure(entry: str) -> Dict[str, object]:
+    stmts = entry_imports(os.path.join(ROOT, entry))
+    code = "\n".join([
+        f"import {FRAMEWORK}",
+        "import sys",
+        f"print({_MARK!r}, file=sys.stderr, flush=True)",
+        *stmts,
+        f"print(','.join(m for m in {LAZY!r} if m in sys.modules))",
+    ])
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT,
+                          capture_output=True, text=True, check=True)
+    err = proc.stderr.splitlines()
+    cut = err.index(_MARK)
+    framework, project = _parse(err[:cut]), _parse(err[cut + 1:])
+    return {
+        "framework_ms": sum(r[1] for r in framework if r[2] == 0) / 1000,
+        "total_ms": sum(r[1] for r in project if r[2] == 0) / 1000,
+        "rows": project,
+        "heavy": [m for m in proc.stdout.strip().split(",") if m],
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(prog="python -m benchmarks.import_budget")
+    ap.add_argument("entries", nargs="*", default=list(ENTRY_POINTS))
+    ap.add_argument("--repeat", type=int, default=3, help="best of N fresh processes")
+    ap.add_argument("--top", type=int, default=12, help="slowest modules to list (cumulative)")
+    args = ap.parse_args()
+
+    failed = False
+    for entry in args.entries:
+        best = min((measure(entry) for _ in range(args.repeat)), key=lambda m: m["total_ms"])
+        budget = BUDGET_MS.get(entry)
+        over = budget is not None and best["total_ms"] > budget
+        print(f"\n{entry}: {best['total_ms']:.1f} ms on top of {FRAMEWORK} ({best['framework_ms']:.0f} ms)"
+              f" — budget {budget if budget is not None else '-'} ms{'  ← OVER BUDGET' if over else ''}")
+        print(f"  {'cumulative ms':>13} {'self ms':>8}  module")
+        for self_us, cum_us, depth, name in sorted(best["rows"], key=lambda r: -r[1])[:args.top]:
+            print(f"  {cum_us / 1000:13.1f} {self_us / 1000:8.1f}  {'  ' * depth}{name}")
+        if best["heavy"]:
+            print(f"  loaded at import time (should be lazy): {', '.join(best['heavy'])}")
+        failed |= over or bool(best["heavy"])
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
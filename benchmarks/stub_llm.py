@@ -0,0 +1,109 @@
+# benchmarks/stub_llm.py
+"""
+Stub محلي يحاكي endpoint الـchat-completions (نفس شكل Groq/OpenAI) مع latency قابلة للتعديل،
+لتجربة AsyncAIProcessor بدون مفتاح API وبدون استهلاك الـquota.
+
+    python -m benchmarks.stub_llm --latency 0.5 --fail-rate 0.2 --chunks 8
+    python -m benchmarks.stub_llm --budget 4000   # طلب واحد (build_context) بدل map-reduce
+"""
+from __future__ import annotations
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+
+
+class _Handler(BaseHTTPRequestHandler):
+    latency = 0.2
+    fail_rate = 0.0
+    stats = {"requests": 0, "failures": 0, "inflight": 0, "max_inflight": 0}
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("content-length", 0))) or b"{}")
+        with self.lock:
+            self.stats["requests"] += 1
+            self.stats["inflight"] += 1
+            self.stats["max_inflight"] = max(self.stats["max_inflight"], self.stats["inflight"])
+        try:
+            time.sleep(self.latency)
+            if not self.path.endswith("/chat/completions"):
+                return self._send(404, {"error": {"message": "not found"}})
+            if random.random() < self.fail_rate:
+                with self.lock:
+                    self.stats["failures"] += 1
+                return self._send(503, {"error": {"message": "stub: service unavailable"}})
+
+            user = body["messages"][-1]["content"]
+            content = f"stub reply ({len(user)} chars)"
+            self._send(200, {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "stub"),
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": content}}],
+                "usage": {"prompt_tokens": len(user) // 4, "completion_tokens": 8,
+                          "total_tokens": len(user) // 4 + 8},
+            })
+        finally:
+            with self.lock:
+                self.stats["inflight"] -= 1
+
+    def _send(self, code: int, payload: dict) -> None:
+        data = json.dumps(payload).encode()
+        self.send_response(code)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def serve(latency: float = 0.2, fail_rate: float = 0.0, port: int = 0) -> Tuple[ThreadingHTTPServer, str]:
+    """يشغل الـstub في thread ويرجع (server, base_url)."""
+    handler = type("Handler", (_Handler,), {
+        "latency": latency, "fail_rate": fail_rate,
+        "stats": {"requests": 0, "failures": 0, "inflight": 0, "max_inflight": 0},
+        "lock": threading.Lock(),
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main() -> None:
+    from core.ai_engine.async_processor import AsyncAIProcessor, split_sections
+    from core.ai_engine.prompts import SYSTEM_PROMPT
+
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--latency", type=float, default=0.5)
+    ap.add_argument("--fail-rate", type=float, default=0.0)
+    ap.add_argument("--chunks", type=int, default=8, help="عدد الفصول في النص التجريبي")
+    ap.add_argument("--concurrency", type=int, default=4)
+    ap.add_argument("--budget", type=int, default=None, help="tokens: وضع الـcontext بدل map-reduce")
+    args = ap.parse_args()
+
+    server, url = serve(args.latency, args.fail_rate)
+    text = "\n".join(f"CHAPTER {i}\n" + "lorem ipsum dolor sit amet " * 500 for i in range(1, args.chunks + 1))
+    print(f"stub at {url}, {len(text):,} chars → {len(split_sections(text))} chunks")
+
+    proc = AsyncAIProcessor("stub-key", base_url=url, max_concurrency=args.concurrency, backoff=0.1,
+                            budget=args.budget)
+    t0 = time.perf_counter()
+    out = proc.get_analysis(text, SYSTEM_PROMPT)
+    elapsed = time.perf_counter() - t0
+    print(f"result: {out!r}")
+    print(f"{elapsed:.2f}s, stub stats: {server.RequestHandlerClass.stats}")
+    if args.budget:
+        print(f"context: {proc.context_stats}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+# benchmarks/synth.py
+"""
+مولد رسائل تخرج اصطناعية حسب قالب BAU (DOCX و PDF) بأحجام مختلفة، للـbenchmarks.
+العناوين مأخوذة من قالب الفحص نفسه (templates/*.json)، فأي تعديل على القالب ينعكس هنا تلقائياً.
+
+    python -m benchmarks.synth --pages 120 --missing chapter_4,references out.docx out.pdf
+"""
+from __future__ import annotations
+import argparse
+import random
+import textwrap
+from typing import Iterable, List, Optional, Tuple
+
+from core.templates import get_template
+
+WORDS_PER_PAGE = 300
+
+# (kind, text) — kind: title | h1 | h2 | p | li | caption
+Block = Tuple[str, str]
+
+_VOCAB = ("system data model network learning training results method analysis approach design "
+          "user interface performance accuracy application database server client security module "
+          "evaluation framework implementation requirement process student university project "
+          "algorithm feature dataset mobile web service response request testing prototype").split()
+
+_CHAPTER_TITLES = ["Introduction", "Literature Review", "System Analysis and Design",
+                   "Implementation and Testing", "Conclusion and Future Work"]
+# نسبة كل فصل من كلمات المتن
+_CHAPTER_SHARE = [0.15, 0.25, 0.25, 0.25, 0.10]
+
+
+def _sentence(rnd: random.Random) -> str:
+    words = rnd.choices(_VOCAB, k=rnd.randint(8, 18))
+    return words[0].capitalize() + " " + " ".join(words[1:]) + "."
+
+
+def _paragraph(rnd: random.Random, n_words: int) -> str:
+    out, n = [], 0
+    while n < n_words:
+        s = _sentence(rnd)
+        out.append(s)
+        n += s.count(" ") + 1
+    return " ".join(out)
+
+
+def _body(rnd: random.Random, n_words: int, chapter: int, state: dict) -> List[Block]:
+    """
+    فقرات ~120 كلمة (كل فقرة ثانية فيها استشهاد [n])، و caption لشكل أو جدول كل صفحتين تقريباً (ترقيم حسب الفصل: Figure 3.2)،
+    والفقرة قبله تشير له بالنص. الـcaptions تنحفظ بـstate["captions"] لـLIST OF FIGURES/TABLES.
+    """
+    blocks: List[Block] = []
+    done = 0
+    while done < n_words:
+        k = min(120, n_words - done)
+        text = _paragraph(rnd, k)
+        if len(blocks) % 2 == 0:
+            # استشهاد بالمراجع بالدور، فكل مدخل بـReferences مستشهد به
+            state["cite"] = state.get("cite", 0) % state["refs"] + 1
+            text = f"{text[:-1]} [{state['cite']}]."
+        blocks.append(("p", text))
+        done += k
+        state["words"] = state.get("words", 0) + k
+        if done // (2 * WORDS_PER_PAGE) > state.setdefault(("cap", chapter), 0):
+            state[("cap", chapter)] += 1
+            kind = "Figure" if rnd.random() < 0.6 else "Table"
+            state[(kind, chapter)] = n = state.get((kind, chapter), 0) + 1
+            label, title = f"{chapter}.{n}", _sentence(rnd)[:-1]
+            blocks[-1] = ("p", f"{blocks[-1][1]} As shown in {kind} {label}, the {_VOCAB[n % len(_VOCAB)]} results are summarized.")
+            blocks.append(("caption", f"{kind} {label}: {title}"))
+            page = 1 + (state["front"] + state["words"]) // WORDS_PER_PAGE
+            state.setdefault("captions", []).append((kind, label, title, page))
+    return blocks
+
+
+def thesis_blocks(pages: int = 60, missing: Iterable[str] = (), seed: int = 0,
+                  template: Optional[str] = None) -> List[Block]:
+    """
+    بنية رسالة كاملة بحجم ~pages صفحة (300 كلمة للصفحة).
+    missing: ids الفحوصات اللي بدنا قسمها ناقص (مثل has_dedication, chapter_4, ch1_problem_statement).
+    """
+    rnd = random.Random(seed)
+    missing = set(missing)
+    phrases = get_template(template).phrases
+    front_matter = [(cid, p) for cid, p in phrases if cid.startswith("has_")]
+    blocks: List[Block] = [("title", "Smart Campus Assistant Using Machine Learning"),
+                           ("p", "A graduation project submitted in partial fulfillment of the requirements "
+                                 "for the degree of Bachelor of Science"),
+                           ("p", "Al-Balqa Applied University")]
+
+    chapters = [c for c in range(1, 6) if f"chapter_{c}" not in missing]
+    lists = {}  # "Figure"/"Table" → موضع عنوان القائمة (المدخلات تنضاف بعد ما تنكتب الـcaptions)
+    for cid, sec in front_matter:
+        if cid in missing:
+            continue
+        blocks.append(("h1", sec))
+        if cid == "has_abstract":
+            blocks.append(("p", _paragraph(rnd, 160)))
+            blocks.append(("p", _paragraph(rnd, 140)))
+        elif cid == "has_table_of_contents":
+            for c in chapters:
+                blocks.append(("p", f"CHAPTER {c} {_CHAPTER_TITLES[c - 1]} ........ {c * 10}"))
+        elif cid in ("has_list_of_figures", "has_list_of_tables"):
+            lists["Figure" if cid == "has_list_of_figures" else "Table"] = len(blocks)
+        elif cid.startswith("has_list_of"):
+            for i in range(1, 6):
+                blocks.append(("p", f"{i}. {_sentence(rnd)[:-1]} ........ {i * 7}"))
+        else:
+            blocks.append(("p", _paragraph(rnd, 80)))
+
+    front = sum(t.count(" ") + 1 for _, t in blocks)
+    body_words = max(pages * WORDS_PER_PAGE - front, 1000)
+    n_refs = 2 + pages // 10
+    state: dict = {"front": front, "refs": n_refs}
+
+    for c in chapters:
+        words = int(body_words * _CHAPTER_SHARE[c - 1])
+        blocks.append(("h1", f"CHAPTER {c}"))
+        blocks.append(("h1", _CHAPTER_TITLES[c - 1]))
+        parts = [p for cid, p in phrases if cid.startswith(f"ch{c}_") and cid not in missing]
+        if not parts:
+            blocks += _body(rnd, words, c, state)
+            continue
+        for i, part in enumerate(parts, 1):
+            blocks.append(("h2", f"{c}.{i} {part}"))
+            if part == "Project Objectives" and "objectives_count" not in missing:
+                for j in range(1, 5):
+                    blocks.append(("li", f"{j}. To {_sentence(rnd)[:-1].lower()}."))
+            blocks += _body(rnd, words // len(parts), c, state)
+
+    if "references" not in missing:
+        blocks.append(("h1", "References"))
+        for i in range(1, n_refs + 1):
+            blocks.append(("p", f"[{i}] A. Author, \"{_sentence(rnd)[:-1]},\" Journal of Computing, vol. {i}, 20{10 + i % 14}."))
+
+    # القائمة الثانية بعد الأولى: نضيف من الآخر حتى ما تتحرك مواضع الأولى
+    for kind, at in sorted(lists.items(), key=lambda kv: -kv[1]):
+        entries = [("p", f"{k} {label}: {title} ........ {page}")
+                   for k, label, title, page in state.get("captions", ()) if k == kind]
+        blocks[at:at] = entries
+    return blocks
+
+
+def write_docx(blocks: List[Block], path: str) -> None:
+    from docx import Document
+    from docx.shared import Pt
+
+    d = Document()
+    normal = d.styles["Normal"]
+    normal.font.name = "Times New Roman"
+    normal.font.size = Pt(12)
+    normal.paragraph_format.line_spacing = 1.5
+
+    first = True
+    for kind, text in blocks:
+        if kind == "title":
+            d.add_paragraph(text, style="Title")
+        elif kind == "h1":
+            # كل قسم رئيسي بصفحة جديدة (عنوان الفصل والاسم تبعه بنفس الصفحة)
+            if not first and not text.startswith(tuple(_CHAPTER_TITLES)):
+                d.add_page_break()
+            d.add_paragraph(text, style="Heading 1")
+            first = False
+        elif kind == "h2":
+            d.add_paragraph(text, style="Heading 2")
+        elif kind == "caption":
+            d.add_paragraph(text, style="Caption")
+        else:
+            d.add_paragraph(text)
+    d.save(path)
+
+
+def write_pdf(blocks: List[Block], path: str) -> None:
+    import fitz  # PyMuPDF
+
+    width, height, margin = 595, 842, 72
+    leading = 20.0  # 12pt بمسافة 1.5 تقريباً
+    fonts = {"body": fitz.Font("tiro"), "bold": fitz.Font("tibo")}
+    style = {"title": ("bold", 20), "h1": ("bold", 16), "h2": ("bold", 14),
+             "p": ("body", 12), "li": ("body", 12), "caption": ("body", 11)}
+
+    doc = fitz.open()
+    page: Optional["fitz.Page"] = None
+    tw = None
+    y = height
+
+    def new_page():
+        nonlocal page, tw, y
+        if page is not None:
+            tw.write_text(page)
+        page = doc.new_page(width=width, height=height)
+        tw = fitz.TextWriter(page.rect)
+        y = margin
+
+    for kind, text in blocks:
+        font, size = style[kind]
+        if kind == "h1" and not text.startswith(tuple(_CHAPTER_TITLES)) or page is None:
+            new_page()
+        lines = textwrap.wrap(text, width=int((width - 2 * margin) / (size * 0.45))) or [""]
+        for ln in lines:
+            if y + leading > height - margin:
+                new_page()
+            tw.append((margin, y + size), ln, font=fonts[font], fontsize=size)
+            y += leading
+        y += leading * (0.5 if kind in ("p", "caption") else 0.25)
+    if page is not None:
+        tw.write_text(page)
+    doc.save(path, garbage=3, deflate=True)
+    doc.close()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(prog="python -m benchmarks.synth")
+    ap.add_argument("outputs", nargs="+", help="*.docx and/or *.pdf")
+    ap.add_argument("--pages", type=int, default=60)
+    ap.add_argument("--missing", default="", help="comma-separated check ids to leave out")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--template", default=None, help="check template id (default: bau)")
+    args = ap.parse_args()
+
+    blocks = thesis_blocks(args.pages, [m for m in args.missing.split(",") if m], args.seed, args.template)
+    for out in args.outputs:
+        (write_pdf if out.lower().endswith(".pdf") else write_docx)(blocks, out)
+        print(out)
+
+
+if __name__ == "__main__":
+    main()
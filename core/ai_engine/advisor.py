@@ -1,9 +1,44 @@
-from .processor import AIProcessor
-from .prompts import SYSTEM_PROMPT
-
-class ProjectAdvisor:
-    def __init__(self, api_key):
-        self.processor = AIProcessor(api_key)
-    
-    def check_quality(self, text):
-        return self.processor.get_analysis(text, SYSTEM_PROMPT)
\ No newline at end of file
+import hashlib
+import os
+import threading
+
+from .async_processor import AsyncAIProcessor
+from .context import DEFAULT_BUDGET
+from .llm_cache import get_llm_cache
+from .prompts import SYSTEM_PROMPT
+
+# "budget": طلب واحد بنتائج الفحص الآلي + مقتطفات الأقسام المهمة بحدود DEFAULT_BUDGET token
+# "map-reduce": الوثيقة كاملة، جزء لكل قسم بالتوازي وبعدين طلب يدمج الملاحظات (أدق وأغلى)
+MODES = ("budget", "map-reduce")
+ADVISOR_MODE = os.environ.get("CHECKER_ADVISOR_MODE", "budget")
+
+class ProjectAdvisor:
+    def __init__(self, api_key, mode=None):
+        mode = mode or ADVISOR_MODE
+        if mode not in MODES:
+            raise ValueError(f"advisor mode must be one of {MODES}, got {mode!r}")
+        self.mode = mode
+        # بصمة المفتاح (مش المفتاح نفسه) لتمييز jobs التحليل بمفاتيح مختلفة (core.jobs)
+        self.key_id = hashlib.sha256((api_key or "").encode()).hexdigest()[:16]
+        # الردود محفوظة بكاش دائم: نفس الملف مرة ثانية ما يكلف أي طلب
+        self.processor = AsyncAIProcessor(api_key, cache=get_llm_cache(),
+                                          budget=DEFAULT_BUDGET if mode == "budget" else None)
+    
+    def check_quality(self, text):
+        return self.processor.get_analysis(text, SYSTEM_PROMPT)
+
+    async def acheck_quality(self, text):
+        # نفس check_quality من داخل event loop شغال (core.jobs)؛ الأخطاء ترتفع بدل ما ترجع كنص
+        return await self.processor.analyze(text, SYSTEM_PROMPT)
+
+_advisors = {}
+_advisors_lock = threading.Lock()
+
+def get_advisor(api_key, mode=None):
+    """advisor واحد لكل مفتاح (ووضع) على مستوى الـprocess (مش مع كل rerun لـStreamlit)."""
+    key = (api_key, mode or ADVISOR_MODE)
+    with _advisors_lock:
+        advisor = _advisors.get(key)
+        if advisor is None:
+            advisor = _advisors[key] = ProjectAdvisor(api_key, key[1])
+        return advisor
\ No newline at end of file
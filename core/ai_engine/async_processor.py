@@ -0,0 +1,194 @@
+import asyncio
+import random
+import threading
+import weakref
+
+from core.checks import build_index
+from core.telemetry import span
+from .context import build_context
+from .prompts import CHUNK_PROMPT, CONTEXT_INTRO, REDUCE_INTRO
+
+# حجم كل جزء (تقريباً 3000 token) — الأجزاء تبدأ دائماً عند بداية قسم
+CHUNK_CHARS = 12000
+_RETRYABLE = None
+
+
+def _retryable_errors():
+    # groq + httpx بياخذوا ~0.3s import؛ ما بنحملهم إلا عند أول طلب فعلي
+    global _RETRYABLE
+    if _RETRYABLE is None:
+        from groq import APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
+        _RETRYABLE = (APIConnectionError, APITimeoutError, RateLimitError, InternalServerError)
+    return _RETRYABLE
+
+
+def split_sections(text, max_chars=CHUNK_CHARS):
+    """تقسيم النص لأجزاء على حدود الأقسام (ABSTRACT, CHAPTER n, ...)، وأي قسم أطول من الحد يتقسم على مسافة."""
+    cuts = [0] + [s.start for s in build_index(text).sections() if s.start > 0] + [len(text)]
+    pieces = []
+    for a, b in zip(cuts, cuts[1:]):
+        while b - a > max_chars:
+            cut = text.rfind(" ", a, a + max_chars)
+            cut = cut if cut > a else a + max_chars
+            pieces.append((a, cut))
+            a = cut
+        if b > a:
+            pieces.append((a, b))
+
+    chunks, start, end = [], None, None
+    for a, b in pieces:
+        if start is not None and b - start > max_chars:
+            chunks.append(text[start:end])
+            start = None
+        if start is None:
+            start = a
+        end = b
+    if start is not None:
+        chunks.append(text[start:end])
+    return [c for c in (c.strip() for c in chunks) if c]
+
+
+class AsyncAIProcessor:
+    """
+    تحليل map-reduce للوثيقة كاملة: كل جزء يتحلل بطلب مستقل (بالتوازي، بحد أقصى
+    max_concurrency) على client واحد، وبعدها طلب reduce يدمج الملاحظات بصيغة SYSTEM_PROMPT.
+    مع budget: طلب واحد بنتائج الفحص الآلي ومقتطفات الأقسام (build_context) بحدود budget token.
+    """
+
+    def __init__(self, api_key, model="llama-3.3-70b-versatile", base_url=None,
+                 max_concurrency=4, timeout=60.0, retries=3, backoff=1.0, cache=None, budget=None):
+        self.api_key = api_key
+        self.model = model
+        self.temperature = 0.1
+        self.cache = cache  # LLMCache اختياري
+        self.base_url = base_url
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.budget = budget
+        # مجموع tokens المرسلة مقابل الأصلية (وضع الـbudget)، للعرض بالواجهة
+        self.context_stats = {"calls": 0, "sent_tokens": 0, "original_tokens": 0}
+        self._stats_lock = threading.Lock()
+        # client لكل event loop شغال باستمرار (loop الـjob queue): الاتصالات (keep-alive/TLS) تنعاد استخدامها
+        self._clients = weakref.WeakKeyDictionary()
+
+    def _new_client(self):
+        import httpx
+        from groq import AsyncGroq
+        limits = httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency)
+        return AsyncGroq(api_key=self.api_key, base_url=self.base_url, max_retries=0, timeout=self.timeout,
+                         http_client=httpx.AsyncClient(limits=limits, timeout=self.timeout))
+
+    def get_analysis(self, text, system_prompt):
+        """للاستدعاء المتزامن (بدون event loop شغال)؛ الأخطاء ترجع كنص للواجهة."""
+        try:
+            return _run(self._analyze_once(text, system_prompt))
+        except Exception as e:
+            return f"خطأ في الاتصال بـ Groq: {str(e)}"
+
+    async def _analyze_once(self, text, system_prompt):
+        # loop مؤقت (asyncio.run): الـclient يتسكر معه
+        async with self._new_client() as client:
+            return await self._analyze(client, text, system_prompt)
+
+    async def analyze(self, text, system_prompt):
+        """على loop طويل العمر (core.jobs): نفس الـclient لكل الطلبات على هذا الـloop."""
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = self._clients[loop] = self._new_client()
+        return await self._analyze(client, text, system_prompt)
+
+    async def _analyze(self, client, text, system_prompt):
+        if self.budget:
+            with span("llm.context") as sp:
+                context = build_context(text, budget=self.budget)
+                sp.add(sent_tokens=context.tokens, original_tokens=context.original_tokens)
+            with self._stats_lock:
+                self.context_stats["calls"] += 1
+                self.context_stats["sent_tokens"] += context.tokens
+                self.context_stats["original_tokens"] += context.original_tokens
+            return await self._complete(client, system_prompt, f"{CONTEXT_INTRO}\n\n{context.text}")
+
+        chunks = split_sections(text)
+        if len(chunks) <= 1:
+            return await self._complete(client, system_prompt,
+                                        f"حلل الوثيقة التالية بناءً على قالب BAU الصارم: {text}")
+
+        sem = asyncio.Semaphore(self.max_concurrency)
+
+        async def one(i, chunk):
+            async with sem:
+                prompt = CHUNK_PROMPT.format(part=i + 1, total=len(chunks))
+                return await self._complete(client, prompt, chunk)
+
+        notes = await asyncio.gather(*(one(i, c) for i, c in enumerate(chunks)))
+        merged = "\n\n".join(f"### الجزء {i + 1}\n{n}" for i, n in enumerate(notes))
+        return await self._complete(client, system_prompt, f"{REDUCE_INTRO}\n\n{merged}")
+
+    async def _complete(self, client, system_prompt, user_content):
+        if self.cache is None:
+            return (await self._request(client, system_prompt, user_content))[0]
+        key = self.cache.key(self.model, system_prompt, self.temperature, user_content)
+        return await self.cache.get_or_call(
+            key, self.model, lambda: self._request(client, system_prompt, user_content))
+
+    async def _request(self, client, system_prompt, user_content):
+        with span("llm.request", chars=len(user_content)) as sp:
+            for attempt in range(self.retries + 1):
+                try:
+                    completion = await asyncio.wait_for(
+                        client.chat.completions.create(
+                            model=self.model,
+                            messages=[
+                                {"role": "system", "content": system_prompt},
+                                {"role": "user", "content": user_content},
+                            ],
+                            temperature=self.temperature,
+                        ),
+                        timeout=self.timeout,
+                    )
+                    tokens = completion.usage.total_tokens if completion.usage else 0
+                    sp.add(tokens=tokens)
+                    return completion.choices[0].message.content, tokens
+                except (asyncio.TimeoutError, *_retryable_errors()) as e:
+                    if attempt == self.retries:
+                        raise
+                    sp.add(retries=1)
+                    await asyncio.sleep(self._delay(e, attempt))
+
+    def _delay(self, error, attempt):
+        # retry-after من الـ429 إن وجد، وإلا exponential backoff مع jitter.
+        # بالحالتين بحدود أطول backoff (آخر محاولة)، حتى retry-after كبير ما يعلّق طلبات الـloop
+        longest = self.backoff * (2 ** self.retries)
+        response = getattr(error, "response", None)
+        if response is not None:
+            try:
+                return min(max(float(response.headers.get("retry-after")), 0.0), longest)
+            except (TypeError, ValueError):
+                pass
+        return min(self.backoff * (2 ** attempt) * (0.5 + random.random()), longest)
+
+
+def _run(coro):
+    # Streamlit ما عنده event loop شغال؛ لو في واحد (مثلاً Jupyter) نشغل بـthread منفصل
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    box = {}
+
+    def target():
+        try:
+            box["result"] = asyncio.run(coro)
+        except BaseException as e:
+            box["error"] = e
+
+    t = threading.Thread(target=target)
+    t.start()
+    t.join()
+    if "error" in box:
+        raise box["error"]
+    return box["result"]
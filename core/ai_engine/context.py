@@ -0,0 +1,225 @@
+# بناء نص الـprompt للـLLM تحت حد tokens: بدل أول 15000 حرف (غلاف + إهداء + فهارس)،
+# نرسل نتائج run_checks (ما في داعي الموديل يدور على الفصول الناقصة بنفسه)
+# ومقتطفات من الأقسام المهمة (الملخص، فصل 1 وأجزاؤه، بدايات الفصول) موزعة حسب أهميتها.
+import re
+
+from core.checks import build_index, run_checks
+from core.report import compute_score
+from core.templates import DEFAULT_CONTEXT, SectionRule, get_template
+
+DEFAULT_BUDGET = 4000  # tokens لنص المستخدم (بدون SYSTEM_PROMPT)
+
+# حصة كل قسم (وزن، أقل حصة بالـtokens)، الأقسام المحذوفة، وأجزاء كل فصل: من "context" بقالب الفحص
+# (templates/*.json)، فكل قالب بأسماء أقسامه. صفحة الغلاف (قبل أول عنوان) مش قسم بالقالب.
+COVER_WEIGHT = (0.5, 60)
+
+
+class Layout:
+    """توزيع الأقسام لقالب واحد (من SectionRule.context)."""
+
+    def __init__(self, plan):
+        specs = {r.id: r.context for r in plan.checks if isinstance(r, SectionRule)}
+        self.drop = {k for k, c in specs.items() if c is None}
+        self.top = {k for k, c in specs.items() if c is None or c.within is None}
+        self.weights = {k: (c.weight, c.min) for k, c in specs.items() if c is not None}
+        self.weights["_cover"] = COVER_WEIGHT
+        self.subsections = {}
+        for k, c in specs.items():
+            if c is not None and c.within is not None:
+                self.subsections.setdefault(c.within, set()).add(k)
+
+    def weight(self, key):
+        return self.weights.get(key, (DEFAULT_CONTEXT.weight, DEFAULT_CONTEXT.min))
+
+
+_layouts = {}
+
+
+def layout(template=None):
+    plan = get_template(template)
+    out = _layouts.get(plan.fingerprint)
+    if out is None:
+        out = _layouts[plan.fingerprint] = Layout(plan)
+    return out
+
+
+# تقدير عدد الـtokens بدون tokenizer (قريب من Llama 3): كلمة إنجليزية قصيرة = token،
+# الكلمات الطويلة تتقسم، الأرقام كل 3 خانات token، والعربي تقريباً كل 3 حروف token
+_PIECE = re.compile(r"([A-Za-z]+)|([0-9]+)|([؀-ۿ]+)|\S")
+_SPACES = re.compile(r"[ \t\r\f\v]+")
+_LINES = re.compile(r"\s*\n\s*")
+
+
+def estimate_tokens(text):
+    n = 0
+    for latin, digits, arabic in _PIECE.findall(text):
+        if latin:
+            n += 1 + (len(latin) - 1) // 8
+        elif digits:
+            n += (len(digits) + 2) // 3
+        elif arabic:
+            n += (len(arabic) + 2) // 3
+        else:
+            n += 1
+    return n
+
+
+def _clean(text):
+    return _LINES.sub("\n", _SPACES.sub(" ", text)).strip()
+
+
+def _heading_like(text, hit):
+    """العبارة عنوان بسطر لحاله ("3.4 System Design")، مش جزء من فقرة."""
+    line = text.rfind("\n", 0, hit.start) + 1
+    stop = text.find("\n", hit.end)
+    return hit.start - line <= 12 and (stop if stop >= 0 else len(text)) - line <= 80
+
+
+def document_parts(text, index, lay=None):
+    """
+    [(key, عنوان, start, stop)] بترتيب الوثيقة، والأقسام المحذوفة ("drop" بالقالب) لحالها.
+    العنوان الرئيسي المكرر (CHAPTER 1 بالفهرس وبالمتن) → النسخة الأطول؛
+    أجزاء الفصل → أول ظهور داخل الفصل، ويفضل اللي بسطر عنوان (مش نفس العبارة داخل فقرة).
+    """
+    lay = lay or layout()
+    heads = [h for h in index.hits if h.key in lay.top]
+    spans = {}
+    for i, h in enumerate(heads):
+        stop = heads[i + 1].start if i + 1 < len(heads) else len(text)
+        if h.key not in spans or stop - h.start > spans[h.key][1] - spans[h.key][0]:
+            spans[h.key] = (h.start, stop, h.end)
+
+    parts, dropped = [], []
+    first = min((s[0] for s in spans.values()), default=len(text))
+    if first > 0:
+        parts.append(("_cover", "Title page", 0, first))
+    for key, (start, stop, end) in sorted(spans.items(), key=lambda kv: kv[1][0]):
+        if key in lay.drop:
+            dropped.append(key)
+            continue
+        title = _clean(text[start:end])
+        subs = []
+        children = lay.subsections.get(key)
+        if children:
+            best = {}
+            for h in index.hits:
+                if h.key in children and end <= h.start < stop:
+                    cur = best.get(h.key)
+                    if cur is None or (not _heading_like(text, cur) and _heading_like(text, h)):
+                        best[h.key] = h
+            subs = sorted(best.values(), key=lambda h: h.start)
+        cut = subs[0].start if subs else stop
+        parts.append((key, title, start, cut))
+        for j, h in enumerate(subs):
+            parts.append((h.key, f"{title} › {_clean(text[h.start:h.end])}", h.start,
+                          subs[j + 1].start if j + 1 < len(subs) else stop))
+    return parts, dropped
+
+
+def _checks_block(results):
+    lines = [f"نتائج الفحص الآلي للقالب (دقيقة، اعتمدها كما هي): {compute_score(results)}%"]
+    for r in results:
+        if not r.passed:
+            lines.append(f"❌ {r.title} — {r.details}")
+    passed = [r.title for r in results if r.passed]
+    if passed:
+        lines.append("✅ " + "؛ ".join(passed))
+    return "\n".join(lines)
+
+
+def _allocate(sizes, weights, floors, budget):
+    """floors بالترتيب لحد ما يخلص الـbudget، وبعدين الباقي نسبياً حسب الوزن (بدون تجاوز حجم القسم)."""
+    alloc = [0] * len(sizes)
+    left = budget
+    for i in sorted(range(len(sizes)), key=lambda i: -weights[i]):
+        take = min(sizes[i], floors[i], left)
+        alloc[i] = take
+        left -= take
+    while left > 0:
+        open_ = [i for i in range(len(sizes)) if alloc[i] < sizes[i]]
+        if not open_:
+            break
+        total = sum(weights[i] for i in open_)
+        share = left
+        for i in open_:
+            take = min(sizes[i] - alloc[i], max(1, int(share * weights[i] / total)), left)
+            alloc[i] += take
+            left -= take
+    return alloc
+
+
+def _excerpt(text, tokens, want):
+    """أول want token تقريباً من النص، مقطوع عند نهاية جملة أو كلمة."""
+    if want >= tokens:
+        return text
+    cut = int(len(text) * want / tokens)
+    stop = max(text.rfind(". ", 0, cut), text.rfind("\n", 0, cut))
+    if stop < cut * 0.7:
+        stop = text.rfind(" ", 0, cut)
+    return text[:stop + 1 if stop > 0 else cut].rstrip() + " …"
+
+
+class PromptContext:
+    def __init__(self, text, original_tokens, budget, sections, dropped):
+        self.text = text
+        self.tokens = estimate_tokens(text)
+        self.original_tokens = original_tokens
+        self.budget = budget
+        self.sections = sections
+        self.dropped = dropped
+
+    def stats(self):
+        return {
+            "budget": self.budget,
+            "sent_tokens": self.tokens,
+            "original_tokens": self.original_tokens,
+            "ratio": round(self.tokens / self.original_tokens, 3) if self.original_tokens else 0.0,
+            "sections": self.sections,
+            "dropped": self.dropped,
+        }
+
+
+def build_context(text, index=None, results=None, budget=DEFAULT_BUDGET, template=None):
+    """
+    نص المستخدم للـLLM: نتائج الفحوصات + مقتطفات الأقسام، بحدود budget token تقريباً.
+    index/results لو محسوبين قبل (pipeline) ما ينعاد حسابهم. template: القالب (None → الافتراضي).
+    """
+    plan = get_template(template)
+    if index is None:
+        index = build_index(text, plan)
+    if results is None:
+        results = run_checks(text, index, plan)
+
+    lay = layout(plan)
+    checks = _checks_block(results)
+    parts, dropped = document_parts(text, index, lay)
+    bodies = [_clean(text[start:stop]) for _, _, start, stop in parts]
+    sizes = [estimate_tokens(b) for b in bodies]
+    weights = [lay.weight(k)[0] for k, _, _, _ in parts]
+    floors = [lay.weight(k)[1] for k, _, _, _ in parts]
+    # عناوين الأقسام (### ... (مقتطف 99%)) + " …" بآخر المقتطف
+    headers = sum(estimate_tokens(f"### {title} (مقتطف 99%) …") for _, title, _, _ in parts)
+    room = max(0, budget - estimate_tokens(checks) - headers)
+    alloc = _allocate(sizes, weights, floors, room)
+
+    out, sections = [checks], []
+    for (key, title, _, _), body, size, want in zip(parts, bodies, sizes, alloc):
+        sections.append({"key": key, "tokens": size, "sent": min(want, size)})
+        if want <= 0 or not body:
+            continue
+        note = "" if want >= size else f" (مقتطف {want * 100 // size}%)"
+        out.append(f"### {title}{note}\n{_excerpt(body, size, want)}")
+    original = sum(sizes) + sum(estimate_tokens(_clean(text[s:e])) for s, e in _dropped_spans(parts, text))
+    return PromptContext("\n\n".join(out), original, budget, sections, dropped)
+
+
+def _dropped_spans(parts, text):
+    """كل اللي مش داخل أي part (الأقسام المحذوفة والفهارس)."""
+    covered = sorted((s, e) for _, _, s, e in parts)
+    pos = 0
+    for s, e in covered:
+        if s > pos:
+            yield pos, s
+        pos = max(pos, e)
+    if pos < len(text):
+        yield pos, len(text)
@@ -0,0 +1,157 @@
+import asyncio
+import concurrent.futures
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from core.cache import CACHE_DIR
+
+
+class LLMCache:
+    """
+    كاش دائم (SQLite) لردود الـLLM حسب (model, system prompt, temperature, النص).
+    الطلبات المتطابقة المتزامنة (من أكثر من جلسة Streamlit) تنتظر نفس الطلب بدل تكراره.
+    """
+
+    def __init__(self, path=os.path.join(CACHE_DIR, "llm.sqlite"), ttl=7 * 24 * 3600,
+                 max_bytes=64 * 1024 * 1024):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+
+        d = os.path.dirname(path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            " key TEXT PRIMARY KEY, model TEXT, content TEXT, tokens INTEGER,"
+            " size INTEGER, created REAL, last_used REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS llm_cache_last_used ON llm_cache(last_used)")
+        self._lock = threading.Lock()
+        self._inflight = {}  # key -> concurrent.futures.Future (يشتغل عبر threads و event loops)
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.saved_tokens = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(model, system_prompt, temperature, user_content):
+        h = hashlib.sha256()
+        for part in (model, hashlib.sha256(system_prompt.encode()).hexdigest(), repr(float(temperature)), user_content):
+            h.update(part.encode())
+            h.update(b"\0")
+        return h.hexdigest()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT content, tokens, created FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[2] > self.ttl:
+                if row is not None:
+                    self._db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                return None
+            self._db.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (now, key))
+            return row[0], row[1]
+
+    def put(self, key, model, content, tokens):
+        now = time.time()
+        size = len(content.encode())
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, model, content, tokens, size, now, now),
+            )
+            self._evict(now)
+
+    def _evict(self, now):
+        self._db.execute("DELETE FROM llm_cache WHERE created < ?", (now - self.ttl,))
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # نحذف الأقدم استخداماً حتى نرجع لـ 90% من الحد
+        target = total - int(self.max_bytes * 0.9)
+        freed = 0
+        victims = []
+        for key, size in self._db.execute("SELECT key, size FROM llm_cache ORDER BY last_used"):
+            if freed >= target:
+                break
+            victims.append((key,))
+            freed += size
+        self._db.executemany("DELETE FROM llm_cache WHERE key = ?", victims)
+        self.evictions += len(victims)
+
+    async def get_or_call(self, key, model, call):
+        """
+        call: coroutine function ترجع (content, tokens).
+        hit → من SQLite، وإذا نفس الطلب شغال حالياً ننتظر نتيجته (single-flight).
+        """
+        cached = self.get(key)
+        if cached is not None:
+            with self._lock:
+                self.hits += 1
+                self.saved_tokens += cached[1] or 0
+            return cached[0]
+
+        with self._lock:
+            fut = self._inflight.get(key)
+            leader = fut is None
+            if leader:
+                fut = concurrent.futures.Future()
+                self._inflight[key] = fut
+            else:
+                self.coalesced += 1
+        if not leader:
+            content, tokens = await asyncio.wrap_future(fut)
+            with self._lock:
+                self.saved_tokens += tokens or 0
+            return content
+
+        with self._lock:
+            self.misses += 1
+        try:
+            content, tokens = await call()
+            self.put(key, model, content, tokens)
+            fut.set_result((content, tokens))
+            return content
+        except BaseException as e:
+            fut.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            served = self.hits + self.coalesced
+            total = served + self.misses
+            entries, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+            return {
+                "hits": self.hits,
+                "coalesced": self.coalesced,
+                "misses": self.misses,
+                "hit_rate": round(served / total, 3) if total else 0.0,
+                "saved_tokens": self.saved_tokens,
+                "evictions": self.evictions,
+                "entries": entries,
+                "bytes": size,
+            }
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def get_llm_cache():
+    """كاش واحد على مستوى الـprocess، مشترك بين كل جلسات Streamlit."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = LLMCache()
+        return _default
@@ -0,0 +1,370 @@
+"""
+كشف التشابه مع مشاريع الدفعات السابقة (near-duplicate) باستخدام MinHash + LSH.
+
+كل وثيقة تتقسم لأقسام (Abstract, CHAPTER 1..5, References) + الوثيقة كاملة،
+ولكل قسم توقيع MinHash صغير (uint32 × NUM_PERM) محفوظ كـNumPy array.
+الفهرس يبحث بالـbands (LSH) عن المرشحين فقط، بدون مقارنة مع كل وثيقة.
+
+    python -m core.ai_engine.vector_check build archive/2023 --workers 4
+    python -m core.ai_engine.vector_check query new_project.pdf
+"""
+import argparse
+import json
+import os
+import re
+import threading
+import zlib
+from contextlib import contextmanager
+
+import numpy as np
+
+NUM_PERM = 64
+BANDS = 32           # 32 × 2 rows → عتبة تقريبية ~0.18 Jaccard (النقاط تتصفى بعدها بـMIN_SCORE)
+ROWS = NUM_PERM // BANDS
+SHINGLE = 5          # shingles من 5 كلمات
+MIN_SCORE = 0.3
+SIM_DIR = "similarity"   # بجانب reports/
+
+DOC = "__doc__"
+SECTION_KEYS = ("has_abstract", "chapter_1", "chapter_2", "chapter_3", "chapter_4", "chapter_5", "references")
+
+_rng = np.random.default_rng(20240601)
+_A = _rng.integers(1, 2 ** 63, NUM_PERM, dtype=np.uint64) | np.uint64(1)
+_B = _rng.integers(0, 2 ** 63, NUM_PERM, dtype=np.uint64)
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+_BLOCK = 8192
+_TOKEN = re.compile(r"\w+")
+
+
+def shingles(text):
+    """(hash لكل shingle من 5 كلمات متتالية, موقع أول حرف لكل shingle) — uint64."""
+    words = list(_TOKEN.finditer(text))
+    n = len(words) - SHINGLE + 1
+    if n <= 0:
+        return np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.int64)
+    tok = np.fromiter((zlib.crc32(m.group().lower().encode()) for m in words), dtype=np.uint64, count=len(words))
+    starts = np.fromiter((m.start() for m in words), dtype=np.int64, count=len(words))
+    h = np.zeros(n, dtype=np.uint64)
+    for j in range(SHINGLE):
+        h = h * _MIX + tok[j:j + n]
+    return h, starts[:n]
+
+
+def minhash(sh):
+    """توقيع MinHash (uint32 × NUM_PERM)، أو None لو ما في shingles."""
+    sh = np.unique(sh)
+    if sh.size == 0:
+        return None
+    sig = np.full(NUM_PERM, np.iinfo(np.uint32).max, dtype=np.uint32)
+    for i in range(0, sh.size, _BLOCK):
+        x = sh[i:i + _BLOCK, None]
+        # multiply-shift hashing: نأخذ أعلى 32 bit
+        hv = ((x * _A + _B) >> np.uint64(32)).astype(np.uint32)
+        np.minimum(sig, hv.min(axis=0), out=sig)
+    return sig
+
+
+def _band_hashes(sigs):
+    """(N, NUM_PERM) → (N, BANDS) hash لكل band."""
+    s = sigs.reshape(len(sigs), BANDS, ROWS).astype(np.uint64)
+    h = np.zeros(s.shape[:2], dtype=np.uint64)
+    for r in range(ROWS):
+        h = h * _MIX + s[:, :, r]
+    return h
+
+
+def segments(text, index=None):
+    """
+    [(section, start, stop)] للأقسام الرئيسية. CHAPTER n يظهر أكثر من مرة (TOC، headers)،
+    فكل ظهور يفتح مقطع جديد للقسم نفسه، ومقاطع القسم الواحد تنحسب مع بعض.
+    """
+    if index is None:
+        from core.checks import build_index
+        index = build_index(text)
+    hits = [h for h in index.hits if h.key in SECTION_KEYS]
+    return [(h.key, h.end, hits[i + 1].start if i + 1 < len(hits) else len(text)) for i, h in enumerate(hits)]
+
+
+def signatures(text, index=None):
+    """
+    [(section, signature)] للوثيقة كاملة (DOC) + كل قسم. الـshingles تنحسب مرة وحدة للنص كامل
+    وكل قسم ياخذ slice منها؛ توقيع الوثيقة = أصغر قيمة من تواقيع أجزائها.
+    """
+    h, starts = shingles(text)
+    parts = {}
+    segs = segments(text, index)
+    first = segs[0][1] if segs else len(text)
+    for key, a, b in [(DOC, 0, first)] + segs:
+        i0, i1 = np.searchsorted(starts, [a, b])
+        parts.setdefault(key, []).append(h[i0:i1])
+
+    out = []
+    doc_sig = None
+    for key, chunks in parts.items():
+        sig = minhash(np.concatenate(chunks))
+        if sig is None:
+            continue
+        doc_sig = sig if doc_sig is None else np.minimum(doc_sig, sig)
+        if key != DOC:
+            out.append((key, sig))
+    return ([(DOC, doc_sig)] if doc_sig is not None else []) + out
+
+
+@contextmanager
+def _file_lock(path):
+    """قفل بين الـprocesses (workers طابور الفحص بيضيفوا على نفس الفهرس)."""
+    with open(path, "a+b") as f:
+        if os.name == "nt":
+            import msvcrt
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class SimilarityIndex:
+    """
+    فهرس LSH محفوظ على القرص:
+      signatures.u32 — كل التواقيع (append-only)
+      items.jsonl    — [id الوثيقة, القسم, الاسم] لكل توقيع بنفس الترتيب
+    id الوثيقة = hash محتواها (نفس مفتاح الكاش والتقارير)، فنفس الملف ما بينضاف مرتين.
+    أكثر من process بيضيفوا بنفس الوقت (قفل على القرص)، وكل واحد بيقرأ إضافات غيره قبل البحث.
+    """
+
+    def __init__(self, directory=SIM_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self.items = []
+        self._blocks = [np.empty((0, NUM_PERM), dtype=np.uint32)]   # تنضم لـarray واحدة عند أول query
+        self._sorted = None   # لكل band: (hash مرتب, ترتيب العناصر)، يعاد بناؤه بعد الإضافة
+        self._ids = set()
+        self._items_pos = self._sigs_pos = 0   # لحد وين قرينا الملفين
+        self._refresh()
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _refresh(self):
+        """الصفوف الجديدة على القرص (لحد آخر صف مكتمل بالملفين؛ الكتابة: التواقيع أولاً)."""
+        try:
+            items_size = os.path.getsize(self._path("items.jsonl"))
+            sigs_size = os.path.getsize(self._path("signatures.u32"))
+        except OSError:
+            return
+        if items_size <= self._items_pos:
+            return
+        with open(self._path("items.jsonl"), "rb") as f:
+            f.seek(self._items_pos)
+            data = f.read(items_size - self._items_pos)
+        room = (sigs_size - self._sigs_pos) // (NUM_PERM * 4)
+        rows, used = [], 0
+        for line in data.split(b"\n")[:-1]:   # آخر جزء بدون \n = سطر لسا بينكتب
+            if len(rows) == room:
+                break
+            used += len(line) + 1
+            if line.strip():
+                r = json.loads(line)
+                rows.append((r[0], r[1], r[2] if len(r) > 2 else r[0]))   # فهارس قديمة: [الاسم, القسم]
+        if not rows:
+            return
+        sigs = np.fromfile(self._path("signatures.u32"), dtype=np.uint32, count=len(rows) * NUM_PERM,
+                           offset=self._sigs_pos)
+        self._items_pos += used
+        self._sigs_pos += sigs.nbytes
+        self._append(rows, sigs.reshape(len(rows), NUM_PERM))
+
+    def _append(self, rows, block):
+        self._blocks.append(block)
+        self.items.extend(rows)
+        self._ids.update(r[0] for r in rows)
+        self._sorted = None
+
+    @property
+    def sigs(self):
+        if len(self._blocks) > 1:
+            self._blocks = [np.concatenate(self._blocks)]
+        return self._blocks[0]
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, doc_id):
+        return doc_id in self._ids
+
+    # ---------- insert ----------
+    def add(self, doc_id, text, index=None, name=None):
+        return self.add_signatures(doc_id, signatures(text, index), name)
+
+    def add_signatures(self, doc_id, sigs, name=None):
+        """False لو الوثيقة (نفس الـid) موجودة أصلاً بالفهرس."""
+        if not sigs:
+            return False
+        block = np.stack([s for _, s in sigs]).astype(np.uint32)
+        rows = [(doc_id, key, name or doc_id) for key, _ in sigs]
+        lines = b"".join(json.dumps(r, ensure_ascii=False).encode("utf-8") + b"\n" for r in rows)
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with _file_lock(self._path("lock")):
+                self._refresh()
+                if doc_id in self._ids:
+                    return False
+                # بقايا كتابة ناقصة (process وقف بالنص) بعد آخر صف مكتمل تنشال قبل الإضافة
+                for fname, pos, data in (("signatures.u32", self._sigs_pos, block.tobytes()),
+                                         ("items.jsonl", self._items_pos, lines)):
+                    with open(self._path(fname), "ab") as f:
+                        if f.tell() > pos:
+                            f.truncate(pos)
+                        f.write(data)
+                self._sigs_pos += block.nbytes
+                self._items_pos += len(lines)
+                self._append(rows, block)
+        return True
+
+    # ---------- query ----------
+    def _bands(self):
+        if self._sorted is None:
+            h = _band_hashes(self.sigs)
+            order = np.argsort(h, axis=0, kind="stable")
+            self._sorted = (np.take_along_axis(h, order, axis=0), order)
+        return self._sorted
+
+    def candidates(self, sig):
+        """العناصر اللي تشارك التوقيع بـband واحد على الأقل (binary search لكل band)."""
+        if not len(self.items):
+            return np.empty(0, dtype=np.int64)
+        with self._lock:
+            sorted_h, order = self._bands()
+        q = _band_hashes(sig[None, :])[0]
+        found = []
+        for b in range(BANDS):
+            col = sorted_h[:, b]
+            lo = np.searchsorted(col, q[b], side="left")
+            hi = np.searchsorted(col, q[b], side="right")
+            if hi > lo:
+                found.append(order[lo:hi, b])
+        return np.unique(np.concatenate(found)) if found else np.empty(0, dtype=np.int64)
+
+    def query(self, text, index=None, exclude=(), min_score=MIN_SCORE, top=3):
+        """بلوك التقرير: أعلى تشابه للوثيقة كاملة ولكل قسم."""
+        return self.query_signatures(signatures(text, index), exclude, min_score, top)
+
+    def query_signatures(self, sigs, exclude=(), min_score=MIN_SCORE, top=3):
+        """
+        نفس query بتواقيع محسوبة. exclude: ids وثائق ما تنحسب (الوثيقة نفسها لو انفحصت قبل،
+        ونسختها السابقة لنفس الطالب).
+        """
+        exclude = {exclude} if isinstance(exclude, str) else set(exclude or ())
+        with self._lock:
+            self._refresh()
+        block = {"indexed_docs": len(self._ids - exclude), "max_score": 0.0, "document": [], "sections": []}
+        for key, sig in sigs:
+            cand = self.candidates(sig)
+            if exclude:
+                cand = np.array([i for i in cand if self.items[i][0] not in exclude], dtype=np.int64)
+            if key == DOC:
+                cand = np.array([i for i in cand if self.items[i][1] == DOC], dtype=np.int64)
+            if not cand.size:
+                continue
+            scores = (self.sigs[cand] == sig).mean(axis=1)
+            best = np.argsort(-scores)[:top]
+            matches = [(self.items[cand[i]], round(float(scores[i]), 3)) for i in best if scores[i] >= min_score]
+            if not matches:
+                continue
+            block["max_score"] = max(block["max_score"], matches[0][1])
+            if key == DOC:
+                block["document"] = [{"match": name, "score": s} for (_, _, name), s in matches]
+            else:
+                (_, section, name), s = matches[0]
+                block["sections"].append({"section": key, "score": s, "match": name, "match_section": section})
+        return block
+
+
+def _file_signatures(path):
+    from core.pipeline import extract_file
+
+    doc = extract_file(path)
+    return signatures(doc.raw_text, doc.sections())
+
+
+def _file_id(path):
+    from core.cache import content_hash
+
+    with open(path, "rb") as f:
+        return content_hash(f.read())
+
+
+def build_from_dir(directory, index=None, workers=None):
+    """
+    bulk build: كل ملفات PDF/DOCX بالمجلد (التواقيع تنحسب على processes متوازية).
+    الملفات الموجودة بالفهرس (نفس المحتوى) ما تنعاد، فإعادة التشغيل بتضيف الجديد بس.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from core.batch import iter_files
+
+    index = index or SimilarityIndex()
+    added = failed = skipped = 0
+    todo = {}
+    for path in iter_files(directory):
+        doc_id = _file_id(path)
+        if doc_id in index or doc_id in todo:
+            skipped += 1
+        else:
+            todo[doc_id] = path
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        futures = {doc_id: ex.submit(_file_signatures, path) for doc_id, path in todo.items()}
+        for doc_id, fut in futures.items():
+            try:
+                if index.add_signatures(doc_id, fut.result(), os.path.relpath(todo[doc_id], directory)):
+                    added += 1
+                else:
+                    skipped += 1
+            except Exception:
+                failed += 1
+    return added, failed, skipped
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def get_index():
+    """الفهرس يتحمل مرة واحدة لكل process."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = SimilarityIndex()
+        return _default
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m core.ai_engine.vector_check")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="index every PDF/DOCX in a directory")
+    b.add_argument("directory")
+    b.add_argument("-w", "--workers", type=int, default=None)
+    q = sub.add_parser("query", help="check one file against the index")
+    q.add_argument("file")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "build":
+        added, failed, skipped = build_from_dir(args.directory, workers=args.workers)
+        print(f"indexed {added} documents ({failed} failed, {skipped} already indexed)")
+    else:
+        from core.pipeline import extract_file
+        doc = extract_file(args.file)
+        block = get_index().query(doc.raw_text, doc.sections(), exclude=_file_id(args.file))
+        print(json.dumps(block, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
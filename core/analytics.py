@@ -0,0 +1,256 @@
+# core/analytics.py
+"""
+تحليلات دفعة كاملة من التقارير المحفوظة (core/storage.py) بدون فك ضغط أي تقرير:
+عمود outcomes (byte لكل فحص) ينقرأ لمصفوفة NumPy (تقارير × فحوصات)، ومنها نسب الرسوب لكل فحص،
+توزيع النتائج، وتطور النتائج مع الوقت (قبل الـdeadline) — كلها عمليات vectorized.
+
+CohortIndex يقرأ الصفوف مرة وحدة، و refresh() يضيف بس التقارير الجديدة (id أكبر من آخر واحد)،
+فالصفحة (pages/cohort_analytics.py) ما تعيد قراءة عشرات الآلاف من التقارير مع كل rerun.
+
+    python -m core.analytics --since 2025-05-01 --latest
+"""
+from __future__ import annotations
+import argparse
+import json
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.storage import FAILED, NOT_RUN, ReportStore, get_store
+
+DAY = 86400.0
+
+@dataclass(frozen=True)
+class Cohort:
+    """مجموعة تقارير (بعد الفلترة) كأعمدة: صف لكل تقرير، عمود لكل فحص بـoutcomes."""
+    ids: np.ndarray          # int64
+    created: np.ndarray      # float64 (epoch)
+    score: np.ndarray        # float32، NaN لو التقرير بدون نتيجة
+    files: np.ndarray        # int32: رقم اسم الملف (نفس المشروع بنسخه المختلفة)
+    outcomes: np.ndarray     # uint8 (تقارير × فحوصات): NOT_RUN / PASSED / FAILED
+    check_ids: Tuple[str, ...]
+    titles: Tuple[str, ...]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def projects(self) -> int:
+        return len(np.unique(self.files))
+
+    def failure_rates(self) -> List[Dict[str, Any]]:
+        """لكل فحص: كم مرة انفحص وكم رسب، مرتبة من الأكثر رسوباً."""
+        return _rates((self.outcomes == FAILED).sum(axis=0), (self.outcomes != NOT_RUN).sum(axis=0),
+                      self.check_ids, self.titles)
+
+    def score_stats(self) -> Dict[str, Any]:
+        s = self.score[~np.isnan(self.score)]
+        if not len(s):
+            return {"n": 0}
+        p10, p50, p90 = np.percentile(s, [10, 50, 90])
+        return {"n": int(len(s)), "mean": round(float(s.mean()), 2), "p10": float(p10),
+                "median": float(p50), "p90": float(p90)}
+
+    def score_histogram(self, width: int = 10) -> Tuple[np.ndarray, np.ndarray]:
+        """(بداية كل فئة، عدد التقارير): 0-9, 10-19, ..., 90-100."""
+        s = self.score[~np.isnan(self.score)]
+        edges = np.arange(0, 100 + width, width)
+        counts = np.bincount(np.minimum(s.astype(np.int64) // width, len(edges) - 2),
+                             minlength=len(edges) - 1)
+        return edges[:-1], counts
+
+    def trend(self, days: int = 1, checks: Sequence[str] = ()) -> Dict[str, Any]:
+        """
+        لكل فترة (days يوم): عدد التقارير، متوسط النتيجة، ونسبة رسوب الفحوصات المطلوبة.
+        الفترات بتبدأ من منتصف الليل UTC.
+        """
+        if not len(self):
+            return {"start": [], "reports": [], "mean_score": [], "fail_rate": {}}
+        bucket = (self.created // (DAY * days)).astype(np.int64)
+        keys, inv = np.unique(bucket, return_inverse=True)
+        n = np.bincount(inv, minlength=len(keys))
+        has = ~np.isnan(self.score)
+        sums = np.bincount(inv[has], weights=self.score[has], minlength=len(keys))
+        scored = np.bincount(inv[has], minlength=len(keys))
+        out = {
+            "start": (keys * DAY * days).tolist(),
+            "reports": n.tolist(),
+            "mean_score": np.round(np.divide(sums, scored, out=np.full(len(keys), np.nan), where=scored > 0),
+                                   2).tolist(),
+            "fail_rate": {},
+        }
+        for cid in checks:
+            col = self.outcomes[:, self.check_ids.index(cid)]
+            run = np.bincount(inv, weights=col != NOT_RUN, minlength=len(keys))
+            failed = np.bincount(inv, weights=col == FAILED, minlength=len(keys))
+            out["fail_rate"][cid] = np.round(
+                np.divide(failed, run, out=np.full(len(keys), np.nan), where=run > 0), 4).tolist()
+        return out
+
+    def summary(self, top: int = 10) -> Dict[str, Any]:
+        return {"reports": len(self), "projects": self.projects, "score": self.score_stats(),
+                "failure_rates": self.failure_rates()[:top]}
+
+class CohortIndex:
+    def __init__(self, store: Optional[ReportStore] = None):
+        self.store = store if store is not None else get_store()
+        self._lock = threading.Lock()
+        self._last_id = 0
+        self._backfilled = False
+        self._chunks: List[tuple] = []          # (ids, created, score, files, outcomes) لكل refresh
+        self._all: Optional[tuple] = None       # نفس الأعمدة مدموجة (تنبني عند أول view بعد refresh)
+        self._files: Dict[str, int] = {}
+        self._names: List[str] = []
+        self.check_ids: Tuple[str, ...] = ()
+        self.titles: Tuple[str, ...] = ()
+        # مجاميع لكل التقارير، تتحدث مع كل refresh بالجديد بس
+        self.failed_total = np.zeros(0, np.int64)
+        self.run_total = np.zeros(0, np.int64)
+
+    def __len__(self) -> int:
+        return sum(len(c[0]) for c in self._chunks)
+
+    def refresh(self) -> int:
+        """يضيف التقارير المحفوظة من آخر refresh؛ يرجع عددها."""
+        with self._lock:
+            if not self._backfilled:
+                self.store.backfill_outcomes()
+                self._backfilled = True
+            rows = self.store.outcome_rows(self._last_id)
+            if not rows:
+                return 0
+            pairs = self.store.check_ids()
+            self.check_ids = tuple(p[0] for p in pairs)
+            self.titles = tuple(p[1] or p[0] for p in pairs)
+            k = len(self.check_ids)
+
+            ids = np.fromiter((r[0] for r in rows), np.int64, len(rows))
+            created = np.fromiter((r[2] for r in rows), np.float64, len(rows))
+            score = np.fromiter((np.nan if r[3] is None else r[3] for r in rows), np.float32, len(rows))
+            files = np.fromiter((self._file_code(r[1]) for r in rows), np.int32, len(rows))
+            outcomes = _matrix([r[4] or b"" for r in rows], k)
+
+            self._chunks.append((ids, created, score, files, outcomes))
+            self._all = None
+            self._last_id = int(ids[-1])
+            self.failed_total = _pad(self.failed_total, k) + (outcomes == FAILED).sum(axis=0)
+            self.run_total = _pad(self.run_total, k) + (outcomes != NOT_RUN).sum(axis=0)
+            return len(rows)
+
+    def failure_rates(self) -> List[Dict[str, Any]]:
+        """نسب الرسوب على كل التقارير المحفوظة (كل الرفعات) من المجاميع، بدون دمج الأعمدة أو فلترة."""
+        with self._lock:
+            return _rates(self.failed_total, self.run_total, self.check_ids, self.titles)
+
+    def _file_code(self, name: str) -> int:
+        code = self._files.get(name)
+        if code is None:
+            code = self._files[name] = len(self._names)
+            self._names.append(name)
+        return code
+
+    def _columns(self) -> tuple:
+        with self._lock:
+            if self._all is None:
+                k = len(self.check_ids)
+                if not self._chunks:
+                    self._all = (np.zeros(0, np.int64), np.zeros(0), np.zeros(0, np.float32),
+                                 np.zeros(0, np.int32), np.zeros((0, k), np.uint8))
+                else:
+                    cols = list(zip(*self._chunks))
+                    self._all = tuple(np.concatenate(c) for c in cols[:4]) + (
+                        np.concatenate([_pad_cols(m, k) for m in cols[4]]),)
+                    # مدموجة → chunk واحد، حتى الدمج الجاي يكون على الجديد بس
+                    self._chunks = [self._all]
+            return self._all
+
+    def view(self, since: Optional[float] = None, until: Optional[float] = None,
+             name: Optional[str] = None, latest: bool = False) -> Cohort:
+        """
+        since/until: epoch seconds؛ name: جزء من اسم الملف؛
+        latest: آخر نسخة بس من كل مشروع (نفس اسم الملف) بدل كل الرفعات.
+        """
+        ids, created, score, files, outcomes = self._columns()
+        mask = np.ones(len(ids), bool)
+        if since is not None:
+            mask &= created >= since
+        if until is not None:
+            mask &= created < until
+        if name:
+            needle = name.lower()
+            codes = [i for i, n in enumerate(self._names) if needle in n.lower()]
+            mask &= np.isin(files, codes)
+        sel = np.flatnonzero(mask)
+        if latest and len(sel):
+            # الصفوف مرتبة حسب id (ترتيب الحفظ): آخر ظهور لكل ملف = أول ظهور بالترتيب المعكوس
+            rev = sel[::-1]
+            _, first = np.unique(files[rev], return_index=True)
+            sel = np.sort(rev[first])
+        return Cohort(ids[sel], created[sel], score[sel], files[sel], outcomes[sel],
+                      self.check_ids, self.titles)
+
+def _rates(failed: np.ndarray, run: np.ndarray, check_ids: Sequence[str],
+           titles: Sequence[str]) -> List[Dict[str, Any]]:
+    """لكل فحص: كم مرة انفحص وكم رسب، مرتبة من الأكثر رسوباً (الفحوصات اللي ما انفحصت بتنحذف)."""
+    rate = np.divide(failed, run, out=np.zeros(len(run)), where=run > 0)
+    order = np.lexsort((-failed, -rate))
+    return [{"id": check_ids[i], "title": titles[i], "failed": int(failed[i]),
+             "run": int(run[i]), "rate": round(float(rate[i]), 4)} for i in order if run[i]]
+
+def _pad(a: np.ndarray, k: int) -> np.ndarray:
+    return a if len(a) == k else np.concatenate([a, np.zeros(k - len(a), a.dtype)])
+
+def _pad_cols(m: np.ndarray, k: int) -> np.ndarray:
+    return m if m.shape[1] == k else np.pad(m, ((0, 0), (0, k - m.shape[1])))
+
+def _matrix(rows: List[bytes], k: int) -> np.ndarray:
+    """outcomes (كل صف bytes بطوله) → مصفوفة (n × k)؛ الفحوصات الأحدث من التقرير = NOT_RUN."""
+    n = len(rows)
+    buf = np.frombuffer(b"".join(rows), np.uint8)
+    lengths = np.fromiter(map(len, rows), np.int64, n)
+    if n and (lengths == lengths[0]).all():
+        return _pad_cols(buf.reshape(n, int(lengths[0])), k)
+    out = np.zeros((n, k), np.uint8)
+    starts = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    out[np.repeat(np.arange(n), lengths), np.arange(len(buf)) - starts] = buf
+    return out
+
+_indexes: Dict[str, CohortIndex] = {}
+_indexes_lock = threading.Lock()
+
+def get_cohort_index(store: Optional[ReportStore] = None) -> CohortIndex:
+    """index واحد لكل قاعدة على مستوى الـprocess (الصفحة تنادي refresh() مع كل rerun)."""
+    store = store if store is not None else get_store()
+    with _indexes_lock:
+        index = _indexes.get(store.path)
+        if index is None:
+            index = _indexes[store.path] = CohortIndex(store)
+        return index
+
+def _date(s: str) -> float:
+    return time.mktime(time.strptime(s, "%Y-%m-%d"))
+
+def main() -> None:
+    ap = argparse.ArgumentParser(prog="python -m core.analytics", description="Cohort analytics over stored reports.")
+    ap.add_argument("--db", help="reports database (default: reports/reports.sqlite)")
+    ap.add_argument("--since", type=_date, help="YYYY-MM-DD")
+    ap.add_argument("--until", type=_date, help="YYYY-MM-DD (exclusive)")
+    ap.add_argument("--name", help="only files whose name contains this")
+    ap.add_argument("--latest", action="store_true", help="only the latest upload of each file")
+    ap.add_argument("--top", type=int, default=10)
+    args = ap.parse_args()
+
+    index = get_cohort_index(get_store(args.db) if args.db else None)
+    index.refresh()
+    cohort = index.view(args.since, args.until, args.name, args.latest)
+    summary = cohort.summary(args.top)
+    if args.since is None and args.until is None and not args.name and not args.latest:
+        # بدون فلاتر الدفعة = كل التقارير: النسب جاهزة من مجاميع الـindex
+        summary["failure_rates"] = index.failure_rates()[:args.top]
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+# core/batch.py
+"""
+فحص مجلد كامل من ملفات المشاريع بدون Streamlit.
+
+    python -m core.batch submissions/ --workers 4 --timeout 120 > results.jsonl
+
+كل ملف ينتج سطر JSON واحد على stdout فور انتهائه، والملخص يطبع على stderr.
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import signal
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Iterator, Optional
+
+from core.cache import content_hash
+from core.pipeline import SUPPORTED, check_file
+from core.storage import save_report
+from core.templates import DEFAULT_TEMPLATE, TemplateError, get_template
+
+
+class FileTimeout(Exception):
+    pass
+
+
+def _on_alarm(signum, frame):
+    raise FileTimeout()
+
+
+def iter_files(root: str, recursive: bool = True) -> Iterator[str]:
+    """ملفات PDF/DOCX داخل المجلد (lazy، بدون تحميل القائمة كاملة)."""
+    for entry in os.scandir(root):
+        if entry.is_dir(follow_symlinks=False):
+            if recursive:
+                yield from iter_files(entry.path, recursive)
+        elif entry.name.lower().endswith(SUPPORTED) and not entry.name.startswith("~$"):
+            yield entry.path
+
+
+def process_one(path: str, timeout: float = 0, save: bool = True, full: bool = False,
+                template: Optional[str] = None) -> Dict[str, Any]:
+    """يشتغل داخل worker process. أي خطأ يرجع كسجل error بدل ما يوقف الدفعة."""
+    t0 = time.perf_counter()
+    record: Dict[str, Any] = {"file": path}
+
+    # SIGALRM غير متوفر على Windows: هناك لا يتم فرض الـtimeout
+    use_alarm = timeout > 0 and hasattr(signal, "SIGALRM")
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _on_alarm)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        # التوازي هنا على مستوى الملفات، فكل ملف يستخرج بـprocess واحد
+        doc, report = check_file(path, pdf_workers=1, template=template)
+        record.update({
+            "ok": True,
+            "score": report["score"],
+            "failed": [c["id"] for c in report["checks"] if not c["passed"]],
+            "format_issues": len(report["format_issues"]),
+            "pages": doc.pages,
+            "words": doc.word_count,
+        })
+        if save:
+            with open(path, "rb") as f:
+                digest = content_hash(f.read())
+            record["report_path"] = save_report(report, os.path.basename(path), digest, doc.blocks)
+        if full:
+            record["report"] = report
+    except FileTimeout:
+        record.update({"ok": False, "error": f"timeout after {timeout:g}s"})
+    except Exception as e:
+        record.update({"ok": False, "error": f"{type(e).__name__}: {e}"})
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+    record["seconds"] = round(time.perf_counter() - t0, 3)
+    return record
+
+
+def run_batch(root: str, workers: Optional[int] = None, timeout: float = 120, save: bool = True,
+              full: bool = False, out=sys.stdout, recursive: bool = True,
+              template: Optional[str] = None) -> Dict[str, Any]:
+    workers = workers or os.cpu_count() or 1
+    # حد أقصى للملفات قيد المعالجة حتى تبقى الذاكرة محدودة مهما كان حجم المجلد
+    max_inflight = workers * 2
+    files = iter_files(root, recursive)
+
+    stats = {"docs": 0, "errors": 0, "pages": 0}
+    t0 = time.perf_counter()
+
+    def emit(rec: Dict[str, Any]) -> None:
+        stats["docs"] += 1
+        if rec.get("ok"):
+            stats["pages"] += rec.get("pages", 0)
+        else:
+            stats["errors"] += 1
+        out.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        out.flush()
+
+    pool = ProcessPoolExecutor(max_workers=workers)
+    inflight = {}   # future -> (path, retried)
+    retry = []      # ملفات ضاعت بسبب انهيار worker (مثلاً segfault)، تعاد مرة واحدة لوحدها
+
+    def submit(path: str, retried: bool) -> None:
+        inflight[pool.submit(process_one, path, timeout, save, full, template)] = (path, retried)
+
+    try:
+        exhausted = False
+        while True:
+            if retry:
+                # الإعادة تتم لملف واحد لوحده حتى نعرف بالضبط أي ملف يسبب الانهيار
+                if not inflight:
+                    submit(retry.pop(), True)
+            else:
+                while len(inflight) < max_inflight and not exhausted:
+                    path = next(files, None)
+                    if path is None:
+                        exhausted = True
+                        break
+                    submit(path, False)
+            if not inflight:
+                break
+
+            done, _ = wait(inflight, return_when=FIRST_COMPLETED)
+            broken = False
+            for fut in done:
+                path, retried = inflight.pop(fut)
+                try:
+                    emit(fut.result())
+                except BrokenProcessPool:
+                    broken = True
+                    if retried:
+                        emit({"file": path, "ok": False, "error": "worker process crashed"})
+                    else:
+                        retry.append(path)
+                except Exception as e:
+                    emit({"file": path, "ok": False, "error": f"{type(e).__name__}: {e}"})
+
+            if broken:
+                # الـpool المكسور لا يقبل مهام جديدة: كل ما كان فيه يعاد على pool جديد
+                for fut, (path, retried) in list(inflight.items()):
+                    if retried:
+                        emit({"file": path, "ok": False, "error": "worker process crashed"})
+                    else:
+                        retry.append(path)
+                inflight.clear()
+                pool.shutdown(wait=False, cancel_futures=True)
+                pool = ProcessPoolExecutor(max_workers=workers)
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+    elapsed = time.perf_counter() - t0
+    stats["seconds"] = round(elapsed, 3)
+    stats["docs_per_sec"] = round(stats["docs"] / elapsed, 2) if elapsed else 0.0
+    stats["pages_per_sec"] = round(stats["pages"] / elapsed, 2) if elapsed else 0.0
+    return stats
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m core.batch", description="Batch-check a folder of PDF/DOCX submissions.")
+    ap.add_argument("directory")
+    ap.add_argument("-w", "--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    ap.add_argument("-t", "--timeout", type=float, default=120, help="per-file timeout in seconds (0 = none)")
+    ap.add_argument("--no-save", action="store_true", help="don't store reports in reports/reports.sqlite")
+    ap.add_argument("--full", action="store_true", help="include the full report in each JSON line")
+    ap.add_argument("--no-recursive", action="store_true")
+    ap.add_argument("--template", default=None, help=f"check template id (default: {DEFAULT_TEMPLATE})")
+    args = ap.parse_args(argv)
+
+    if not os.path.isdir(args.directory):
+        ap.error(f"not a directory: {args.directory}")
+    try:
+        get_template(args.template)
+    except TemplateError as e:
+        ap.error(str(e))
+
+    stats = run_batch(args.directory, workers=args.workers, timeout=args.timeout, save=not args.no_save,
+                      full=args.full, recursive=not args.no_recursive, template=args.template)
+    print(f"{stats['docs']} docs ({stats['errors']} errors) in {stats['seconds']}s — "
+          f"{stats['docs_per_sec']} docs/sec, {stats['pages_per_sec']} pages/sec", file=sys.stderr)
+    return 1 if stats["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
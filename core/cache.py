@@ -0,0 +1,209 @@
+# core/cache.py
+"""
+كاش للنتائج حسب محتوى الملف (SHA-256 للـbytes + بصمة القواعد).
+
+Streamlit يعيد تشغيل app.py مع كل تفاعل، والطلاب يرفعون نفس الملف أكثر من مرة،
+فنحتفظ بالـExtractedDoc والتقرير النهائي ومسار التقرير المحفوظ:
+طبقة LRU في الذاكرة + طبقة على القرص، وكلاهما محدود بالحجم.
+"""
+from __future__ import annotations
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from core.extract import ExtractedDoc
+
+CACHE_DIR = "cache"
+# غيّري الرقم عند أي تغيير في شكل التقرير أو منطق الفحص خارج القواعد
+PIPELINE_VERSION = "13"
+
+@dataclass
+class CacheEntry:
+    doc: ExtractedDoc
+    report: Dict[str, Any]
+    report_path: Optional[str] = None
+    owner: Optional[str] = None   # المستخدم اللي انحفظ التقرير (و report["revision"]) باسمه
+
+_fingerprints: Dict[str, str] = {}
+
+def rules_fingerprint(template: Any = None) -> str:
+    """
+    بصمة القالب (id + version + محتواه المترجم) + نسخة الـpipeline، حتى لا نرجع نتائج قديمة
+    بعد تعديل القواعد أو عند تغيير القالب.
+    """
+    from core.templates import get_template
+    plan = get_template(template)
+    fp = _fingerprints.get(plan.fingerprint)
+    if fp is None:
+        h = hashlib.sha256(PIPELINE_VERSION.encode())
+        h.update(f"\0{plan.id}\0{plan.version}\0{plan.fingerprint}".encode())
+        fp = _fingerprints[plan.fingerprint] = h.hexdigest()[:16]
+    return fp
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+def cache_key(data: bytes, suffix: str, template: Any = None) -> str:
+    return key_for_hash(content_hash(data), suffix, template)
+
+def key_for_hash(digest: str, suffix: str, template: Any = None) -> str:
+    return f"{digest}-{suffix.lstrip('.').lower()}-{rules_fingerprint(template)}"
+
+class ResultCache:
+    def __init__(self, directory: Optional[str] = CACHE_DIR,
+                 max_memory_bytes: int = 64 * 1024 * 1024,
+                 max_disk_bytes: int = 512 * 1024 * 1024):
+        self.directory = directory
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+
+        self._lock = threading.Lock()
+        self._mem: "OrderedDict[str, tuple[CacheEntry, int]]" = OrderedDict()
+        self._mem_bytes = 0
+        self._disk_bytes: Optional[int] = None   # يحسب عند أول كتابة
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # ---------- public ----------
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            item = self._mem.get(key)
+            if item is not None:
+                self._mem.move_to_end(key)
+                self.memory_hits += 1
+                return item[0]
+
+        entry, size = self._disk_get(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._mem_put(key, entry, size)
+        return entry
+
+    def put(self, key: str, entry: CacheEntry) -> None:
+        blob = pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._mem_put(key, entry, len(blob))
+        self._disk_put(key, blob)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            total = hits + self.misses
+            return {
+                "hits": hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / total, 3) if total else 0.0,
+                "evictions": self.evictions,
+                "memory_items": len(self._mem),
+                "memory_bytes": self._mem_bytes,
+                "disk_bytes": self._disk_bytes,
+            }
+
+    # ---------- memory tier ----------
+    def _mem_put(self, key: str, entry: CacheEntry, size: int) -> None:
+        if size > self.max_memory_bytes:
+            return
+        old = self._mem.pop(key, None)
+        if old is not None:
+            self._mem_bytes -= old[1]
+        self._mem[key] = (entry, size)
+        self._mem_bytes += size
+        while self._mem_bytes > self.max_memory_bytes:
+            _, (_, sz) = self._mem.popitem(last=False)
+            self._mem_bytes -= sz
+            self.evictions += 1
+
+    # ---------- disk tier ----------
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + ".pkl")
+
+    def _disk_get(self, key: str):
+        if not self.directory:
+            return None, 0
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                blob = f.read()
+            entry = pickle.loads(blob)
+        except FileNotFoundError:
+            return None, 0
+        except Exception:
+            # ملف تالف أو من نسخة قديمة: نعامله كـmiss
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None, 0
+        try:
+            os.utime(path)   # mtime = آخر استخدام (للـLRU على القرص)
+        except OSError:
+            pass
+        return entry, len(blob)
+
+    def _disk_put(self, key: str, blob: bytes) -> None:
+        if not self.directory or len(blob) > self.max_disk_bytes:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(blob)
+        os.replace(tmp, path)
+
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(os.path.getsize(p) for p, _ in self._disk_files())
+            else:
+                self._disk_bytes += len(blob)
+            if self._disk_bytes > self.max_disk_bytes:
+                self._disk_evict()
+
+    def _disk_files(self):
+        for root, _, names in os.walk(self.directory):
+            for n in names:
+                if n.endswith(".pkl"):
+                    p = os.path.join(root, n)
+                    try:
+                        yield p, os.path.getmtime(p)
+                    except OSError:
+                        pass
+
+    def _disk_evict(self) -> None:
+        # نحذف الأقدم استخداماً حتى نرجع لـ 90% من الحد
+        files = sorted(self._disk_files(), key=lambda x: x[1])
+        total = sum(os.path.getsize(p) for p, _ in files)
+        target = int(self.max_disk_bytes * 0.9)
+        for p, _ in files:
+            if total <= target:
+                break
+            try:
+                sz = os.path.getsize(p)
+                os.remove(p)
+            except OSError:
+                continue
+            total -= sz
+            self.evictions += 1
+        self._disk_bytes = total
+
+_default: Optional[ResultCache] = None
+_default_lock = threading.Lock()
+
+def get_cache() -> ResultCache:
+    """كاش واحد على مستوى الـprocess (يبقى بين reruns الخاصة بـStreamlit)."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = ResultCache()
+        return _default
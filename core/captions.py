@@ -0,0 +1,132 @@
+# core/captions.py
+from __future__ import annotations
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+import re
+
+from core.rules import Hit
+from core.sections import SectionIndex, heading_line
+from core.telemetry import timed
+
+# مرور واحد على النص: كل "Figure 3.2" / "Fig. 4" / "Table 1" يتصنف حسب موضعه:
+# caption (بداية سطر + ":" أو "." أو "-" أو عنوان بحرف كبير)، مدخل بـLIST OF FIGURES/TABLES،
+# أو إشارة بالنص. بعدها كل الفحوصات lookups على dict/set بدل مسح النص من جديد.
+_REF = re.compile(r"\b(figures?|fig\.|tables?)\s*(\d+(?:\s*[.\-–]\s*\d+)?)\b", re.IGNORECASE)
+_AFTER_CAPTION = re.compile(r"\s*(?:[:.\-–—]|[A-Z])")
+_LABEL_SEP = re.compile(r"\s*[.\-–]\s*")
+
+LIST_SECTIONS = {"has_list_of_figures": "figure", "has_list_of_tables": "table"}
+SKIP_SECTIONS = ("has_table_of_contents",)
+
+# (kind, label) — kind: "figure" | "table"، label: "3.2" (حسب الفصل) أو "7"
+Label = Tuple[str, str]
+
+def _kind(word: str) -> str:
+    return "table" if word[0] in "tT" else "figure"
+
+def display(key: Label) -> str:
+    return f"{key[0].capitalize()} {key[1]}"
+
+@dataclass
+class CaptionIndex:
+    captions: Dict[Label, List[int]] = field(default_factory=dict)   # label → مواضع تعريفه
+    chapters: Dict[Label, Optional[int]] = field(default_factory=dict)  # الفصل اللي فيه أول تعريف
+    listed: Dict[str, Set[str]] = field(default_factory=dict)        # kind → labels بالقائمة
+    mentions: Dict[Label, List[int]] = field(default_factory=dict)   # label → مواضع الإشارة بالنص
+
+    def duplicates(self) -> List[Label]:
+        return [key for key, pos in self.captions.items() if len(pos) > 1]
+
+    def gaps(self) -> List[Label]:
+        """أرقام ناقصة بالتسلسل: داخل كل فصل (3.1, 3.3 → 3.2) أو على مستوى الوثيقة (1, 3 → 2)."""
+        seq: Dict[Tuple[str, str], Set[int]] = {}
+        for kind, label in self.captions:
+            head, _, n = label.rpartition(".")
+            seq.setdefault((kind, head), set()).add(int(n))
+        out = []
+        for (kind, head), nums in sorted(seq.items()):
+            prefix = f"{head}." if head else ""
+            out += [(kind, f"{prefix}{n}") for n in range(1, max(nums)) if n not in nums]
+        return out
+
+    def misplaced(self) -> List[Tuple[Label, int]]:
+        """captions رقم فصلها غير الفصل اللي هي فيه: (label, الفصل الفعلي)."""
+        out = []
+        for key, chapter in self.chapters.items():
+            head = key[1].partition(".")[0] if "." in key[1] else None
+            if head is not None and chapter is not None and int(head) != chapter:
+                out.append((key, chapter))
+        return out
+
+    def unlisted(self) -> List[Label]:
+        """captions مش موجودة بقائمتها (بس للأنواع اللي إلها قائمة فيها مدخلات)."""
+        return [key for key in self.captions if key[0] in self.listed and key[1] not in self.listed[key[0]]]
+
+    def stale(self) -> List[Label]:
+        """مدخلات بالقائمة بدون caption بالمتن."""
+        return [(kind, label) for kind, labels in self.listed.items() for label in sorted(labels)
+                if (kind, label) not in self.captions]
+
+    def dangling(self) -> List[Label]:
+        """إشارات بالنص لأشكال/جداول مش موجودة."""
+        return [key for key in self.mentions if key not in self.captions]
+
+    def unreferenced(self) -> List[Label]:
+        return [key for key in self.captions if key not in self.mentions]
+
+def _is_chapter(key: str) -> bool:
+    return key.startswith("chapter_") and key[-1].isdigit()
+
+def _top_level(text: str, hit: Hit) -> bool:
+    key = hit.key
+    return key.startswith("has_") or key == "references" or (_is_chapter(key) and heading_line(text, hit))
+
+def _regions(text: str, index: SectionIndex) -> List[Tuple[int, int, str]]:
+    """
+    القوائم والفهرس لحد العنوان الرئيسي التالي (مش أي marker: عبارة مثل "system design"
+    داخل مدخل بالقائمة مش نهاية القسم).
+    """
+    heads = [h for h in index.hits if _top_level(text, h)]
+    out = []
+    for i, h in enumerate(heads):
+        if h.key in LIST_SECTIONS or h.key in SKIP_SECTIONS:
+            out.append((h.end, heads[i + 1].start if i + 1 < len(heads) else index.text_len, h.key))
+    return out
+
+@timed("checks.captions", lambda cap, text, *a, **k: {"chars": len(text), "captions": len(cap.captions)})
+def build_caption_index(text: str, index: SectionIndex) -> CaptionIndex:
+    """
+    كل مراجع الأشكال والجداول بمرور واحد (finditer)؛ القسم والفصل لكل موضع بـbisect
+    على حدود الأقسام من SectionIndex، فالزمن خطي بطول النص مهما كان عدد الأشكال.
+    """
+    regions = _regions(text, index)
+    starts = [r[0] for r in regions]
+    # الفصول بالمتن: آخر عنوان "CHAPTER n" قبل الموضع (نسخ الفهرس بتيجي قبل المتن،
+    # والإشارات بالنص "see Chapter 3" ما بتغير الفصل)
+    chapter_hits = sorted((h.start, int(h.key.rpartition("_")[2])) for h in index.hits
+                          if _is_chapter(h.key) and heading_line(text, h))
+    chapter_starts = [c[0] for c in chapter_hits]
+
+    cap = CaptionIndex()
+    for m in _REF.finditer(text):
+        pos = m.start()
+        key = (_kind(m.group(1)), _LABEL_SEP.sub(".", m.group(2)))
+        line_start = pos == 0 or text[pos - 1] == "\n"
+
+        i = bisect_right(starts, pos) - 1
+        region = regions[i] if i >= 0 and pos < regions[i][1] else None
+        if region is not None:
+            if region[2] in LIST_SECTIONS and line_start:
+                cap.listed.setdefault(key[0], set()).add(key[1])
+            continue
+
+        if line_start and _AFTER_CAPTION.match(text, m.end()):
+            positions = cap.captions.setdefault(key, [])
+            if not positions:
+                j = bisect_right(chapter_starts, pos) - 1
+                cap.chapters[key] = chapter_hits[j][1] if j >= 0 else None
+            positions.append(pos)
+        else:
+            cap.mentions.setdefault(key, []).append(pos)
+    return cap
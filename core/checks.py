@@ -1,133 +1,196 @@
-# core/checks.py
-from __future__ import annotations
-from dataclasses import dataclass
-from typing import List, Dict, Any
-import re
-
-@dataclass
-class CheckResult:
-    id: str
-    title: str
-    passed: bool
-    details: str
-    priority: str  # "high" | "medium" | "low"
-    fix: str
-
-def _has(text: str, pattern: str) -> bool:
-    return re.search(pattern, text, flags=re.IGNORECASE) is not None
-
-def _count_abstract_words(text: str) -> int:
-    # try to capture text between ABSTRACT and next major heading
-    m = re.search(r"\bABSTRACT\b(.*?)(\bDEDICATION\b|\bACKNOWLEDGEMENT\b|\bTABLE OF CONTENTS\b|\bCHAPTER\s*1\b)",
-                  text, flags=re.IGNORECASE | re.DOTALL)
-    if not m:
-        return 0
-    abstract = re.sub(r"\s+", " ", m.group(1)).strip()
-    return len(re.findall(r"\b\w+\b", abstract))
-
-def _count_objectives_lines(text: str) -> int:
-    # naive: count bullet/numbered lines after "Project Objectives"
-    m = re.search(r"\bProject Objectives\b(.*?)(\bSignificance\b|\bProject Organization\b|\bCHAPTER\b)",
-                  text, flags=re.IGNORECASE | re.DOTALL)
-    if not m:
-        return 0
-    block = m.group(1)
-    lines = [ln.strip() for ln in block.splitlines() if ln.strip()]
-    # count numbered/bullets
-    c = 0
-    for ln in lines:
-        if re.match(r"^(\d+[\)\.\-]|[-•*])\s+", ln):
-            c += 1
-    return c
-
-def run_checks(full_text: str) -> List[CheckResult]:
-    t = full_text
-
-    results: List[CheckResult] = []
-
-    # --- Required front matter ---
-    for sec in ["ABSTRACT", "DEDICATION", "ACKNOWLEDGEMENT", "TABLE OF CONTENTS",
-                "LIST OF TABLES", "LIST OF FIGURES", "LIST OF ABBREVIATIONS", "LIST OF APPENDICES"]:
-        ok = _has(t, rf"\b{re.escape(sec)}\b")
-        results.append(CheckResult(
-            id=f"has_{sec.lower().replace(' ', '_')}",
-            title=f"وجود قسم: {sec}",
-            passed=ok,
-            details=("موجود" if ok else "غير موجود"),
-            priority="high" if sec in ["ABSTRACT", "TABLE OF CONTENTS"] else "medium",
-            fix=f"أضيفي صفحة/قسم بعنوان {sec} كما في القالب."
-        ))
-
-    # --- Chapters ---
-    for ch in range(1, 6):
-        ok = _has(t, rf"\bCHAPTER\s*{ch}\b")
-        results.append(CheckResult(
-            id=f"chapter_{ch}",
-            title=f"وجود CHAPTER {ch}",
-            passed=ok,
-            details=("موجود" if ok else "غير موجود"),
-            priority="high",
-            fix=f"أضيفي CHAPTER {ch} بعنوانه حسب القالب."
-        ))
-
-    # References
-    ok_ref = _has(t, r"\bReferences\b")
-    results.append(CheckResult(
-        id="references",
-        title="وجود قسم References",
-        passed=ok_ref,
-        details=("موجود" if ok_ref else "غير موجود"),
-        priority="high",
-        fix="أضيفي قسم References في النهاية."
-    ))
-
-    # --- Abstract word count 250–400 ---
-    abstract_wc = _count_abstract_words(t)
-    ok_abs = 250 <= abstract_wc <= 400
-    results.append(CheckResult(
-        id="abstract_word_count",
-        title="عدد كلمات الـAbstract (250–400)",
-        passed=ok_abs,
-        details=f"عدد الكلمات الحالي: {abstract_wc}",
-        priority="high",
-        fix="وسّعي/اختصري الـAbstract ليصبح بين 250 و 400 كلمة."
-    ))
-
-    # --- Chapter 1 subparts ---
-    for sec in ["Background of The Project", "Problem Statement", "Project Objectives",
-                "Significance of The Project", "Project Organization"]:
-        ok = _has(t, rf"\b{re.escape(sec)}\b")
-        results.append(CheckResult(
-            id=f"ch1_{sec.lower().replace(' ', '_')}",
-            title=f"Chapter 1 يحتوي: {sec}",
-            passed=ok,
-            details=("موجود" if ok else "غير موجود"),
-            priority="high",
-            fix=f"أضيفي فقرة/عنوان {sec} داخل Chapter 1."
-        ))
-
-    # Objectives count 3–5
-    obj_count = _count_objectives_lines(t)
-    ok_obj = 3 <= obj_count <= 5
-    results.append(CheckResult(
-        id="objectives_count",
-        title="عدد أهداف المشروع (3–5)",
-        passed=ok_obj,
-        details=f"عدد الأهداف المكتشفة: {obj_count}",
-        priority="high",
-        fix="اكتبي 3 إلى 5 أهداف (مرقمة أو نقاط) مع وصف قصير لكل هدف."
-    ))
-
-    # --- Chapter 3 requirements ---
-    for sec in ["System Requirements", "Functional Requirements", "None -Functional Requirments", "System Design"]:
-        ok = _has(t, rf"\b{re.escape(sec)}\b")
-        results.append(CheckResult(
-            id=f"ch3_{sec.lower().replace(' ', '_')}",
-            title=f"Chapter 3 يحتوي: {sec}",
-            passed=ok,
-            details=("موجود" if ok else "غير موجود"),
-            priority="high",
-            fix=f"أضيفي العنوان/الجزء {sec} داخل Chapter 3."
-        ))
-
-    return results
+# core/checks.py
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import List, Dict, Any, Iterator, Optional, Set, Tuple, Union
+import re
+
+from core import citations
+from core.captions import CaptionIndex, build_caption_index, display
+from core.sections import SectionIndex
+from core.templates import CountRule, GroupRule, SectionRule, TemplatePlan, get_template
+from core.telemetry import timed
+
+@dataclass(frozen=True)
+class CheckResult:
+    id: str
+    title: str
+    passed: bool
+    details: str
+    priority: str  # "high" | "medium" | "low"
+    fix: str
+
+# العناوين والأولويات والرسائل من القالب (templates/*.json)، مترجمة مرة واحدة لكل process.
+# ABSTRACT_END للملخص (simple_summary) بغض النظر عن القالب
+ABSTRACT_END = ("has_dedication", "has_acknowledgement", "has_table_of_contents", "chapter_1")
+
+@timed("checks.build_index", lambda index, text, *a, **k: {"chars": len(text)})
+def build_index(text: str, template: Union[None, str, TemplatePlan] = None) -> SectionIndex:
+    plan = get_template(template)
+    return SectionIndex(plan.rules.scan(text), len(text), plan.fingerprint)
+
+def abstract_span(index: SectionIndex) -> Optional[tuple]:
+    # try to capture text between ABSTRACT and next major heading
+    return index.block("has_abstract", ABSTRACT_END)
+
+def _count_words(text: str, span: Optional[tuple]) -> int:
+    if span is None:
+        return 0
+    block = re.sub(r"\s+", " ", text[span[0]:span[1]]).strip()
+    return len(re.findall(r"\b\w+\b", block))
+
+def _count_list_lines(text: str, span: Optional[tuple]) -> int:
+    # naive: count bullet/numbered lines in the block
+    if span is None:
+        return 0
+    block = text[span[0]:span[1]]
+    lines = [ln.strip() for ln in block.splitlines() if ln.strip()]
+    # count numbered/bullets
+    c = 0
+    for ln in lines:
+        if re.match(r"^(\d+[\)\.\-]|[-•*])\s+", ln):
+            c += 1
+    return c
+
+_COUNTERS = {"word_count": _count_words, "list_count": _count_list_lines}
+
+def _count_check(rule: CountRule, text: str, index: SectionIndex) -> CheckResult:
+    n = _COUNTERS[rule.kind](text, index.block(rule.section, rule.until))
+    return CheckResult(
+        id=rule.id,
+        title=rule.title,
+        passed=rule.min <= n <= rule.max,
+        details=rule.details.format(n=n),
+        priority=rule.priority,
+        fix=rule.fix,
+    )
+
+def _names(keys, limit: int = 5, show=display) -> str:
+    shown = [show(k) for k in keys[:limit]]
+    return "، ".join(shown) + ("، …" if len(keys) > limit else "")
+
+def _caption_checks(cap: CaptionIndex) -> List[CheckResult]:
+    problems = []
+    if cap.gaps():
+        problems.append(f"أرقام ناقصة: {_names(cap.gaps())}")
+    if cap.duplicates():
+        problems.append(f"مكرر: {_names(cap.duplicates())}")
+    misplaced = cap.misplaced()
+    if misplaced:
+        problems.append("بغير فصلها: " + "، ".join(f"{display(k)} (CHAPTER {ch})" for k, ch in misplaced[:5]))
+    total = len(cap.captions)
+    numbering = CheckResult(
+        id="captions_numbering",
+        title="ترقيم الأشكال والجداول (Figure 3.2)",
+        passed=not problems,
+        details="؛ ".join(problems) if problems else (f"{total} شكل/جدول مرقمة بالتسلسل" if total
+                                                     else "لا يوجد أشكال أو جداول مرقمة"),
+        priority="medium",
+        fix="رقّمي الأشكال والجداول بالتسلسل داخل كل فصل (Figure 3.1، Figure 3.2، …) بدون تكرار أو قفز.",
+    )
+
+    unlisted, stale = cap.unlisted(), cap.stale()
+    problems = []
+    if unlisted:
+        problems.append(f"غير مدرجة بالقائمة: {_names(unlisted)}")
+    if stale:
+        problems.append(f"بالقائمة بدون caption: {_names(stale)}")
+    listed = CheckResult(
+        id="captions_listed",
+        title="الأشكال والجداول مدرجة في LIST OF FIGURES / LIST OF TABLES",
+        passed=not problems,
+        details="؛ ".join(problems) if problems else ("القوائم مطابقة للـcaptions" if cap.listed
+                                                     else "لا يوجد مدخلات بالقوائم للمقارنة"),
+        priority="low",
+        fix="حدّثي LIST OF FIGURES و LIST OF TABLES (Update Table في Word) لتطابق الـcaptions بالمتن.",
+    )
+
+    dangling, unreferenced = cap.dangling(), cap.unreferenced()
+    details = f"إشارات لأشكال/جداول غير موجودة: {_names(dangling)}" if dangling else "كل الإشارات بالنص صحيحة"
+    if unreferenced:
+        details += f"؛ غير مشار لها بالنص: {len(unreferenced)}"
+    references = CheckResult(
+        id="captions_references",
+        title="الإشارات للأشكال والجداول بالنص",
+        passed=not dangling,
+        details=details,
+        priority="medium",
+        fix="صححي أرقام الإشارات بالنص (مثل Figure 3.2) لتطابق الـcaptions، وأشيري لكل شكل وجدول بالنص.",
+    )
+    return [numbering, listed, references]
+
+def _citation_checks(bib: citations.Bibliography) -> List[CheckResult]:
+    n_entries, n_cited = len(bib.entries), sum(len(v) for v in bib.cited.values())
+    uncited = bib.uncited()
+    cited = CheckResult(
+        id="references_cited",
+        title="كل مرجع بقائمة References مستشهد به بالنص",
+        passed=not uncited,
+        details=(f"غير مستشهد بها ({len(uncited)} من {n_entries}): {_names(uncited, show=citations.display)}" if uncited
+                 else f"{n_entries} مرجع، كلها مستشهد بها" if n_entries else "لا يوجد مدخلات بقائمة المراجع"),
+        priority="medium",
+        fix="استشهدي بكل مرجع بالنص (مثل [3] أو (Smith, 2020)) أو احذفي المراجع غير المستخدمة.",
+    )
+
+    missing = bib.missing()
+    resolved = CheckResult(
+        id="citations_resolved",
+        title="كل استشهاد بالنص له مرجع بالقائمة",
+        passed=not missing,
+        details=(f"استشهادات بدون مرجع: {_names(missing, show=citations.display)}" if missing
+                 else f"{n_cited} استشهاد، كلها موجودة بالقائمة" if n_cited else "لا يوجد استشهادات بالنص"),
+        priority="high",
+        fix="أضيفي المراجع الناقصة لقائمة References، أو صححي رقم/اسم وسنة الاستشهاد بالنص.",
+    )
+
+    dups = bib.duplicates()
+    shown = _names(dups, show=lambda e: citations.display(e.key) if e.key else e.text[:40])
+    duplicates = CheckResult(
+        id="references_duplicates",
+        title="لا يوجد مراجع مكررة",
+        passed=not dups,
+        details=f"مكرر: {shown}" if dups else "لا يوجد تكرار",
+        priority="low",
+        fix="احذفي المدخلات المكررة من References وأعيدي ترقيم الاستشهادات إن لزم.",
+    )
+    return [cited, resolved, duplicates]
+
+def _evaluate(rule: Union[SectionRule, CountRule, GroupRule], t: str, index: SectionIndex,
+              found: Set[str]) -> List[CheckResult]:
+    if isinstance(rule, SectionRule):
+        # نتائج الأقسام جاهزة بالـplan (موجود/غير موجود)
+        return [rule.passed if rule.id in found else rule.failed]
+    if isinstance(rule, CountRule):
+        return [_count_check(rule, t, index)]
+    if rule.kind == "captions":
+        # الترقيم، القوائم، والإشارات بالنص (فهرس واحد لكل الوثيقة)
+        return _caption_checks(build_caption_index(t, index))
+    # المدخلات مقابل الاستشهادات بالمتن (مفاتيح مطبّعة)
+    return _citation_checks(citations.build_bibliography(t, index))
+
+def iter_checks(full_text: str, index: Optional[SectionIndex] = None,
+                template: Union[None, str, TemplatePlan] = None) -> Iterator[Tuple[str, List[CheckResult]]]:
+    """
+    فحوصات القالب بالترتيب اللي بالملف، مجموعة مجموعة: (اسم المجموعة، نتائجها) أول ما تخلص،
+    حتى الواجهة تعرضها قبل ما يخلص باقي الفحص. index مبني بنفس القالب (doc.sections(template))
+    وإلا ينعاد بناؤه.
+    """
+    t = full_text
+    plan = get_template(template)
+    if index is None or index.template != plan.fingerprint:
+        index = build_index(t, plan)
+    found = index.found()
+
+    group, batch = None, []
+    for rule in plan.checks:
+        if rule.group != group and batch:
+            yield group, batch
+            batch = []
+        group = rule.group
+        batch += _evaluate(rule, t, index, found)
+    if batch:
+        yield group, batch
+
+@timed("checks.run_checks", lambda results, text, *a, **k: {"chars": len(text), "checks": len(results)})
+def run_checks(full_text: str, index: Optional[SectionIndex] = None,
+               template: Union[None, str, TemplatePlan] = None) -> List[CheckResult]:
+    return [r for _, results in iter_checks(full_text, index, template) for r in results]
@@ -0,0 +1,206 @@
+# core/citations.py
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple, Union
+import hashlib
+import re
+import unicodedata
+
+from core.sections import SectionIndex, heading_line
+from core.telemetry import timed
+
+# قائمة المراجع تتحول لمدخلات (مرقمة [n] أو author-year)، وكل الاستشهادات بالمتن تتجمع
+# بمرور واحد. المطابقة على مفاتيح مطبّعة (رقم، أو اسم العائلة + السنة) بـdict/set،
+# فالزمن خطي بعدد المراجع والاستشهادات بدل مقارنة كل استشهاد بكل مرجع.
+
+# (style, value) — style: "n" → رقم المرجع، "ay" → "smith 2020a"
+Key = Tuple[str, Union[int, str]]
+
+_NUMBERED = re.compile(r"^\s*(?:\[(\d{1,3})\]|(\d{1,3})[.)])\s+\S")
+_YEAR = re.compile(r"\b((?:19|20)\d{2})([a-z]?)\b|\bn\.\s?d\.", re.IGNORECASE)
+# بداية مدخل author-year: "Smith, J." / "Al-Zoubi, T." / "World Health Organization. (2020)"
+_AUTHOR_START = re.compile(r"^\s*[A-Z][\w'’\-]+(?:\s+(?:[A-Z][\w'’\-]+|van|von|de|der|al))*\s*(?:,\s*[A-Z]|\.?\s*\()")
+_APPENDIX = re.compile(r"^\s*appendi(?:x|ces)\b", re.IGNORECASE)
+
+_NUMERIC_CITE = re.compile(r"\[(\d{1,3}(?:\s*[\-–,]\s*\d{1,3})*)\]")
+_NAME = r"[A-Z][\w'’\-]+"
+_AUTHOR_YEAR_CITE = re.compile(
+    # سردي: Smith (2020) / Smith et al. (2019a) / Smith and Jones (2018)
+    rf"(?P<name>{_NAME})(?:\s+et\s+al\.?|\s+(?:and|&)\s+{_NAME})?\s*\((?P<year>(?:19|20)\d{{2}}[a-z]?)\)"
+    # بين قوسين: (Smith, 2020; Jones & Brown, 2019, 2021)
+    r"|\((?P<group>[^()\n]{0,300}?\b(?:19|20)\d{2}[a-z]?\b[^()\n]{0,60}?)\)"
+)
+_CITE_PREFIX = re.compile(r"^(?:e\.g\.,?|i\.e\.,?|see(?:\s+also)?|cf\.)\s*", re.IGNORECASE)
+_MAX_RANGE = 50  # [3-700] غالباً خطأ كتابة، مش 700 استشهاد
+
+def _norm(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in text.lower() if c.isalnum())
+
+def _author_key(author: str, year: str) -> Optional[str]:
+    """أول كلمة من اسم المؤلف الأول + السنة: "Smith, J." و "Smith et al." → "smith 2020"."""
+    words = author.replace("’", "'").split()
+    name = _norm(words[0]) if words else ""
+    return f"{name} {year.lower()}" if name else None
+
+def display(key: Key) -> str:
+    if key[0] == "n":
+        return f"[{key[1]}]"
+    name, _, year = str(key[1]).partition(" ")
+    return f"{name.capitalize()} ({year})"
+
+@dataclass
+class Entry:
+    key: Optional[Key]
+    text: str
+    pos: int
+    digest: bytes   # hash للنص المطبّع (بدون الرقم): نفس المرجع مكتوب مرتين برقمين مختلفين
+
+@dataclass
+class Bibliography:
+    style: str = ""                                                  # "n" | "ay" | "" (ما في قائمة)
+    entries: List[Entry] = field(default_factory=list)
+    cited: Dict[Key, List[int]] = field(default_factory=dict)       # key → مواضع الاستشهاد بالمتن
+    _keys: Dict[Key, List[Entry]] = field(default_factory=dict, repr=False)
+
+    def __post_init__(self) -> None:
+        for e in self.entries:
+            if e.key is not None:
+                self._keys.setdefault(e.key, []).append(e)
+
+    def uncited(self) -> List[Key]:
+        return [key for key in self._keys if key not in self.cited]
+
+    def missing(self) -> List[Key]:
+        """استشهادات بالمتن ما إلها مدخل بالقائمة."""
+        return [key for key in self.cited if key not in self._keys]
+
+    def duplicates(self) -> List[Entry]:
+        """نفس الرقم/المفتاح مرتين، أو نفس نص المرجع (بعد التطبيع) تحت مفتاحين."""
+        out, seen = [], set()
+        for e in self.entries:
+            repeated = e.key is not None and self._keys[e.key][0] is not e
+            if repeated or e.digest in seen:
+                out.append(e)
+            seen.add(e.digest)
+        return out
+
+def references_span(text: str, index: SectionIndex) -> Optional[Tuple[int, int]]:
+    """
+    قسم المراجع: آخر "References" بسطر لحاله (الأولى غالباً بالفهرس)، لحد العنوان
+    الرئيسي التالي (بسطر لحاله، sections.heading_line) أو نهاية النص.
+    """
+    head = None
+    for h in index.hits:
+        if h.key != "references":
+            continue
+        line = text.rfind("\n", 0, h.start) + 1
+        stop = text.find("\n", h.end)
+        if len(text[line:stop if stop >= 0 else len(text)].strip()) <= 30:
+            head = h
+    if head is None:
+        return None
+    for h in index.hits:
+        # بس عنوان بسطر لحاله: "Chapter 4 of ..." داخل مدخل مش نهاية القائمة
+        if h.start > head.end and (h.key.startswith("has_") or h.key[-1].isdigit()) and heading_line(text, h):
+            return head.end, h.start
+    return head.end, index.text_len
+
+def _split_entries(block: str, base: int) -> Tuple[str, List[Tuple[int, str]]]:
+    """(style, [(موضع, نص المدخل)]): كل سطر يبدأ مدخل جديد أو يكمل اللي قبله (أسطر PDF الملفوفة)."""
+    lines, pos = [], base
+    for ln in block.split("\n"):
+        if _APPENDIX.match(ln):
+            break
+        if ln.strip():
+            lines.append((pos, ln))
+        pos += len(ln) + 1
+    numbered = sum(1 for _, ln in lines if _NUMBERED.match(ln))
+    style = "n" if numbered >= 2 or (numbered and numbered * 2 >= len(lines)) else "ay"
+
+    out: List[Tuple[int, str]] = []
+    for i, (at, ln) in enumerate(lines):
+        if style == "n":
+            start = _NUMBERED.match(ln) is not None
+        else:
+            # السنة على نفس السطر أو اللي بعده (قائمة مؤلفين طويلة ملفوفة)
+            nxt = lines[i + 1][1] if i + 1 < len(lines) else ""
+            start = _AUTHOR_START.match(ln) is not None and _YEAR.search(ln + " " + nxt) is not None
+        if start or not out:
+            out.append((at, ln.strip()))
+        else:
+            out[-1] = (out[-1][0], f"{out[-1][1]} {ln.strip()}")
+    return style, out
+
+def _entry(style: str, pos: int, text: str) -> Entry:
+    key: Optional[Key] = None
+    body = text
+    if style == "n":
+        m = _NUMBERED.match(text)
+        if m:
+            key = ("n", int(m.group(1) or m.group(2)))
+            body = text[m.end() - 1:]
+    else:
+        y = _YEAR.search(text)
+        if y:
+            author = re.split(r"[,.(]", text, 1)[0]
+            year = (y.group(1) + y.group(2)) if y.group(1) else "n.d."
+            ak = _author_key(author, year)
+            key = ("ay", ak) if ak else None
+    return Entry(key, text, pos, hashlib.blake2b(_norm(body).encode(), digest_size=8).digest())
+
+def _numeric_citations(text: str, cited: Dict[Key, List[int]], offset: int = 0) -> None:
+    for m in _NUMERIC_CITE.finditer(text):
+        for part in m.group(1).split(","):
+            lo, _, hi = re.sub(r"\s", "", part).replace("–", "-").partition("-")
+            a = int(lo)
+            b = int(hi) if hi else a
+            if not a <= b <= a + _MAX_RANGE:
+                b = a
+            for n in range(a, b + 1):
+                cited.setdefault(("n", n), []).append(offset + m.start())
+
+def _author_year_citations(text: str, cited: Dict[Key, List[int]], offset: int = 0) -> None:
+    for m in _AUTHOR_YEAR_CITE.finditer(text):
+        if m.group("name"):
+            key = _author_key(m.group("name"), m.group("year"))
+            if key:
+                cited.setdefault(("ay", key), []).append(offset + m.start())
+            continue
+        for part in m.group("group").split(";"):
+            part = _CITE_PREFIX.sub("", part.strip())
+            years = list(_YEAR.finditer(part))
+            # (2020) لحاله أو (p. 12): مش استشهاد باسم
+            if not years or years[0].start() == 0:
+                continue
+            author = part[:years[0].start()].rstrip(" ,")
+            if not author[:1].isupper():  # (e.g., in 2020 the ...)
+                continue
+            for y in years:
+                key = _author_key(author, (y.group(1) + y.group(2)) if y.group(1) else "n.d.")
+                if key:
+                    cited.setdefault(("ay", key), []).append(offset + m.start())
+
+@timed("checks.citations", lambda bib, text, *a, **k: {"chars": len(text), "entries": len(bib.entries),
+                                                         "citations": sum(len(v) for v in bib.cited.values())})
+def build_bibliography(text: str, index: SectionIndex) -> Bibliography:
+    """
+    المدخلات من قسم المراجع، والاستشهادات من باقي النص (قبل القسم وبعده) بنفس أسلوب
+    القائمة؛ لو ما في قائمة، الأسلوب حسب الموجود بالمتن ([n] أولاً).
+    """
+    span = references_span(text, index)
+    cited: Dict[Key, List[int]] = {}
+    if span is None:
+        chunks, entries, style = [(text, 0)], [], ""
+    else:
+        style, parts = _split_entries(text[span[0]:span[1]], span[0])
+        entries = [_entry(style, at, t) for at, t in parts]
+        chunks = [(text[:span[0]], 0), (text[span[1]:], span[1])]
+
+    if style in ("n", ""):
+        for chunk, offset in chunks:
+            _numeric_citations(chunk, cited, offset)
+    if style == "ay" or (style == "" and not cited):
+        for chunk, offset in chunks:
+            _author_year_citations(chunk, cited, offset)
+    return Bibliography(style=style, entries=entries, cited=cited)
@@ -1,24 +1,99 @@
-# core/compare.py
-import json
-from typing import Dict, Any
-
-def load_report(path: str) -> Dict[str, Any]:
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-def compare_reports(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
-    old_score = old.get("score", 0)
-    new_score = new.get("score", 0)
-
-    old_failed = {c["id"] for c in old.get("checks", []) if not c.get("passed")}
-    new_failed = {c["id"] for c in new.get("checks", []) if not c.get("passed")}
-
-    fixed = sorted(list(old_failed - new_failed))
-    still_missing = sorted(list(new_failed))
-    return {
-        "score_before": old_score,
-        "score_after": new_score,
-        "improved_by": new_score - old_score,
-        "fixed_items": fixed,
-        "still_missing": still_missing
-    }
+# core/compare.py
+import bisect
+import json
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+from core.extract import ExtractedDoc
+
+from core.storage import ANY_OWNER, get_store, load_ref
+
+def load_report(path: str) -> Dict[str, Any]:
+    """ملف JSON قديم، أو مرجع تقرير محفوظ بصيغة "reports/reports.sqlite#12"."""
+    report = load_ref(path)
+    if report is not None:
+        return report
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def load_latest(filename: str, owner: Any = ANY_OWNER) -> Optional[Dict[str, Any]]:
+    """
+    آخر تقرير محفوظ لنفس اسم الملف (بدون البحث بملفات reports/).
+    افتراضياً من أي مستخدم (واجهة، batch أو سطر أوامر)؛ owner=<الرقم الجامعي> → تقارير هذا المستخدم بس،
+    owner=None → تقارير سطر الأوامر/batch بس.
+    """
+    store = get_store()
+    row = store.latest_for_file(filename, owner)
+    return store.get(row["id"]) if row else None
+
+def compare_reports(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    old_score = old.get("score", 0)
+    new_score = new.get("score", 0)
+
+    old_failed = {c["id"] for c in old.get("checks", []) if not c.get("passed")}
+    new_failed = {c["id"] for c in new.get("checks", []) if not c.get("passed")}
+
+    fixed = sorted(list(old_failed - new_failed))
+    still_missing = sorted(list(new_failed))
+    return {
+        "score_before": old_score,
+        "score_after": new_score,
+        "improved_by": new_score - old_score,
+        "fixed_items": fixed,
+        "still_missing": still_missing
+    }
+
+def _block_offsets(doc: ExtractedDoc) -> List[Tuple[bytes, int]]:
+    """(hash, موضع النص في raw_text) لكل فقرة/صفحة فيها نص."""
+    if doc.page_spans:
+        return [(b, a) for b, (a, z) in zip(doc.blocks, doc.page_spans) if z > a]
+    out, pos = [], 0
+    for p in doc.paragraphs:
+        out.append((doc.blocks[p.index], pos))
+        pos += len(p.text) + 1
+    return out
+
+def _sections_of(doc: ExtractedDoc, digests: set) -> List[str]:
+    """أسماء الأقسام (حسب فهرس العناوين) اللي فيها فقرات/صفحات من digests، بالترتيب."""
+    secs = doc.sections().sections()
+    starts = [s.start for s in secs]
+    out: List[str] = []
+    for b, pos in _block_offsets(doc):
+        if b not in digests:
+            continue
+        i = bisect.bisect_right(starts, pos) - 1
+        name = secs[i].key if i >= 0 else "front_matter"
+        if name not in out:
+            out.append(name)
+    return out
+
+def diff_revisions(old_report: Dict[str, Any], old_blocks: Sequence[bytes], new_report: Dict[str, Any],
+                   new_doc: ExtractedDoc, old_doc: Optional[ExtractedDoc] = None) -> Dict[str, Any]:
+    """
+    compare_reports + شو اللي تغير فعلاً بين النسختين: عدد الفقرات (docx) أو الصفحات (pdf)
+    المتغيرة، الأقسام اللي فيها التغيير، والإصلاحات اللي انحلت.
+    old_doc (اختياري، من الكاش) يسمح بمعرفة الأقسام اللي انحذف منها نص.
+    """
+    diff = compare_reports(old_report, new_report)
+    old_set, new_set = set(old_blocks), set(new_doc.blocks)
+    added = new_set - old_set
+    removed = old_set - new_set
+
+    def whats(report: Dict[str, Any]) -> set:
+        return {f["what"] for f in report.get("fixes", []) + report.get("format_issues", [])}
+
+    before, after = whats(old_report), whats(new_report)
+    old_failed = {c["id"] for c in old_report.get("checks", []) if not c.get("passed")}
+    diff.update({
+        "unit": "page" if new_doc.page_spans else "paragraph",
+        "unchanged": sum(1 for b in new_doc.blocks if b in old_set),
+        "changed": sum(1 for b in new_doc.blocks if b in added),
+        "removed": sum(1 for b in old_blocks if b in removed),
+        "changed_sections": _sections_of(new_doc, added),
+        "fixes_landed": sorted(before - after),
+        "new_issues": sorted(after - before),
+        "regressed_items": sorted(c["id"] for c in new_report.get("checks", [])
+                                  if not c.get("passed") and c["id"] not in old_failed),
+    })
+    if old_doc is not None and old_doc.blocks:
+        diff["removed_from_sections"] = _sections_of(old_doc, removed)
+    return diff
@@ -1,59 +1,525 @@
-# core/extract.py
-from __future__ import annotations
-from dataclasses import dataclass
-from typing import List, Tuple, Optional
-import re
-
-@dataclass
-class DocSection:
-    text: str
-    style: str  # for docx paragraphs: "Heading 1", "Heading 2", etc.
-
-@dataclass
-class ExtractedDoc:
-    raw_text: str
-    paragraphs: List[DocSection]         # docx only (empty for pdf)
-    headings: List[str]                 # normalized headings
-    word_count: int
-
-def _normalize(s: str) -> str:
-    s = re.sub(r"\s+", " ", s.strip())
-    return s.lower()
-
-def extract_docx(path: str) -> ExtractedDoc:
-    from docx import Document
-
-    doc = Document(path)
-    paras: List[DocSection] = []
-    all_text_parts = []
-    headings = []
-
-    for p in doc.paragraphs:
-        t = (p.text or "").strip()
-        if not t:
-            continue
-        style_name = (p.style.name if p.style else "") or ""
-        paras.append(DocSection(text=t, style=style_name))
-        all_text_parts.append(t)
-
-        # collect headings based on style name
-        if "heading" in style_name.lower() or "chapter" in t.lower():
-            headings.append(_normalize(t))
-
-    raw = "\n".join(all_text_parts)
-    wc = len(re.findall(r"\b\w+\b", raw))
-    return ExtractedDoc(raw_text=raw, paragraphs=paras, headings=headings, word_count=wc)
-
-def extract_pdf(path: str) -> ExtractedDoc:
-    import fitz  # PyMuPDF
-
-    doc = fitz.open(path)
-    text_parts = []
-    for page in doc:
-        text_parts.append(page.get_text("text"))
-    raw = "\n".join(text_parts)
-    raw = re.sub(r"\s+", " ", raw).strip()
-
-    headings = []  # pdf headings detection is hard; we rely on regex checks later
-    wc = len(re.findall(r"\b\w+\b", raw))
-    return ExtractedDoc(raw_text=raw, paragraphs=[], headings=headings, word_count=wc)
+# core/extract.py
+from __future__ import annotations
+from array import array
+from collections import Counter
+from dataclasses import dataclass, field
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Dict, Iterator, List, NamedTuple, Sequence, Tuple, Optional, Union
+import dataclasses
+import hashlib
+import io
+import os
+import re
+import sys
+
+from core.telemetry import timed
+
+if TYPE_CHECKING:
+    from core.sections import SectionIndex
+
+# docx لا يخزن عدد الصفحات، نقدّره (صفحة رسالة 12pt بمسافة 1.5 تقريباً)
+WORDS_PER_PAGE = 300
+
+# حماية من الملفات الضخمة/المعطوبة: نرفضها قبل ما نبدأ الاستخراج
+MAX_FILE_BYTES = 50 * 1024 * 1024
+MAX_PDF_PAGES = 1000
+
+# PDF: كل worker يفتح الملف بنفسه ويستخرج مجموعة صفحات
+PDF_CHUNK_PAGES = 50
+PDF_PARALLEL_MIN_PAGES = 120  # أقل من هيك تكلفة تشغيل الـprocesses أكبر من الفائدة
+
+# PDF: السطر عنوان لو خطه أكبر من خط النص بـHEADING_DELTA أو أكثر، أو سطر قصير كله bold
+HEADING_DELTA = 1.5
+HEADING_MAX_CHARS = 100
+_BOLD = 16  # PyMuPDF span flags
+
+_WS = re.compile(r"\s+")
+_CAPTION = re.compile(r"(figure|table)\s+[\d.]+", re.IGNORECASE)
+_A_NS = "http://schemas.openxmlformats.org/drawingml/2006/main"
+_ASCII_THEME = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}asciiTheme"
+_WORDS = re.compile(r"\b\w+\b")
+_REFS = re.compile(r"(\d+) 0 R")
+_PARENT = re.compile(r"/Parent\s+\d+\s+0\s+R")
+
+class DocumentTooLarge(ValueError):
+    pass
+
+# مسار ملف، أو محتواه بالذاكرة (bytes من الـupload مباشرة بدون ملف مؤقت)
+Source = Union[str, bytes]
+
+# (عدد الحروف, اسم الخط, الحجم بالـpt) لكل run — None يعني موروث من الـstyle
+RunFont = Tuple[int, Optional[str], Optional[float]]
+
+@dataclass
+class DocSection:
+    text: str
+    style: str  # for docx paragraphs: "Heading 1", "Heading 2", etc.
+    runs: Tuple[RunFont, ...] = ()
+    index: int = -1  # docx: ترتيب الفقرة في الملف (مع الفقرات الفارغة)
+    style_id: Optional[str] = None
+    line: Optional[float] = None  # line spacing مباشر على الفقرة (1.5 = 360 twips)
+
+@dataclass(frozen=True)
+class StyleDef:
+    based_on: Optional[str]
+    font: Optional[str]
+    size: Optional[float]
+    line: Optional[float]
+
+@dataclass
+class DocStyles:
+    """paragraph styles من styles.xml (بدون resolve) + docDefaults."""
+    styles: Dict[str, StyleDef]
+    defaults: StyleDef
+    default_para: Optional[str] = None
+
+@dataclass
+class PageTable:
+    """
+    spans صفحة PDF وحدة كأعمدة array (بدل dict لكل span من get_text("dict")).
+    السطر i: نصه page_text[offset[i]:offset[i] + length[i]]، خطه الغالب (حسب عدد الحروف)
+    font/size، و spans تبعه من first[i] لـfirst[i + 1] بأعمدة span_*.
+    """
+    fonts: Tuple[str, ...] = ()
+    offset: array = field(default_factory=lambda: array("I"))
+    length: array = field(default_factory=lambda: array("I"))
+    baseline: array = field(default_factory=lambda: array("f"))
+    font: array = field(default_factory=lambda: array("H"))      # رقم بـfonts
+    size: array = field(default_factory=lambda: array("f"))
+    bold: array = field(default_factory=lambda: array("B"))      # 1 لو كل السطر bold
+    first: array = field(default_factory=lambda: array("I", [0]))
+    span_chars: array = field(default_factory=lambda: array("H"))
+    span_font: array = field(default_factory=lambda: array("H"))
+    span_size: array = field(default_factory=lambda: array("f"))
+
+    def runs(self, i: int) -> Tuple[RunFont, ...]:
+        return tuple((self.span_chars[j], self.fonts[self.span_font[j]], self.span_size[j])
+                     for j in range(self.first[i], self.first[i + 1]))
+
+class PdfLine(NamedTuple):
+    page: int        # من 0
+    text: str
+    font: str        # الخط الغالب بالسطر
+    size: float
+    bold: bool
+    baseline: float  # y بالـpt من أعلى الصفحة
+    heading: bool
+    runs: Tuple[RunFont, ...]
+
+@dataclass
+class ExtractedDoc:
+    raw_text: str
+    paragraphs: List[DocSection]         # docx only (empty for pdf)
+    headings: List[str]                 # normalized headings
+    word_count: int
+    pages: int = 0                      # pdf: عدد الصفحات، docx: تقدير من عدد الكلمات
+    styles: Optional[DocStyles] = None  # docx only
+    # hash لكل فقرة (docx: الـXML، مع الفارغة) أو صفحة (pdf: النص) — لمطابقة النسخة الجديدة مع السابقة
+    blocks: Tuple[bytes, ...] = ()
+    page_spans: Tuple[Tuple[int, int], ...] = ()  # pdf: موضع نص كل صفحة في raw_text
+    layout: Tuple[PageTable, ...] = ()  # pdf: جدول الأسطر والـspans لكل صفحة
+    # pdf: hash محتوى كل صفحة (streams + resources) لإعادة الصفحات بدون استخراج؛ بس لو في نسخة سابقة
+    page_digests: Tuple[bytes, ...] = field(default=(), repr=False)
+    section_index: Optional["SectionIndex"] = field(default=None, repr=False, compare=False)
+    # format_checks: نتيجة فحص كل فقرة حسب الـhash، تنعاد للفقرات اللي ما تغيرت بالنسخة التالية
+    paragraph_faults: Optional[Dict[bytes, Dict]] = field(default=None, repr=False, compare=False)
+
+    def sections(self, template=None) -> "SectionIndex":
+        """
+        فهرس العناوين ومواضعها في raw_text (يبنى مرة واحدة ويبقى مع الوثيقة).
+        template: قالب غير الافتراضي → الفهرس ينعاد بناؤه بـmarkers القالب.
+        """
+        from core.templates import get_template
+        plan = get_template(template)
+        if self.section_index is None or self.section_index.template != plan.fingerprint:
+            from core.checks import build_index
+            self.section_index = build_index(self.raw_text, plan)
+        return self.section_index
+
+    def body_size(self) -> float:
+        """pdf: حجم خط النص (الأكثر حروفاً، لأقرب 0.5pt)."""
+        sizes: Counter = Counter()
+        for t in self.layout:
+            for n, z in zip(t.span_chars, t.span_size):
+                sizes[round(z * 2) / 2] += n
+        return sizes.most_common(1)[0][0] if sizes else 0.0
+
+    def pdf_lines(self) -> Iterator[PdfLine]:
+        """أسطر الـPDF بالترتيب مع خطها، والعناوين مستنتجة من الحجم والـbold."""
+        body = self.body_size()
+        for no, (t, (start, _)) in enumerate(zip(self.layout, self.page_spans)):
+            for i in range(len(t.offset)):
+                a = start + t.offset[i]
+                text = self.raw_text[a:a + t.length[i]]
+                size, bold = t.size[i], bool(t.bold[i])
+                yield PdfLine(no, text, t.fonts[t.font[i]], size, bold, t.baseline[i],
+                              _pdf_heading(text, size, bold, body), t.runs(i))
+
+    def pdf_headings(self) -> List[str]:
+        """نفس pdf_lines بس للعناوين: فحص الحجم/الـbold من الـarrays قبل قص النص."""
+        body = self.body_size()
+        out = []
+        for t, (start, _) in zip(self.layout, self.page_spans):
+            for i, (size, bold) in enumerate(zip(t.size, t.bold)):
+                if bold or size >= body + HEADING_DELTA:
+                    a = start + t.offset[i]
+                    text = self.raw_text[a:a + t.length[i]]
+                    if _pdf_heading(text, size, bool(bold), body):
+                        out.append(_normalize(text))
+        return out
+
+    def text_lines(self) -> List[DocSection]:
+        """docx: الفقرات؛ pdf: DocSection لكل سطر (style "Heading" للعناوين المستنتجة من الخط)."""
+        if not self.layout:
+            return self.paragraphs
+        body = self.body_size()
+        out = []
+        for no, (t, (start, _)) in enumerate(zip(self.layout, self.page_spans)):
+            for i, (a, n) in enumerate(zip(t.offset, t.length)):
+                text = self.raw_text[start + a:start + a + n]
+                heading = _pdf_heading(text, t.size[i], bool(t.bold[i]), body)
+                out.append(DocSection(text, "Heading" if heading else "", index=no))
+        return out
+
+def _pdf_heading(text: str, size: float, bold: bool, body: float) -> bool:
+    if len(text) > HEADING_MAX_CHARS or not any(c.isalpha() for c in text) or _CAPTION.match(text):
+        return False
+    return size >= body + HEADING_DELTA or (bold and not text.endswith((".", ",", ";", ":")))
+
+def _size(src: Source) -> int:
+    return os.path.getsize(src) if isinstance(src, str) else len(src)
+
+def _doc_counts(doc: ExtractedDoc, src: Source, *args, **kwargs) -> Dict[str, int]:
+    return {"bytes": _size(src), "pages": doc.pages, "paragraphs": len(doc.paragraphs), "chars": len(doc.raw_text)}
+
+def _check_size(src: Source) -> None:
+    size = _size(src)
+    if size > MAX_FILE_BYTES:
+        raise DocumentTooLarge(f"file is {size / 1e6:.1f} MB (max {MAX_FILE_BYTES / 1e6:.0f} MB)")
+
+def _normalize(s: str) -> str:
+    s = re.sub(r"\s+", " ", s.strip())
+    return s.lower()
+
+def _font(rPr, theme: Dict[str, str]) -> Tuple[Optional[str], Optional[float]]:
+    name = size = None
+    if rPr is not None:
+        name = rPr.rFonts_ascii
+        if name is None and rPr.rFonts is not None:
+            # w:asciiTheme="minorHAnsi" → الخط المعرف في theme1.xml
+            t = rPr.rFonts.get(_ASCII_THEME)
+            if t:
+                name = theme.get(t[:5])
+        if name is not None:
+            name = sys.intern(name)
+        sz = rPr.sz_val
+        if sz is not None:
+            size = sz.pt
+    return name, size
+
+def _line(pPr) -> Optional[float]:
+    # نقيس المسافة كمضاعف لسطر 12pt: auto=360 → 1.5، و exact 18pt → 1.5 أيضاً
+    if pPr is None:
+        return None
+    ln = pPr.spacing_line
+    return round(ln.twips / 240, 2) if ln is not None else None
+
+def _run_fonts(p_elm, theme: Dict[str, str]) -> Tuple[RunFont, ...]:
+    # نقرأ rPr مباشرة من الـXML بدل Run/Font objects (أسرع بكثير على الملفات الكبيرة)
+    runs = []
+    for r in p_elm.r_lst:
+        name, size = _font(r.rPr, theme)
+        runs.append((len(r.text), name, size))
+    return tuple(runs)
+
+def _theme_fonts(document) -> Dict[str, str]:
+    from docx.opc.constants import RELATIONSHIP_TYPE as RT
+    from lxml import etree
+
+    for rel in document.part.rels.values():
+        if rel.reltype == RT.THEME and not rel.is_external:
+            root = etree.fromstring(rel.target_part.blob)
+            fonts = {}
+            for kind in ("minor", "major"):
+                latin = root.find(f".//{{{_A_NS}}}{kind}Font/{{{_A_NS}}}latin")
+                if latin is not None and latin.get("typeface"):
+                    fonts[kind] = latin.get("typeface")
+            return fonts
+    return {}
+
+def _doc_styles(document, theme: Dict[str, str]) -> DocStyles:
+    from docx.enum.style import WD_STYLE_TYPE
+    from docx.oxml.ns import qn
+
+    el = document.styles.element
+    styles: Dict[str, StyleDef] = {}
+    default_para = None
+    for st in el.style_lst:
+        if st.type != WD_STYLE_TYPE.PARAGRAPH or st.styleId is None:
+            continue
+        font, size = _font(st.rPr, theme)
+        styles[st.styleId] = StyleDef(st.basedOn_val, font, size, _line(st.pPr))
+        if st.default:
+            default_para = st.styleId
+
+    font = size = line = None
+    dd = el.find(qn("w:docDefaults"))
+    if dd is not None:
+        font, size = _font(dd.find(f"{qn('w:rPrDefault')}/{qn('w:rPr')}"), theme)
+        line = _line(dd.find(f"{qn('w:pPrDefault')}/{qn('w:pPr')}"))
+    return DocStyles(styles, StyleDef(None, font, size, line), default_para)
+
+@timed("extract.docx", _doc_counts)
+def extract_docx(src: Source, previous: Optional[ExtractedDoc] = None) -> ExtractedDoc:
+    """
+    مرور واحد على فقرات الـdocx: النص + الـstyle + خطوط الـruns.
+    الـformat checks تشتغل على هذا النموذج، فلا حاجة لفتح الملف مرة ثانية.
+    previous: نسخة سابقة من نفس المشروع — الفقرات اللي ما تغير الـXML تبعها تنعاد منها.
+    """
+    from docx import Document
+    from docx.enum.style import WD_STYLE_TYPE
+    from lxml import etree
+
+    _check_size(src)
+    doc = Document(src if isinstance(src, str) else io.BytesIO(src))
+    # اسم الـstyle حسب الـid (بدل p.style اللي يبحث في styles.xml لكل فقرة)
+    style_names = {s.style_id: s.name for s in doc.styles}
+    default_style = doc.styles.default(WD_STYLE_TYPE.PARAGRAPH)
+    default_name = default_style.name if default_style is not None else ""
+    theme = _theme_fonts(doc)
+    styles = _doc_styles(doc, theme)
+
+    # الـstyles والـtheme داخلين بالـhash: لو تغيروا ولا فقرة تنعاد من النسخة السابقة
+    salt = hashlib.blake2b(repr((style_names, default_name, theme, styles)).encode(), digest_size=16).digest()
+    reuse: Dict[bytes, DocSection] = {}
+    known = frozenset()
+    if previous is not None and previous.blocks and previous.paragraphs:
+        reuse = {previous.blocks[p.index]: p for p in previous.paragraphs}
+        known = frozenset(previous.blocks)
+
+    paras: List[DocSection] = []
+    all_text_parts = []
+    headings = []
+    blocks = []
+
+    for i, p in enumerate(doc.paragraphs):
+        digest = hashlib.blake2b(etree.tostring(p._p), digest_size=8, key=salt).digest()
+        blocks.append(digest)
+        sec = reuse.get(digest)
+        if sec is not None:
+            if sec.index != i:
+                sec = dataclasses.replace(sec, index=i)
+        elif digest in known:
+            continue  # فقرة فارغة بالنسخة السابقة
+        else:
+            t = (p.text or "").strip()
+            if not t:
+                continue
+            sid = p._p.style
+            sec = DocSection(text=t, style=style_names.get(sid, default_name) or "",
+                             runs=_run_fonts(p._p, theme), index=i,
+                             style_id=sid or styles.default_para, line=_line(p._p.pPr))
+        paras.append(sec)
+        all_text_parts.append(sec.text)
+
+        # collect headings based on style name
+        if "heading" in sec.style.lower() or "chapter" in sec.text.lower():
+            headings.append(_normalize(sec.text))
+
+    raw = "\n".join(all_text_parts)
+    wc = len(re.findall(r"\b\w+\b", raw))
+    pages = max(1, -(-wc // WORDS_PER_PAGE)) if wc else 0
+    return ExtractedDoc(raw_text=raw, paragraphs=paras, headings=headings, word_count=wc, pages=pages,
+                        styles=styles, blocks=tuple(blocks))
+
+def _page_layout(page) -> Tuple[str, int, PageTable]:
+    """
+    مرور واحد على spans الصفحة: النص (سطر لكل line، المسافات داخل السطر مطبّعة)،
+    عدد الكلمات، وجدول الخط/الحجم/flags لكل span.
+    """
+    import fitz
+
+    table = PageTable()
+    fonts: Dict[str, int] = {}
+    lines = []
+    pos = 0
+    for block in page.get_text("dict", flags=fitz.TEXTFLAGS_TEXT)["blocks"]:
+        for line in block.get("lines", ()):
+            # النص من كل الـspans (span فيه مسافة بس هو الفاصل بين كلمتين بخطين مختلفين)،
+            # والجدول من اللي فيهم نص
+            text = _WS.sub(" ", "".join(sp["text"] for sp in line["spans"])).strip()
+            spans = [sp for sp in line["spans"] if not sp["text"].isspace()]
+            if not text:
+                continue
+            if lines:
+                pos += 1  # "\n" بين الأسطر
+            table.offset.append(pos)
+            table.length.append(len(text))
+            table.baseline.append(spans[0]["origin"][1])
+            top = bold = None
+            for sp in spans:
+                name = sp["font"]
+                fid = fonts.get(name)
+                if fid is None:
+                    fid = fonts[name] = len(fonts)
+                n = min(len(sp["text"].strip()), 0xFFFF)
+                table.span_chars.append(n)
+                table.span_font.append(fid)
+                table.span_size.append(sp["size"])
+                if top is None or n > top[0]:
+                    top = (n, fid, sp["size"])
+                bold = bold is not False and bool(sp["flags"] & _BOLD or "bold" in name.lower())
+            table.font.append(top[1])
+            table.size.append(top[2])
+            table.bold.append(bold)
+            table.first.append(len(table.span_chars))
+            lines.append(text)
+            pos += len(text)
+    table.fonts = tuple(sys.intern(f) for f in fonts)
+    t = "\n".join(lines)
+    return t, len(_WORDS.findall(t)), table
+
+def _obj_digest(doc, xref: int, memo: Dict[int, bytes]) -> bytes:
+    """
+    hash الـobject + streams + كل اللي بيأشر عليه (Merkle): تعديل داخل Form XObject أو خط
+    أو resource غير مباشر بيغير الـhash. memo مشترك بين صفحات الملف (الخطوط والـforms
+    المشتركة تنحسب مرة وحدة)؛ /Parent ما ينلحق (غير هيك شجرة الصفحات كلها بتدخل).
+    """
+    d = memo.get(xref)
+    if d is not None:
+        return d
+    memo[xref] = b""   # دورة (resources بتأشر على حالها)
+    obj = _PARENT.sub("", doc.xref_object(xref, compressed=True))
+    # أرقام الـxrefs نفسها ما بتدخل (حفظ الملف من جديد بيعيد ترقيمها)، بس محتوى اللي بتأشر عليه
+    h = hashlib.blake2b(_REFS.sub("R", obj).encode(), digest_size=8)
+    if doc.xref_is_stream(xref):
+        h.update(doc.xref_stream_raw(xref) or b"")
+    for x in _REFS.findall(obj):
+        h.update(_obj_digest(doc, int(x), memo))
+    memo[xref] = d = h.digest()
+    return d
+
+def _page_resources(doc, xref: int) -> str:
+    """/Resources للصفحة، أو الموروثة من أقرب /Pages فوقها."""
+    for _ in range(32):
+        kind, value = doc.xref_get_key(xref, "Resources")
+        if kind != "null":
+            return value
+        kind, parent = doc.xref_get_key(xref, "Parent")
+        if kind != "xref":
+            break
+        xref = int(parent.split()[0])
+    return ""
+
+def _page_digest(doc, i: int, memo: Optional[Dict[int, bytes]] = None) -> bytes:
+    # الـcontent streams كما هي (مضغوطة، بدون فك) + الـresources محلولة لآخرها (خطوط،
+    # XObjects ومحتواها): نفس الـhash = نفس النص والتنسيق، فالصفحة بتنعاد من النسخة السابقة
+    memo = {} if memo is None else memo
+    px = doc.page_xref(i)
+    h = hashlib.blake2b(digest_size=8)
+    for x in _REFS.findall(doc.xref_get_key(px, "Contents")[1]):
+        h.update(_obj_digest(doc, int(x), memo))
+    resources = _page_resources(doc, px)
+    h.update(_REFS.sub("R", resources).encode())
+    for x in _REFS.findall(resources):
+        h.update(_obj_digest(doc, int(x), memo))
+    return h.digest()
+
+def _fitz_open(src: Source):
+    import fitz  # PyMuPDF
+
+    if isinstance(src, str):
+        return fitz.open(src)
+    return fitz.open(stream=bytes(src), filetype="pdf")
+
+_worker_src: Optional[Source] = None
+
+def _init_pdf_worker(src: Source) -> None:
+    # المصدر يوصل لكل worker مرة وحدة (مش مع كل مجموعة صفحات)
+    global _worker_src
+    _worker_src = src
+
+def _pdf_pages(pages: Sequence[int]) -> List[Tuple[str, int, PageTable]]:
+    with _fitz_open(_worker_src) as doc:
+        return [_page_layout(doc[i]) for i in pages]
+
+def _open_pdf(src: Source):
+    _check_size(src)
+    doc = _fitz_open(src)
+    if doc.page_count > MAX_PDF_PAGES:
+        doc.close()
+        raise DocumentTooLarge(f"PDF has {doc.page_count} pages (max {MAX_PDF_PAGES})")
+    return doc
+
+def iter_pdf_pages(src: Source, workers: int = 1,
+                   pages: Optional[Sequence[int]] = None) -> Iterator[Tuple[str, int, PageTable]]:
+    """
+    نص كل صفحة (سطر لكل line) + عدد كلماتها + جدول الـspans، صفحة بصفحة.
+    pages: أرقام الصفحات المطلوبة بالترتيب (None → كلها).
+    workers > 1: الصفحات تتقسم على processes (كل واحد يفتح الملف لوحده).
+    """
+    doc = _open_pdf(src)
+    pages = range(doc.page_count) if pages is None else pages
+    if workers <= 1 or len(pages) < PDF_PARALLEL_MIN_PAGES:
+        with doc:
+            for i in pages:
+                yield _page_layout(doc[i])
+        return
+
+    doc.close()
+    chunks = [pages[k:k + PDF_CHUNK_PAGES] for k in range(0, len(pages), PDF_CHUNK_PAGES)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_pdf_worker, initargs=(src,)) as ex:
+        for part in ex.map(_pdf_pages, chunks):
+            yield from part
+
+@timed("extract.pdf", _doc_counts)
+def extract_pdf(src: Source, workers: int = 1, previous: Optional[ExtractedDoc] = None) -> ExtractedDoc:
+    """
+    نص الصفحات بأسطرها + جدول spans لكل صفحة (PageTable)، ومنه العناوين (حجم الخط/bold).
+    previous: نسخة سابقة — الصفحات اللي ما تغير محتواها (page_digests) تاخذ نصها وجدولها منها،
+    والباقي بس ينعاد استخراجه (بالـworkers). بدون نسخة سابقة ما في page_digests (حساب الـMerkle
+    على كل object بالملف مش ببلاش)، فأول رفع للمشروع ما يدفع تكلفتها.
+    """
+    digests: Tuple[bytes, ...] = ()
+    reuse: Dict[bytes, Tuple[str, PageTable]] = {}
+    todo: Optional[List[int]] = None
+    if previous is not None:
+        with _open_pdf(src) as doc:
+            memo: Dict[int, bytes] = {}
+            digests = tuple(_page_digest(doc, i, memo) for i in range(doc.page_count))
+        if previous.layout and previous.page_digests:
+            reuse = {d: (previous.raw_text[a:b], t)
+                     for d, (a, b), t in zip(previous.page_digests, previous.page_spans, previous.layout)}
+            todo = [i for i, d in enumerate(digests) if d not in reuse]
+
+    pages_iter = iter_pdf_pages(src, workers, todo)
+    if reuse:
+        fresh = pages_iter
+        pages_iter = ((reuse[d][0], None, reuse[d][1]) if d in reuse else next(fresh) for d in digests)
+
+    # نجمع النص صفحة صفحة بدل join + re.sub + findall على النص كامل (3 نسخ بالذاكرة)
+    parts = []
+    spans = []
+    tables = []
+    wc = 0
+    pos = 0
+    blocks = []
+    for t, n, table in pages_iter:
+        wc += n if n is not None else len(_WORDS.findall(t))
+        tables.append(table)
+        blocks.append(hashlib.blake2b(t.encode(), digest_size=8).digest())
+        if t:
+            if parts:
+                pos += 1  # "\n" بين الصفحات
+            parts.append(t)
+            spans.append((pos, pos + len(t)))
+            pos += len(t)
+        else:
+            spans.append((pos, pos))
+    raw = "\n".join(parts)
+
+    out = ExtractedDoc(raw_text=raw, paragraphs=[], headings=[], word_count=wc, pages=len(spans),
+                       blocks=tuple(blocks), page_spans=tuple(spans), layout=tuple(tables),
+                       page_digests=digests)
+    out.headings = out.pdf_headings()
+    return out
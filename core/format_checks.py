@@ -1,81 +1,281 @@
-# core/format_checks.py
-from __future__ import annotations
-from typing import List
-from docx.text.paragraph import Paragraph
-import re
-
-def _is_times_new_roman(p: Paragraph) -> bool:
-    # نفحص أول run فقط كحد أدنى (لأن docx ممكن يكون فيه runs كثيرة)
-    if not p.runs:
-        return True
-    r = p.runs[0]
-    font = r.font.name
-    return (font is None) or ("times new roman" in str(font).lower())
-
-def _font_size(p: Paragraph):
-    if not p.runs:
-        return None
-    sz = p.runs[0].font.size
-    return sz.pt if sz else None
-
-def check_title_page_format(paragraphs: List[tuple[str, str]]) -> list[dict]:
-    """
-    paragraphs: list of (text, style)
-    """
-    issues = []
-
-    # heuristic: أول 15 فقرة غالباً عنوان
-    head = paragraphs[:15]
-    joined = " ".join(t for t, _ in head).lower()
-
-    # عنوان المشروع موجود؟
-    if not any(len(t.strip()) > 8 for t, _ in head):
-        issues.append({"priority":"high","what":"Title Page content","how":"تأكدي من وجود عنوان واضح في أول صفحة."})
-
-    # Times New Roman check (خفيف)
-    # (لو بدك دقة أعلى: نفحص كل Paragraph عبر Document مباشرة)
-    return issues
-
-def check_abstract_format(doc_paras: List[Paragraph]) -> list[dict]:
-    issues = []
-
-    # نلقط فقرة ABSTRACT
-    abs_idx = None
-    for i,p in enumerate(doc_paras):
-        if p.text.strip().lower() == "abstract":
-            abs_idx = i
-            break
-
-    if abs_idx is None:
-        return issues
-
-    # نفحص أول 10 فقرات بعد ABSTRACT
-    block = doc_paras[abs_idx+1:abs_idx+12]
-    for p in block:
-        if not p.text.strip():
-            continue
-        if not _is_times_new_roman(p):
-            issues.append({"priority":"medium","what":"Abstract font","how":"Abstract يجب أن يكون Times New Roman."})
-            break
-
-        sz = _font_size(p)
-        if sz and abs(sz - 12) > 0.2:
-            issues.append({"priority":"medium","what":"Abstract font size","how":"Abstract يجب أن يكون حجم الخط 12."})
-            break
-
-    return issues
-
-def check_captions(doc_paras: List[Paragraph]) -> list[dict]:
-    """
-    القالب يطلب captions للـFigures/Tables (وجود Figure 1 / Table 1 ...).
-    """
-    text = "\n".join(p.text for p in doc_paras)
-    fig_ok = re.search(r"\bFigure\s+\d+", text, flags=re.IGNORECASE) is not None
-    tab_ok = re.search(r"\bTable\s+\d+", text, flags=re.IGNORECASE) is not None
-
-    issues = []
-    if not fig_ok:
-        issues.append({"priority":"medium","what":"Figure captions","how":"أضيفي captions مثل: Figure 1: ... لكل صورة."})
-    if not tab_ok:
-        issues.append({"priority":"medium","what":"Table captions","how":"أضيفي captions مثل: Table 1: ... لكل جدول."})
-    return issues
+# core/format_checks.py
+from __future__ import annotations
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+import re
+
+from core.extract import DocSection, DocStyles, ExtractedDoc, PdfLine
+from core.telemetry import timed
+
+FIGURE_RE = re.compile(r"\bFigure\s+\d+", flags=re.IGNORECASE)
+TABLE_RE = re.compile(r"\bTable\s+\d+", flags=re.IGNORECASE)
+
+def check_title_page_format(paragraphs: List[tuple[str, str]]) -> list[dict]:
+    """
+    paragraphs: list of (text, style)
+    """
+    issues = []
+
+    # heuristic: أول 15 فقرة غالباً عنوان
+    head = paragraphs[:15]
+    joined = " ".join(t for t, _ in head).lower()
+
+    # عنوان المشروع موجود؟
+    if not any(len(t.strip()) > 8 for t, _ in head):
+        issues.append({"priority":"high","what":"Title Page content","how":"تأكدي من وجود عنوان واضح في أول صفحة."})
+
+    # Times New Roman check (خفيف)
+    # (لو بدك دقة أعلى: نفحص كل Paragraph عبر Document مباشرة)
+    return issues
+
+class StyleResolver:
+    """
+    يحل خصائص الـparagraph style عبر basedOn → docDefaults.
+    النتيجة تحفظ لكل style id، فالوثيقة كاملة تكلف resolve واحد لكل style.
+    """
+
+    def __init__(self, styles: Optional[DocStyles]):
+        self.styles = styles
+        self._cache: Dict[Optional[str], Tuple[str, float, float]] = {}
+
+    def resolve(self, style_id: Optional[str]) -> Tuple[str, float, float]:
+        hit = self._cache.get(style_id)
+        if hit is not None:
+            return hit
+
+        font = size = line = None
+        if self.styles is not None:
+            table = self.styles.styles
+            sid, seen = style_id, set()
+            while sid is not None and sid not in seen:
+                seen.add(sid)
+                st = table.get(sid)
+                if st is None:
+                    break
+                font = st.font if font is None else font
+                size = st.size if size is None else size
+                line = st.line if line is None else line
+                sid = st.based_on
+            d = self.styles.defaults
+            font = d.font if font is None else font
+            size = d.size if size is None else size
+            line = d.line if line is None else line
+
+        # نفس قيم Word لما ما يكون في أي تعريف
+        out = (font or "Times New Roman", size or 10.0, line or 1.0)
+        self._cache[style_id] = out
+        return out
+
+MAX_SECTIONS_PER_KIND = 5
+
+_SKIP_STYLES = ("heading", "title", "subtitle", "toc", "caption", "table of figures")
+
+_AUDIT = {
+    "font": ("Font family", "استخدمي Times New Roman لكل نص الفقرات."),
+    "size": ("Font size", "حجم خط النص يجب أن يكون 12."),
+    "line": ("Line spacing", "مسافة الأسطر يجب أن تكون 1.5."),
+}
+
+def _is_section_start(p: DocSection) -> bool:
+    st = p.style.lower()
+    return st.startswith(("heading", "title")) or (p.text.isupper() and len(p.text) <= 60)
+
+def _ranges(nums: List[Tuple[int, int]]) -> List[List[int]]:
+    """[(body_pos, paragraph_no)] → [[from, to]] لفقرات متتالية."""
+    out: List[List[int]] = []
+    last_pos = None
+    for pos, no in nums:
+        if out and last_pos == pos - 1:
+            out[-1][1] = no
+        else:
+            out.append([no, no])
+        last_pos = pos
+    return out
+
+def _paragraph_faults(p: DocSection, resolver: StyleResolver, font: str, size: float,
+                      line: float) -> Dict[str, Counter]:
+    s_font, s_size, s_line = resolver.resolve(p.style_id)
+    wrong: Dict[str, Counter] = {}
+    for chars, r_font, r_size in p.runs:
+        if not chars:
+            continue
+        f = r_font or s_font
+        if font not in f.lower():
+            wrong.setdefault("font", Counter())[f] += chars
+        z = r_size or s_size
+        if abs(z - size) > 0.2:
+            wrong.setdefault("size", Counter())[f"{z:g}pt"] += chars
+    ln = p.line if p.line is not None else s_line
+    if abs(ln - line) > 0.05:
+        wrong["line"] = Counter({f"{ln:g}": 1})
+    return wrong
+
+@timed("format.audit", lambda issues, doc, *a, **k: {"paragraphs": len(doc.paragraphs), "issues": len(issues)})
+def audit_formatting(doc: ExtractedDoc, font: str = "times new roman", size: float = 12.0,
+                     line: float = 1.5, previous: Optional[ExtractedDoc] = None) -> list[dict]:
+    """
+    فحص الخط والحجم ومسافة الأسطر لكل run في فقرات النص (بدون العناوين)،
+    والنتيجة مجمعة لكل قسم كنطاقات فقرات بدل مشكلة لكل run.
+    previous: نسخة سابقة — الفقرات بنفس الـhash تاخذ نتيجتها منها بدون إعادة فحص.
+    """
+    resolver = StyleResolver(doc.styles)
+    reuse = (previous.paragraph_faults if previous is not None else None) or {}
+    faults: Dict[tuple, Dict[str, Counter]] = {}
+    section = "Front matter"
+    # (section, kind) -> [(body_pos, paragraph_no)], و Counter للقيم الغلط
+    bad: Dict[Tuple[str, str], List[Tuple[int, int]]] = {}
+    found: Dict[Tuple[str, str], Counter] = {}
+    pos = 0
+
+    for p in doc.paragraphs:
+        if _is_section_start(p):
+            section = p.text[:60]
+            continue
+        if p.style.lower().startswith(_SKIP_STYLES):
+            continue
+        pos += 1
+        key = (doc.blocks[p.index], font, size, line) if doc.blocks else None
+        # نفس الفقرة (نفس الـhash) مكررة بالوثيقة أو موجودة بالنسخة السابقة → نفس النتيجة
+        wrong = faults.get(key, reuse.get(key)) if key is not None else None
+        if wrong is None:
+            wrong = _paragraph_faults(p, resolver, font, size, line)
+        if key is not None:
+            faults[key] = wrong
+
+        for kind, values in wrong.items():
+            bad.setdefault((section, kind), []).append((pos, p.index + 1))
+            found.setdefault((section, kind), Counter()).update(values)
+
+    doc.paragraph_faults = faults
+    return _issues(bad, found, "الفقرات", "paragraphs")
+
+def _issues(bad: Dict[Tuple[str, str], List[Tuple[int, int]]], found: Dict[Tuple[str, str], Counter],
+            label: str, unit: str) -> list[dict]:
+    """(section, kind) → نطاقات فقرات/صفحات → issue لكل قسم ونوع."""
+    # لو نفس المشكلة بأغلب الأقسام (مثلاً الـNormal style كله Calibri) نطلعها مرة وحدة للوثيقة
+    per_kind = Counter(kind for _, kind in bad)
+    for kind, n in per_kind.items():
+        if n > MAX_SECTIONS_PER_KIND:
+            merged, vals = [], Counter()
+            for key in [k for k in bad if k[1] == kind]:
+                merged += bad.pop(key)
+                vals.update(found.pop(key))
+            key = (f"{n} أقسام", kind)
+            bad[key], found[key] = merged, vals
+
+    issues = []
+    for (sec, kind), nums in bad.items():
+        what, how = _AUDIT[kind]
+        ranges = _ranges(nums)
+        shown = "، ".join(f"{a}" if a == b else f"{a}–{b}" for a, b in ranges[:5])
+        if len(ranges) > 5:
+            shown += "، …"
+        values = [v for v, _ in found[(sec, kind)].most_common(3)]
+        issues.append({
+            "priority": "medium",
+            "what": f"{what} — {sec}",
+            "how": f"{how} {label}: {shown} (الحالي: {', '.join(values)})",
+            "section": sec,
+            "kind": kind,
+            unit: ranges,
+            "found": values,
+        })
+    return issues
+
+# PDF: مسافة سطر واحد (single) بـWord لخط Times New Roman = 1.15 × حجم الخط
+SINGLE_LINE = 1.15
+# الخط بالـPDF ممكن يكون subset ("ABCDEF+TimesNewRomanPSMT") أو بديل بنفس المقاسات لو الخط مش مضمّن
+_FONT_ALIASES = {"times new roman": ("timesnewroman", "times", "nimbusroman", "liberationserif", "tinos",
+                                     "texgyretermes")}
+_NOT_LETTERS = re.compile(r"[^a-z]")
+_TOC_LINE = re.compile(r"(\.\s*){4,}\d*$")
+_LIST_SECTIONS = ("table of contents", "contents", "list of")
+_CAPTION_LINE = re.compile(r"(figure|table)\s+[\d.]+", flags=re.IGNORECASE)
+
+def _pdf_font(name: str) -> str:
+    return name.split("+", 1)[-1]
+
+def _skip_pdf_line(ln: PdfLine, section: str) -> bool:
+    # العناوين، الفهارس (مثل toc styles بالـdocx)، أرقام الصفحات
+    return (ln.heading or section.lower().startswith(_LIST_SECTIONS) or _TOC_LINE.search(ln.text) is not None
+            or len(ln.text) <= 12 and sum(c.isalpha() for c in ln.text) < 3)
+
+@timed("format.audit_pdf", lambda issues, doc, *a, **k: {"pages": doc.pages, "issues": len(issues)})
+def audit_pdf_formatting(doc: ExtractedDoc, font: str = "times new roman", size: float = 12.0,
+                         line: float = 1.5) -> list[dict]:
+    """
+    نفس audit_formatting للـPDF من جدول الـspans (doc.layout): الخط والحجم لكل span بأسطر النص،
+    ومسافة الأسطر لكل صفحة = المسافة الأكثر تكراراً بين baselines أسطر متتالية بنفس الحجم.
+    النتيجة مجمعة لكل قسم كنطاقات صفحات.
+    """
+    aliases = _FONT_ALIASES.get(font, (_NOT_LETTERS.sub("", font),))
+    font_ok: Dict[str, bool] = {}
+    section = "Front matter"
+    bad: Dict[Tuple[str, str], List[Tuple[int, int]]] = {}
+    found: Dict[Tuple[str, str], Counter] = {}
+    pitches: Counter = Counter()
+    page, page_section, prev = -1, section, None
+    caption = None  # حجم خط الـcaption الحالي: أسطره التالية بنفس الحجم تكملة له
+
+    def add(sec: str, kind: str, no: int, values: Counter) -> None:
+        nums = bad.setdefault((sec, kind), [])
+        if not nums or nums[-1][0] != no:
+            nums.append((no, no))
+        found.setdefault((sec, kind), Counter()).update(values)
+
+    def close_page() -> None:
+        if sum(pitches.values()) >= 3:
+            (pitch, z), _ = pitches.most_common(1)[0]
+            ln = round(pitch / (SINGLE_LINE * z), 2)
+            if abs(ln - line) > 0.1:
+                add(page_section, "line", page + 1, Counter({f"{ln:g}": 1}))
+        pitches.clear()
+
+    for ln in doc.pdf_lines():
+        if ln.page != page:
+            close_page()
+            page, page_section, prev = ln.page, section, None
+        if _CAPTION_LINE.match(ln.text):
+            caption = ln.size
+        elif caption != ln.size:
+            caption = None
+        if caption is not None or _skip_pdf_line(ln, section):
+            if ln.heading:
+                section = ln.text[:60]
+            prev = None
+            continue
+        if prev is not None and prev.size == ln.size and ln.baseline > prev.baseline:
+            pitches[(round((ln.baseline - prev.baseline) * 2) / 2, ln.size)] += 1
+        prev = ln
+
+        wrong: Dict[str, Counter] = {}
+        for chars, r_font, r_size in ln.runs:
+            if not chars:
+                continue
+            ok = font_ok.get(r_font)
+            if ok is None:
+                base = _NOT_LETTERS.sub("", _pdf_font(r_font).lower())
+                ok = font_ok[r_font] = base.startswith(aliases)
+            if not ok:
+                wrong.setdefault("font", Counter())[_pdf_font(r_font)] += chars
+            if abs(r_size - size) > 0.2:
+                wrong.setdefault("size", Counter())[f"{round(r_size * 2) / 2:g}pt"] += chars
+        for kind, values in wrong.items():
+            add(section, kind, ln.page + 1, values)
+    close_page()
+    return _issues(bad, found, "الصفحات", "pages")
+
+@timed("format.captions", lambda issues, paras, *a, **k: {"paragraphs": len(paras)})
+def check_captions(doc_paras: List[DocSection]) -> list[dict]:
+    """
+    القالب يطلب captions للـFigures/Tables (وجود Figure 1 / Table 1 ...).
+    """
+    fig_ok = any(FIGURE_RE.search(p.text) for p in doc_paras)
+    tab_ok = any(TABLE_RE.search(p.text) for p in doc_paras)
+
+    issues = []
+    if not fig_ok:
+        issues.append({"priority":"medium","what":"Figure captions","how":"أضيفي captions مثل: Figure 1: ... لكل صورة."})
+    if not tab_ok:
+        issues.append({"priority":"medium","what":"Table captions","how":"أضيفي captions مثل: Table 1: ... لكل جدول."})
+    return issues
@@ -0,0 +1,448 @@
+# core/jobs.py
+"""
+طابور فحص بالخلفية حتى ما تعلق جلسات Streamlit على ملف كبير أو طلب Groq بطيء.
+
+- كل ملف يندخل بالـhash تبعه: نفس المحتوى وهو لسا بالطابور/قيد الفحص → نفس الـjob (بدون تكرار)،
+  ونتيجة موجودة بالكاش → job منتهي فوراً.
+- الاستخراج والفحوصات بـprocess pool محدود (workers)، وطلبات الـLLM على event loop واحد
+  (thread منفصل) فما تحجز process وهي تستنى الشبكة.
+- admission control: حد أقصى للـjobs غير المنتهية (max_queue) ولكل مستخدم (per_user)؛
+  الزيادة ترجع JobRejected مع retry_after بدل ما تتراكم.
+- توقيت المراحل (core.telemetry) بالـworkers ينبعث للـparent مع آخر كل job وينضاف لأرقامه،
+  فـ"Stage timings" بالواجهة بتشمل الاستخراج والفحوصات.
+- الواجهة تسأل عن الحالة (get) كل شوي: المرحلة الحالية ونسبة التقدم، والنتائج الجزئية (job.events)
+  اللي وصلت من الـworker لهلأ (معلومات الملف، كل مجموعة فحوصات، التنسيق، الملخص).
+
+    queue = get_queue()
+    job = queue.submit(data, "project.pdf", user=session_id)
+    ...
+    job = queue.get(job.id); job.status, job.stage, job.progress, job.events
+"""
+from __future__ import annotations
+import asyncio
+import multiprocessing
+import os
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+from core.cache import ResultCache, content_hash, get_cache, key_for_hash
+from core.pipeline import STAGES, StageEvent
+from core import telemetry
+from core.telemetry import span
+
+JOB_WORKERS = max(1, min(4, (os.cpu_count() or 1) - 1))
+MAX_QUEUE = 32      # jobs غير منتهية (بالانتظار + قيد التنفيذ) على مستوى الـprocess
+PER_USER = 2        # jobs غير منتهية لكل مستخدم (جلسة)
+KEEP_FINISHED = 64  # jobs منتهية تبقى حتى تقرأها الواجهة
+LLM_JOBS = 4        # تحليلات LLM بنفس الوقت (كل وحدة فيها لحد max_concurrency طلب)
+ADVISE_STAGES = ("extract", "llm")
+TELEMETRY = "telemetry"   # رسالة من الـworker: (job_id, TELEMETRY, snapshot)
+
+class JobRejected(Exception):
+    """الطابور مليان أو المستخدم عنده jobs كثير؛ retry_after تقدير بالثواني."""
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+@dataclass
+class Job:
+    id: str
+    kind: str                 # "check" (تقرير القالب) | "advise" (تحليل الـLLM)
+    key: str                  # hash المحتوى + النوع: نفس الـkey = نفس الـjob
+    filename: str
+    stages: Tuple[str, ...]
+    users: Set[str] = field(default_factory=set)
+    digest: str = ""          # check: hash المحتوى، لحفظ التقرير باسم باقي المستخدمين (adopt)
+    save: bool = True
+    template: Optional[str] = None
+    status: str = "queued"    # queued | running | done | failed
+    stage: Optional[str] = None
+    submitted: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    result: Any = None        # check: CacheEntry، advise: نص التقرير
+    from_cache: bool = False
+    exception: Optional[BaseException] = None
+    # check: النتائج الجزئية (StageEvent) بالترتيب، للواجهة وهو لسا شغال
+    events: List[StageEvent] = field(default_factory=list)
+    first_result: Optional[float] = None
+    adopted: Dict[str, Any] = field(default_factory=dict)   # user → نسخته من result (result_for)
+
+    @property
+    def active(self) -> bool:
+        return self.status in ("queued", "running")
+
+    @property
+    def progress(self) -> float:
+        if self.status == "done":
+            return 1.0
+        if self.stage is None:
+            return 0.0
+        return self.stages.index(self.stage) / len(self.stages)
+
+    @property
+    def error(self) -> Optional[str]:
+        e = self.exception
+        return f"{type(e).__name__}: {e}" if e is not None else None
+
+    @property
+    def time_to_first_result(self) -> Optional[float]:
+        if self.started is None or self.first_result is None:
+            return None
+        return round(self.first_result - self.started, 3)
+
+    @property
+    def seconds(self) -> Optional[float]:
+        if self.started is None:
+            return None
+        return round((self.finished or time.time()) - self.started, 3)
+
+# ---------- worker process ----------
+_events = None
+_cache: Optional[ResultCache] = None
+
+def _init_worker(events, cache_dir: Optional[str], telemetry_on: bool = False) -> None:
+    global _events, _cache
+    _events = events
+    telemetry.enable(telemetry_on)
+    # نفس طبقة القرص تبعت الـparent: النسخة السابقة من الملف تنلاقى، والنتيجة تنحفظ للمرة الجاية
+    _cache = ResultCache(cache_dir)
+    # warm start: الـpipeline (والقواعد المترجمة) ومكتبات الاستخراج تتحمل لما يبدأ الـworker،
+    # مش على حساب أول ملف يوصله (~0.3s)
+    import core.pipeline  # noqa: F401
+    import docx  # noqa: F401
+    import fitz  # noqa: F401
+
+def _ping() -> int:
+    return os.getpid()
+
+def _progress(job_id: str):
+    return lambda stage: _events.put((job_id, stage, None))
+
+def _forward(job_id: str):
+    return lambda event: _events.put((job_id, None, event))
+
+@contextmanager
+def _measured(job_id: str, telemetry_on: bool):
+    """
+    spans الـjob بهالـworker: تنبعث للـparent بالآخر (حتى لو فشل). الحالة من الـparent لكل job،
+    لأن الواجهة بتشغل/بتطفي التوقيت والـworkers شغالين.
+    """
+    telemetry.enable(telemetry_on)
+    if not telemetry_on:
+        yield
+        return
+    telemetry.reset()
+    try:
+        yield
+    finally:
+        _events.put((job_id, TELEMETRY, telemetry.snapshot(recent=200)))
+
+def _portable(e: Exception) -> Exception:
+    # أخطاء PyMuPDF أحياناً فيها objects ما بتنعمل pickle، فما بتوصل للـparent
+    try:
+        pickle.dumps(e)
+        return e
+    except Exception:
+        return RuntimeError(f"{type(e).__name__}: {e}")
+
+def _check_task(job_id: str, telemetry_on: bool, data: bytes, filename: str, save: bool,
+                template: Optional[str] = None, owner: Optional[str] = None):
+    from core.pipeline import check_upload
+    try:
+        with _measured(job_id, telemetry_on):
+            # التوازي هنا على مستوى الملفات، فكل ملف يستخرج بـprocess واحد
+            return check_upload(data, filename, cache=_cache, save=save, progress=_progress(job_id),
+                                pdf_workers=1, template=template, on_event=_forward(job_id), owner=owner)
+    except Exception as e:
+        raise _portable(e) from None
+
+def _extract_task(job_id: str, telemetry_on: bool, data: bytes, filename: str) -> str:
+    from core.pipeline import extract_file
+    _progress(job_id)("extract")
+    suffix = ".pdf" if filename.lower().endswith(".pdf") else ".docx"
+    try:
+        with _measured(job_id, telemetry_on):
+            return extract_file(data, suffix).raw_text
+    except Exception as e:
+        raise _portable(e) from None
+
+# ---------- queue ----------
+class JobQueue:
+    def __init__(self, workers: int = JOB_WORKERS, max_queue: int = MAX_QUEUE, per_user: int = PER_USER,
+                 cache: Optional[ResultCache] = None, keep: int = KEEP_FINISHED, llm_jobs: int = LLM_JOBS):
+        self.workers = workers
+        self.llm_jobs = llm_jobs
+        self.max_queue = max_queue
+        self.per_user = per_user
+        self.keep = keep
+        self.cache = cache if cache is not None else get_cache()
+
+        # spawn: الـparent فيه threads (Streamlit، الـlistener، الـevent loop) فـfork مش آمن
+        self._ctx = multiprocessing.get_context("spawn")
+        self._events = self._ctx.Queue()
+        self._pool = self._new_pool()
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._live: Dict[str, Job] = {}                  # key -> job غير منتهي (dedup)
+        self._pending: Deque[Tuple[Job, tuple]] = deque()
+        self._running = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._llm_slots: Optional[asyncio.Semaphore] = None
+        self._avg_seconds = 10.0                         # متوسط متحرك لمدة الـjob (لتقدير retry_after)
+
+        self.submitted = 0
+        self.deduplicated = 0
+        self.rejected = 0
+        self.failed = 0
+
+        threading.Thread(target=self._listen, name="jobs-progress", daemon=True).start()
+        threading.Thread(target=self._dispatch, name="jobs-dispatch", daemon=True).start()
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=self._ctx,
+                                   initializer=_init_worker,
+                                   initargs=(self._events, self.cache.directory, telemetry.enabled()))
+        # الـworkers يبدأوا (ويحملوا المكتبات) بالخلفية من هلأ، مش مع أول upload
+        for _ in range(self.workers):
+            pool.submit(_ping)
+        return pool
+
+    # ---------- public ----------
+    def submit(self, data: bytes, filename: str, user: str = "", kind: str = "check",
+               advisor: Any = None, save: bool = True, template: Optional[str] = None) -> Job:
+        """
+        kind="check": تقرير القالب (نفس check_upload)؛ kind="advise": استخراج + advisor.acheck_quality.
+        template: id القالب (None → الافتراضي)؛ نفس الملف بقالبين = jobs منفصلة.
+        user: صاحب التقرير (النسخ السابقة تندور بتقاريره بس). الـjob ممكن يكون مشترك بين مستخدمين
+        رفعوا نفس المحتوى، فالواجهة تعرض النتيجة بـresult_for(job, user).
+        يرمي JobRejected لو الطابور مليان أو المستخدم وصل حده.
+        """
+        suffix = ".pdf" if filename.lower().endswith(".pdf") else ".docx"
+        digest = content_hash(data)
+        if kind == "check":
+            key, stages = key_for_hash(digest, suffix, template), STAGES
+            entry = self.cache.get(key)
+            if entry is not None:
+                job = Job(uuid.uuid4().hex, kind, key, filename, stages, {user}, digest, save, template,
+                          status="done", result=entry, from_cache=True)
+                job.started = job.finished = job.submitted
+                with self._lock:
+                    self._remember(job)
+                return job
+            args = (_check_task, (data, filename, save, template, user or None))
+        elif kind == "advise":
+            # نفس الملف بوضع أو مفتاح ثاني = تحليل ثاني (الـLLM والحصة غير)
+            key = f"{digest}-advise-{getattr(advisor, 'mode', '')}-{getattr(advisor, 'key_id', '')}"
+            stages = ADVISE_STAGES
+            args = (_extract_task, (data, filename), advisor)
+        else:
+            raise ValueError(f"unknown job kind: {kind!r}")
+
+        with self._lock:
+            job = self._live.get(key)
+            if job is not None:
+                job.users.add(user)
+                self.deduplicated += 1
+                return job
+            if len(self._live) >= self.max_queue:
+                self.rejected += 1
+                raise JobRejected(f"الطابور مليان ({len(self._live)} ملف قيد الفحص)", self._retry_after())
+            mine = sum(1 for j in self._live.values() if user in j.users)
+            if mine >= self.per_user:
+                self.rejected += 1
+                raise JobRejected(f"عندك {mine} ملف قيد الفحص، استني لحد ما يخلصوا", self._retry_after())
+            job = Job(uuid.uuid4().hex, kind, key, filename, stages, {user}, digest, save, template)
+            self._live[key] = job
+            self._remember(job)
+            self._pending.append((job, args))
+            self.submitted += 1
+            self._wake.notify()
+        return job
+
+    def get(self, job_id: Optional[str]) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id) if job_id else None
+
+    def result_for(self, job: Job, user: str) -> Any:
+        """
+        نتيجة job منتهي لـuser: تقرير check من رفع مستخدم ثاني (كاش أو job مشترك) ينحفظ باسمه
+        مرة وحدة (pipeline.adopt)، ونفس النسخة ترجع مع كل rerun.
+        """
+        if job.kind != "check" or job.result is None:
+            return job.result
+        from core.pipeline import adopt
+        with self._lock:
+            entry = job.adopted.get(user)
+            if entry is None:
+                entry = job.adopted[user] = adopt(job.result, job.filename, job.digest, user or None,
+                                                  self.cache, job.template, job.save)
+            return entry
+
+    def position(self, job: Job) -> int:
+        """كم job قبله بالانتظار (0 = هو التالي أو شغال)."""
+        with self._lock:
+            for i, (j, _) in enumerate(self._pending):
+                if j is job:
+                    return i
+        return 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "queued": len(self._pending),
+                "running": self._running,
+                "active": len(self._live),
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "submitted": self.submitted,
+                "deduplicated": self.deduplicated,
+                "rejected": self.rejected,
+                "failed": self.failed,
+                "avg_seconds": round(self._avg_seconds, 2),
+            }
+
+    # ---------- internals ----------
+    def _remember(self, job: Job) -> None:
+        self._jobs[job.id] = job
+        extra = len(self._jobs) - len(self._live) - self.keep
+        for jid in [jid for jid, j in self._jobs.items() if not j.active][:max(extra, 0)]:
+            del self._jobs[jid]
+
+    def _retry_after(self) -> float:
+        return round(self._avg_seconds * (len(self._pending) + 1) / self.workers, 1)
+
+    def _dispatch(self) -> None:
+        while True:
+            with self._wake:
+                while not self._pending or self._running >= self.workers:
+                    self._wake.wait()
+                job, args = self._pending.popleft()
+                self._running += 1
+                job.status, job.started = "running", time.time()
+            fn, fn_args, *rest = args
+            measure = telemetry.enabled()
+            try:
+                fut = self._submit(fn, job.id, measure, *fn_args)
+            except Exception as e:
+                # الـjob هذا بس يفشل؛ الـdispatcher يكمل على اللي بعده
+                with self._wake:
+                    self._running -= 1
+                    self._wake.notify()
+                self._finish(job, exception=e)
+                continue
+            fut.add_done_callback(lambda f, job=job, rest=rest: self._process_done(job, f, *rest))
+
+    def _submit(self, fn, *args) -> Future:
+        try:
+            return self._pool.submit(fn, *args)
+        except BrokenProcessPool:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = self._new_pool()
+            return self._pool.submit(fn, *args)
+
+    def _process_done(self, job: Job, fut: Future, advisor: Any = None) -> None:
+        # الـprocess خلص: الـslot يتحرر حتى لو الـjob لسا بده طلب LLM
+        with self._wake:
+            self._running -= 1
+            self._wake.notify()
+        try:
+            out = fut.result()
+        except BrokenProcessPool as e:
+            # worker انهار (مثلاً segfault بملف تالف): الـpool الجديد ينعمل عند الـsubmit التالي
+            self._finish(job, exception=RuntimeError(f"worker process crashed ({e})"))
+            return
+        except BaseException as e:
+            self._finish(job, exception=e)
+            return
+        if job.kind == "check":
+            entry, from_cache = out
+            self._finish(job, result=entry, from_cache=from_cache)
+        else:
+            self._advance(job, "llm")
+            cf = asyncio.run_coroutine_threadsafe(self._advise(advisor, out), self._event_loop())
+            cf.add_done_callback(lambda f: self._llm_done(job, f))
+
+    async def _advise(self, advisor: Any, text: str) -> str:
+        async with self._llm_slots:
+            with span("jobs.llm", chars=len(text)):
+                return await advisor.acheck_quality(text)
+
+    def _llm_done(self, job: Job, fut: Future) -> None:
+        e = fut.exception()
+        if e is not None:
+            self._finish(job, exception=e)
+        else:
+            self._finish(job, result=fut.result())
+
+    def _event_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._llm_slots = asyncio.Semaphore(self.llm_jobs)
+                threading.Thread(target=self._loop.run_forever, name="jobs-llm", daemon=True).start()
+            return self._loop
+
+    def _finish(self, job: Job, result: Any = None, from_cache: bool = False,
+                exception: Optional[BaseException] = None) -> None:
+        with self._lock:
+            job.finished = time.time()
+            job.result, job.from_cache, job.exception = result, from_cache, exception
+            job.status = "failed" if exception is not None else "done"
+            if exception is not None:
+                self.failed += 1
+            else:
+                self._avg_seconds = 0.8 * self._avg_seconds + 0.2 * (job.finished - job.started)
+            if self._live.get(job.key) is job:
+                del self._live[job.key]
+            self._remember(job)
+
+    def _advance(self, job: Job, stage: str) -> None:
+        # المراحل بس تتقدم (رسالة progress متأخرة من الـworker ما ترجعها لورا)
+        with self._lock:
+            if job.status == "running" and (job.stage is None or
+                                            job.stages.index(stage) > job.stages.index(job.stage)):
+                job.stage = stage
+
+    def _add_event(self, job: Job, event: StageEvent) -> None:
+        with self._lock:
+            if job.first_result is None:
+                job.first_result = time.time()
+            job.events.append(event)
+
+    def _listen(self) -> None:
+        while True:
+            try:
+                job_id, stage, event = self._events.get()
+            except (EOFError, OSError):
+                return
+            if stage == TELEMETRY:
+                telemetry.merge(event)
+                continue
+            job = self.get(job_id)
+            if job is None:
+                continue
+            if event is not None:
+                self._add_event(job, event)
+            elif stage in job.stages:
+                self._advance(job, stage)
+
+_default: Optional[JobQueue] = None
+_default_lock = threading.Lock()
+
+def get_queue() -> JobQueue:
+    """طابور واحد على مستوى الـprocess (مشترك بين كل جلسات Streamlit)."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = JobQueue()
+        return _default
@@ -1,15 +1,28 @@
-# core/llm.py
-from __future__ import annotations
-import re
-
-def simple_summary(text: str, max_chars: int = 900) -> str:
-    # Try to summarize from Abstract if present, else first 2-3 paragraphs
-    m = re.search(r"\bABSTRACT\b(.*?)(\bDEDICATION\b|\bACKNOWLEDGEMENT\b|\bTABLE OF CONTENTS\b|\bCHAPTER\s*1\b)",
-                  text, flags=re.IGNORECASE | re.DOTALL)
-    if m:
-        block = re.sub(r"\s+", " ", m.group(1)).strip()
-        return (block[:max_chars] + "…") if len(block) > max_chars else block
-
-    # fallback: first chunk
-    chunk = re.sub(r"\s+", " ", text).strip()
-    return (chunk[:max_chars] + "…") if len(chunk) > max_chars else chunk
+# core/llm.py
+from __future__ import annotations
+from typing import Optional
+import re
+
+from core.checks import abstract_span, build_index
+from core.sections import SectionIndex
+
+_TOKEN = re.compile(r"\S+")
+
+def simple_summary(text: str, max_chars: int = 900, index: Optional[SectionIndex] = None) -> str:
+    # Try to summarize from Abstract if present, else first 2-3 paragraphs
+    if index is None:
+        index = build_index(text)
+    span = abstract_span(index)
+    if span:
+        block = re.sub(r"\s+", " ", text[span[0]:span[1]]).strip()
+        return (block[:max_chars] + "…") if len(block) > max_chars else block
+
+    # fallback: first chunk (نطبّع الـwhitespace لأول max_chars بس، مش للنص كامل)
+    words, n = [], -1
+    for m in _TOKEN.finditer(text):
+        words.append(m.group())
+        n += len(words[-1]) + 1
+        if n > max_chars:
+            break
+    chunk = " ".join(words)
+    return (chunk[:max_chars] + "…") if len(chunk) > max_chars else chunk
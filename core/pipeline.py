@@ -0,0 +1,269 @@
+# core/pipeline.py
+from __future__ import annotations
+import os
+import tempfile
+from dataclasses import asdict
+from typing import Any, Callable, Collection, Dict, Generator, List, NamedTuple, Optional, Tuple, TypeVar, Union
+
+from core.cache import CacheEntry, ResultCache, content_hash, key_for_hash
+from core.extract import ExtractedDoc, Source, extract_docx, extract_pdf
+from core.checks import iter_checks
+from core.templates import GroupRule, TemplatePlan, get_template
+from core.llm import simple_summary
+from core.format_checks import audit_formatting, audit_pdf_formatting, check_captions
+from core.report import compute_score, to_json
+from core.compare import diff_revisions
+from core.storage import get_store, safe_filename, save_report
+from core.telemetry import span, timed
+
+SUPPORTED = (".pdf", ".docx")
+# ملفات PDF الكبيرة في الواجهة تتقسم صفحاتها على أكثر من process
+PDF_WORKERS = min(4, os.cpu_count() or 1)
+# الـuploads تنفحص من الذاكرة مباشرة؛ الأكبر من هيك تنكتب مرة وحدة لملف مؤقت
+# ويفتحه PyMuPDF/zipfile من القرص (قراءة lazy بدل نسخ إضافية بالذاكرة)
+SPOOL_BYTES = 16 * 1024 * 1024
+# مراحل الفحص بالترتيب (progress(stage) ينادى عند بداية كل وحدة، للـjob queue والواجهة)
+STAGES = ("extract", "checks", "format", "summary", "similarity", "save")
+Progress = Optional[Callable[[str], None]]
+Template = Union[None, str, TemplatePlan]
+
+class StageEvent(NamedTuple):
+    """
+    نتيجة جزئية من iter_check_source، أول ما تجهز (dicts بس، فتنبعث بين الـprocesses):
+    meta {format, pages, words, template} → checks {group, checks} (لكل مجموعة) → score {score}
+    → format {issues} → summary {summary} → similarity → revision.
+    """
+    stage: str
+    data: Dict[str, Any]
+
+T = TypeVar("T")
+Events = Generator[StageEvent, None, T]
+OnEvent = Optional[Callable[[StageEvent], None]]
+OnSignatures = Optional[Callable[[List[Tuple[str, Any]]], None]]
+
+def drain(events: Events[T], on_event: OnEvent = None) -> T:
+    """يشغل الـgenerator للآخر (on_event لكل حدث) ويرجع النتيجة النهائية (قيمة الـreturn)."""
+    while True:
+        try:
+            ev = next(events)
+        except StopIteration as stop:
+            return stop.value
+        if on_event is not None:
+            on_event(ev)
+
+def _noop(stage: str) -> None:
+    pass
+
+def _suffix(name: str) -> str:
+    return os.path.splitext(name)[1].lower()
+
+def extract_file(src: Source, suffix: Optional[str] = None, pdf_workers: int = 1,
+                 previous: Optional[ExtractedDoc] = None) -> ExtractedDoc:
+    suffix = suffix or _suffix(src)
+    if suffix == ".docx":
+        return extract_docx(src, previous=previous)
+    if suffix == ".pdf":
+        return extract_pdf(src, workers=pdf_workers, previous=previous)
+    raise ValueError(f"unsupported file type: {suffix!r}")
+
+def check_file(path: str, pdf_workers: int = PDF_WORKERS,
+               template: Template = None) -> Tuple[ExtractedDoc, Dict[str, Any]]:
+    return check_source(path, _suffix(path), pdf_workers, template=template)
+
+@timed("pipeline.check_source", lambda out, *a, **k: {"pages": out[0].pages})
+def check_source(src: Source, suffix: str, pdf_workers: int = PDF_WORKERS,
+                 previous: Optional[ExtractedDoc] = None,
+                 progress: Progress = None, template: Template = None,
+                 on_event: OnEvent = None) -> Tuple[ExtractedDoc, Dict[str, Any]]:
+    """نفس iter_check_source، بس بيرجع (doc, report) مرة وحدة بالآخر (on_event لكل نتيجة جزئية)."""
+    return drain(iter_check_source(src, suffix, pdf_workers, previous, progress, template), on_event)
+
+def iter_check_source(src: Source, suffix: str, pdf_workers: int = PDF_WORKERS,
+                      previous: Optional[ExtractedDoc] = None, progress: Progress = None,
+                      template: Template = None, exclude: Collection[str] = (),
+                      on_signatures: OnSignatures = None) -> Events[Tuple[ExtractedDoc, Dict[str, Any]]]:
+    """
+    extract → checks → format checks → summary → report (نفس خطوات app.py)، كـgenerator:
+    كل مرحلة بتطلع نتيجتها كـStageEvent أول ما تخلص، والـreturn هو (doc, report).
+    previous: نسخة سابقة من نفس المشروع؛ الفقرات/الصفحات اللي ما تغيرت ما تنعاد استخراجها وفحص تنسيقها.
+    template: id القالب (templates/*.json) أو TemplatePlan؛ None → القالب الافتراضي.
+    exclude: ids (hash المحتوى) وثائق ما تنحسب بالتشابه؛ on_signatures: تواقيع MinHash للوثيقة
+    (لإضافتها للفهرس بعد الحفظ) — بتنحسب حتى لو الفهرس لسا فاضي.
+    """
+    progress = progress or _noop
+    plan = get_template(template)
+    # 1) Extract
+    progress("extract")
+    doc = extract_file(src, suffix, pdf_workers, previous)
+    yield StageEvent("meta", {"format": suffix.lstrip("."), "pages": doc.pages, "words": doc.word_count,
+                              "template": plan.info()})
+
+    # 2) Rule-based checks (فهرس العناوين يبنى مرة واحدة ويستخدم بالفحوصات والملخص)، مجموعة مجموعة
+    progress("checks")
+    index = doc.sections(plan)
+    results = []
+    for group, batch in iter_checks(doc.raw_text, index, plan):
+        results += batch
+        yield StageEvent("checks", {"group": group, "checks": [asdict(r) for r in batch]})
+    yield StageEvent("score", {"score": compute_score(results)})
+
+    # 3) Formatting Checks (docx: الـstyles والـruns، pdf: جدول الـspans لكل صفحة)
+    # فحص وجود الـcaptions القديم بس للقوالب اللي ما فيها فحوصات captions (نفس الملاحظة مرتين غير هيك)
+    legacy_captions = not any(isinstance(r, GroupRule) and r.kind == "captions" for r in plan.checks)
+    format_issues = []
+    if suffix == ".docx":
+        progress("format")
+        format_issues += audit_formatting(doc, previous=previous)
+        if legacy_captions:
+            format_issues += check_captions(doc.paragraphs)
+    elif doc.layout:
+        progress("format")
+        format_issues += audit_pdf_formatting(doc)
+        if legacy_captions:
+            format_issues += check_captions(doc.text_lines())
+    yield StageEvent("format", {"issues": format_issues})
+
+    # 4) Summary (fallback)
+    progress("summary")
+    with span("summary.fallback", chars=len(doc.raw_text)):
+        summary = simple_summary(doc.raw_text, index=index)
+    yield StageEvent("summary", {"summary": summary})
+
+    # 5) Build report
+    report = to_json(results, summary)
+    report["template"] = plan.info()
+    report["format_issues"] = format_issues
+
+    # 6) Similarity with previous cohorts (لو في فهرس مبني بـvector_check)
+    from core.ai_engine.vector_check import get_index, signatures
+    sim_index = get_index()
+    if len(sim_index) or on_signatures is not None:
+        progress("similarity")
+        with span("similarity.query", indexed=len(sim_index)):
+            sigs = signatures(doc.raw_text, index)
+            if len(sim_index):
+                report["similarity"] = sim_index.query_signatures(sigs, exclude)
+        if on_signatures is not None:
+            on_signatures(sigs)
+        if "similarity" in report:
+            yield StageEvent("similarity", report["similarity"])
+    return doc, report
+
+def previous_revision(filename: str, suffix: str, cache: Optional[ResultCache],
+                      template: Template = None, owner: Optional[str] = None
+                      ) -> Tuple[Optional[Dict[str, Any]], Optional[CacheEntry]]:
+    """
+    آخر تقرير محفوظ لنفس اسم الملف ولنفس المستخدم: (صفه بقاعدة التقارير: id و content_hash ...،
+    CacheEntry لو النسخة لسا بالكاش).
+    """
+    row = get_store().latest_for_file(filename, owner)
+    if row is None:
+        return None, None
+    entry = None
+    if cache is not None and row["content_hash"]:
+        entry = cache.get(key_for_hash(row["content_hash"], suffix, template))
+    return row, entry
+
+def _revision(report: Dict[str, Any], doc: ExtractedDoc, prev_row: Dict[str, Any],
+              prev: Optional[CacheEntry]) -> Dict[str, Any]:
+    """report["revision"]: مقارنة التقرير الجديد مع النسخة السابقة (من الكاش لو لسا فيه، وإلا من القاعدة)."""
+    store = get_store()
+    old_report = prev.report if prev is not None else store.get(prev_row["id"])
+    prev_doc = prev.doc if prev is not None else None
+    return {"previous": store.ref(prev_row["id"]),
+            **diff_revisions(old_report, store.blocks(prev_row["id"]), report, doc, prev_doc)}
+
+def adopt(entry: CacheEntry, filename: str, digest: str, owner: Optional[str],
+          cache: Optional[ResultCache] = None, template: Template = None, save: bool = True) -> CacheEntry:
+    """
+    نفس النتيجة لمستخدم ثاني رفع نفس المحتوى (كاش أو job مشترك): بدون مرجع تقرير صاحبها
+    ولا report["revision"] تبعه. مع save التقرير ينحفظ باسم owner كمان (أساس نسخه الجاية)،
+    والـrevision مقارنة مع آخر نسخة إله هو لنفس الملف.
+    """
+    if entry.owner == owner:
+        return entry
+    report = {k: v for k, v in entry.report.items() if k != "revision"}
+    out = CacheEntry(doc=entry.doc, report=report, owner=owner)
+    if not save:
+        return out
+    plan = get_template(template)
+    prev_row, prev = previous_revision(filename, _suffix(filename), cache, plan, owner)
+    if prev_row is not None and prev_row["content_hash"] == digest:
+        # نفس المحتوى محفوظ باسمه من قبل
+        out.report_path = get_store().ref(prev_row["id"])
+        return out
+    if prev_row is not None:
+        report["revision"] = _revision(report, entry.doc, prev_row, prev)
+    out.report_path = save_report(report, filename, digest, entry.doc.blocks, owner=owner)
+    return out
+
+@timed("pipeline.upload", lambda out, data, *a, **k: {"bytes": len(data), "cache_hits": int(out[1])})
+def check_upload(data: bytes, filename: str, cache: Optional[ResultCache] = None,
+                 save: bool = True, progress: Progress = None,
+                 pdf_workers: int = PDF_WORKERS, template: Template = None,
+                 on_event: OnEvent = None, owner: Optional[str] = None) -> Tuple[CacheEntry, bool]:
+    """نفس iter_check_upload، بس بيرجع (entry, from_cache) مرة وحدة بالآخر (on_event لكل نتيجة جزئية)."""
+    return drain(iter_check_upload(data, filename, cache, save, progress, pdf_workers, template, owner), on_event)
+
+def iter_check_upload(data: bytes, filename: str, cache: Optional[ResultCache] = None,
+                      save: bool = True, progress: Progress = None, pdf_workers: int = PDF_WORKERS,
+                      template: Template = None, owner: Optional[str] = None) -> Events[Tuple[CacheEntry, bool]]:
+    """
+    فحص ملف مرفوع (bytes). مع الكاش: نفس المحتوى يرجع مباشرة (بدون أحداث) بدون
+    إعادة استخراج؛ لو النتيجة لمستخدم ثاني، التقرير ينحفظ باسم owner كمان (adopt).
+    نسخة جديدة من ملف انفحص قبل (نفس الاسم ونفس owner): الأجزاء اللي ما تغيرت تنعاد من النسخة
+    السابقة، والتقرير فيه report["revision"] (شو تغير وشو انحل).
+    owner: هوية ثابتة للمستخدم (الرقم الجامعي بالواجهة)؛ التقرير ينحفظ باسمه، والنسخ السابقة
+    تندور بتقاريره بس.
+    template: القالب (نفس الملف بقالب ثاني = مفتاح كاش ثاني).
+    الأحداث نفس iter_check_source + revision؛ الـreturn هو (entry, from_cache).
+    """
+    suffix = ".pdf" if filename.lower().endswith(".pdf") else ".docx"
+    digest = content_hash(data)
+    plan = get_template(template)
+    key = key_for_hash(digest, suffix, plan) if cache is not None else None
+    if cache is not None:
+        entry = cache.get(key)
+        if entry is not None:
+            return adopt(entry, filename, digest, owner, cache, plan, save), True
+
+    prev_row, prev = previous_revision(filename, suffix, cache, plan, owner) if save else (None, None)
+    prev_doc = prev.doc if prev is not None else None
+    # التشابه: مش مع نفسها (انفحصت قبل وطلعت من الكاش) ولا مع نسختها السابقة
+    exclude = {digest} | ({prev_row["content_hash"]} if prev_row is not None and prev_row["content_hash"] else set())
+    sigs: list = []
+    on_signatures = sigs.append if save else None
+
+    if len(data) <= SPOOL_BYTES:
+        doc, report = yield from iter_check_source(data, suffix, pdf_workers, prev_doc, progress, plan,
+                                                   exclude, on_signatures)
+    else:
+        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+            tmp.write(data)
+            tmp_path = tmp.name
+        try:
+            doc, report = yield from iter_check_source(tmp_path, suffix, pdf_workers, prev_doc, progress, plan,
+                                                       exclude, on_signatures)
+        finally:
+            try:
+                os.remove(tmp_path)
+            except Exception:
+                pass
+
+    if prev_row is not None:
+        report["revision"] = _revision(report, doc, prev_row, prev)
+        yield StageEvent("revision", report["revision"])
+
+    entry = CacheEntry(doc=doc, report=report, owner=owner)
+    if save:
+        if progress is not None:
+            progress("save")
+        entry.report_path = save_report(report, filename, digest, doc.blocks, owner=owner)
+        # الفهرس يبقى محدث: الرفعات الجاية بتنقارن مع هاي (مرة وحدة لكل محتوى)
+        if sigs:
+            from core.ai_engine.vector_check import get_index
+            with span("similarity.insert"):
+                get_index().add_signatures(digest, sigs[0], safe_filename(filename))
+    if cache is not None:
+        cache.put(key, entry)
+    return entry, False
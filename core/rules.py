@@ -0,0 +1,162 @@
+# core/rules.py
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+import re
+
+# كل عنوان مطلوب يبدأ بكلمة حرفية (ABSTRACT, CHAPTER, LIST ...)
+# القواعد بـtrie على مستوى الكلمات (tokens): أول كلمة من كل عنوان، وبعدها الكلمة التالية، ...
+# ونمر على النص مرة واحدة فقط: عند كل كلمة أول عنوان، نمشي بالـtrie مع الكلمات اللي بعدها،
+# والتحقق الكامل (regex العنوان) بس للقواعد اللي كل كلماتها طابقت. فزمن الفحص ما بيكبر مع
+# عدد القواعد، حتى لو كثير منها بيبدأ بنفس الكلمة.
+_WORD = re.compile(r"[a-z]+")
+# token: كلمة، رقم، أو رمز لحاله ("non-functional" → non, -, functional)
+_TOKEN = re.compile(r"[a-z]+|\d+|[^\sa-z\d]")
+_NEXT = re.compile(r"\s*([a-z]+|\d+|[^\sa-z\d])")
+# فواصل مسافات بس: الـtrie بيتجاهل المسافات، والتحقق بالـregex بيتأكد من شكلها
+_SPACE_GAPS = {r"\ ": True, " ": True, r"\s": True, r"\s+": True, r"\s*": False}   # gap → لازم مسافة؟
+
+@dataclass(frozen=True)
+class Marker:
+    key: str
+    anchor: str           # أول كلمة (lower-case) في العنوان
+    pattern: re.Pattern   # يطابق على نص lower-case بدءاً من موضع الكلمة
+    # tokens العنوان للـtrie؛ فاضي لو الـgap ممكن يطابق غير مسافات أو يلزق كلمتين (تحقق عند كل anchor)
+    tokens: Tuple[str, ...] = field(default=(), compare=False)
+
+
+@dataclass(frozen=True)
+class Hit:
+    key: str
+    start: int
+    end: int
+
+
+def marker(key: str, phrase: str, gap: str = r"\ ") -> Marker:
+    """
+    phrase: عنوان حرفي مثل "LIST OF TABLES".
+    gap: الفاصل بين الكلمات (الافتراضي مسافة واحدة، و r"\\s*" لـ CHAPTER 1).
+    """
+    words = phrase.lower().split(" ")
+    anchor = _WORD.match(words[0])
+    if anchor is None:
+        raise ValueError(f"marker {key!r} must start with a word: {phrase!r}")
+    body = gap.join(re.escape(w) for w in words)
+    return Marker(key=key, anchor=anchor.group(0), pattern=re.compile(rf"\b{body}\b"),
+                  tokens=_tokens(words, gap))
+
+def _tokens(words: List[str], gap: str) -> Tuple[str, ...]:
+    spaced = _SPACE_GAPS.get(gap)
+    if spaced is None:
+        return ()
+    parts = [_TOKEN.findall(w) for w in words]
+    if not spaced:
+        # "list\s*of" بيطابق "listof" (token واحد بالنص): الـtrie ما بيلاقيه
+        for a, b in zip(parts, parts[1:]):
+            if a and b and _kind(a[-1]) == _kind(b[0]) != "sym":
+                return ()
+    return tuple(t for p in parts for t in p)
+
+def _kind(token: str) -> str:
+    # نفس أصناف _TOKEN
+    return "alpha" if "a" <= token[0] <= "z" else "digit" if token[0].isdigit() else "sym"
+
+def _order(item: Tuple[int, "Marker"]) -> int:
+    return item[0]
+
+# فرع فيه هالعدد من القواعد أو أقل: تحقق مباشر بالـregex أرخص من المشي بالـtrie كلمة كلمة
+_DIRECT = 4
+
+@dataclass
+class _Node:
+    children: Dict[str, "_Node"] = field(default_factory=dict)
+    markers: List[Tuple[int, Marker]] = field(default_factory=list)   # (ترتيب القاعدة، marker) اللي بتنتهي هون
+    direct: Optional[List[Tuple[int, Marker]]] = None   # كل قواعد الفرع بالترتيب، لو عددها ≤ _DIRECT
+
+    def finish(self) -> List[Tuple[int, Marker]]:
+        below = list(self.markers)
+        for child in self.children.values():
+            below += child.finish()
+        self.direct = sorted(below, key=_order) if len(below) <= _DIRECT else None
+        return below
+
+
+class RuleSet:
+    """مجموعة markers مترجمة مرة واحدة، وتفحص النص في مرور واحد."""
+
+    def __init__(self, markers: Iterable[Marker]):
+        self.markers: Tuple[Marker, ...] = tuple(markers)
+        roots: Dict[str, _Node] = {}   # أول كلمة → trie باقي الكلمات
+        for i, m in enumerate(self.markers):
+            node = roots.setdefault(m.anchor, _Node())
+            # بدون tokens: بتنفحص عند كل ظهور للكلمة الأولى
+            for t in m.tokens[1:]:
+                node = node.children.setdefault(t, _Node())
+            node.markers.append((i, m))
+        for root in roots.values():
+            root.finish()
+        # كلمة → قائمة القواعد (فرع صغير، تحقق مباشر) أو الـtrie (_walk)
+        self._index: Dict[str, Union[List[Tuple[int, Marker]], _Node]] = {
+            w: root.direct if root.direct is not None else root for w, root in roots.items()}
+
+    def __len__(self) -> int:
+        return len(self.markers)
+
+    def scan(self, text: str) -> List[Hit]:
+        """كل مواضع العناوين في النص، مرتبة حسب الموضع (وبنفس الموضع حسب ترتيب القواعد)."""
+        low = text.lower()
+        if len(low) != len(text):
+            # حالات نادرة (مثل İ) يتغير فيها الطول عند lower(): نرجع للطريقة المباشرة
+            return self._scan_ignorecase(text)
+
+        index = self._index.get
+        nxt = _NEXT.match
+        hits: List[Hit] = []
+        for w in _WORD.finditer(low):
+            cands = index(w.group())
+            if cands is None:
+                continue
+            if cands.__class__ is not list:
+                cands = _walk(low, w.end(), cands, nxt)
+            pos = w.start()
+            for _, m in cands:
+                mm = m.pattern.match(low, pos)
+                if mm:
+                    hits.append(Hit(m.key, pos, mm.end()))
+        return hits
+
+    def _scan_ignorecase(self, text: str) -> List[Hit]:
+        hits: List[Hit] = []
+        for m in self.markers:
+            pat = re.compile(m.pattern.pattern, flags=re.IGNORECASE)
+            hits.extend(Hit(m.key, x.start(), x.end()) for x in pat.finditer(text))
+        hits.sort(key=lambda h: h.start)
+        return hits
+
+
+def _walk(low: str, end: int, node: Optional[_Node], nxt) -> List[Tuple[int, Marker]]:
+    """القواعد اللي tokens تبعها طابقت النص بعد الكلمة الأولى، بترتيب القواعد."""
+    found: List[Tuple[int, Marker]] = []
+    while node is not None:
+        if node.direct is not None:
+            found += node.direct
+            break
+        found += node.markers
+        if not node.children:
+            break
+        t = nxt(low, end)
+        if t is None:
+            break
+        node = node.children.get(t.group(1))
+        end = t.end()
+    if len(found) > 1:
+        found.sort(key=_order)
+    return found
+
+def first_positions(hits: List[Hit]) -> Dict[str, Hit]:
+    """أول ظهور لكل key."""
+    first: Dict[str, Hit] = {}
+    for h in hits:
+        if h.key not in first:
+            first[h.key] = h
+    return first
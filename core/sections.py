@@ -0,0 +1,78 @@
+# core/sections.py
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from core.rules import Hit
+
+
+def heading_line(text: str, hit: Hit) -> bool:
+    """
+    الـmarker كعنوان: بداية سطر، وباقي السطر فاضي (العنوان بالسطر اللي بعده) أو عنوان
+    بحرف كبير. "As discussed in Chapter 3, ..." بالنص، أو سطر ملفوف بيبدأ فيها، مش عنوان.
+    """
+    if hit.start and text[hit.start - 1] != "\n":
+        return False
+    stop = text.find("\n", hit.end)
+    rest = text[hit.end:stop if stop >= 0 else len(text)].strip(" \t:.-–—")
+    return not rest or (len(rest) <= 80 and rest[0].isupper())
+
+
+@dataclass(frozen=True)
+class Section:
+    key: str
+    start: int   # بداية العنوان
+    end: int     # نهاية العنوان (بداية المحتوى)
+    stop: int    # بداية العنوان التالي (أو نهاية النص)
+
+
+class SectionIndex:
+    """
+    فهرس العناوين المكتشفة في النص مع مواضعها، يبنى مرة واحدة لكل وثيقة
+    (RuleSet.scan) ويستخدم في الفحوصات والملخص وبناء الـprompt بدل إعادة المسح.
+    """
+
+    def __init__(self, hits: List[Hit], text_len: int, template: str = ""):
+        self.hits = hits
+        self.text_len = text_len
+        self.template = template   # بصمة القالب اللي انبنى فيه الفهرس
+        self._first: Dict[str, Hit] = {}
+        for h in hits:
+            self._first.setdefault(h.key, h)
+
+    def found(self) -> Set[str]:
+        return set(self._first)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._first
+
+    def first(self, key: str) -> Optional[Hit]:
+        return self._first.get(key)
+
+    def block(self, start_key: str, end_keys: Iterable[str]) -> Optional[Tuple[int, int]]:
+        """
+        مثل re.search(r"START(.*?)(END1|END2|...)", DOTALL):
+        من نهاية أول START لبداية أول END بعده.
+        """
+        start = self._first.get(start_key)
+        if start is None:
+            return None
+        end_keys = set(end_keys)
+        for h in self.hits:
+            if h.start >= start.end and h.key in end_keys:
+                return start.end, h.start
+        return None
+
+    def sections(self) -> List[Section]:
+        """كل العناوين بالترتيب، وكل واحد ممتد لحد العنوان اللي بعده."""
+        heads: List[Hit] = []
+        for h in self.hits:
+            # عدة markers على نفس الموضع (CHAPTER 1 و CHAPTER): نخلي الأدق (المسجل أولاً)
+            if heads and heads[-1].start == h.start:
+                continue
+            heads.append(h)
+        out = []
+        for i, h in enumerate(heads):
+            stop = heads[i + 1].start if i + 1 < len(heads) else self.text_len
+            out.append(Section(h.key, h.start, h.end, stop))
+        return out
@@ -1,14 +1,282 @@
-# core/storage.py
-import os, json, time
-from typing import Dict, Any
-
-REPORT_DIR = "reports"
-
-def save_report(report: Dict[str, Any], original_filename: str) -> str:
-    os.makedirs(REPORT_DIR, exist_ok=True)
-    ts = time.strftime("%Y%m%d_%H%M%S")
-    safe = "".join(c for c in original_filename if c.isalnum() or c in ("-","_",".")).strip(".")
-    path = os.path.join(REPORT_DIR, f"{ts}_{safe}.json")
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(report, f, ensure_ascii=False, indent=2)
-    return path
+# core/storage.py
+"""
+التقارير تنحفظ بقاعدة SQLite واحدة (reports/reports.sqlite) بدل ملف JSON لكل تقرير:
+التقرير نفسه JSON مضغوط (zlib)، وأعمدة مفهرسة للبحث (اسم الملف، hash المحتوى، الوقت، النتيجة)،
+و hash كل فقرة/صفحة (blocks) لمقارنة النسخة التالية من نفس المشروع (لنفس المستخدم بس: owner)،
+ونتيجة كل فحص (outcomes: byte لكل check id) للتحليلات بدون فك ضغط التقارير (core/analytics.py).
+WAL + busy_timeout → أكثر من جلسة Streamlit / worker يكتبون بنفس الوقت بأمان.
+"""
+import os, json, re, sqlite3, threading, time, zlib
+from typing import Dict, Any, Iterable, List, Optional, Sequence, Tuple
+
+from core.telemetry import span
+
+REPORT_DIR = "reports"
+STORE_PATH = os.path.join(REPORT_DIR, "reports.sqlite")
+BLOCK_BYTES = 8  # حجم hash الفقرة/الصفحة (ExtractedDoc.blocks)
+# outcomes[i] لفحص رقم i بجدول check_ids
+NOT_RUN, PASSED, FAILED = 0, 1, 2
+# owner=ANY_OWNER بـ latest_for_file/history → تقارير الملف من كل المستخدمين (سطر الأوامر، المقارنة اليدوية)
+ANY_OWNER = object()
+
+# مرجع تقرير محفوظ: "<db path>#<id>" — هذا اللي يرجعه save_report ويقبله compare.load_report
+_REF = re.compile(r"^(?P<db>.+\.sqlite)#(?P<id>\d+)$")
+_LEGACY_NAME = re.compile(r"^(?P<ts>\d{8}_\d{6})_(?P<name>.+)\.json$")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    id INTEGER PRIMARY KEY,
+    filename TEXT NOT NULL,
+    content_hash TEXT,
+    created REAL NOT NULL,
+    score INTEGER,
+    source TEXT UNIQUE,
+    blob BLOB NOT NULL,
+    blocks BLOB,
+    outcomes BLOB,
+    owner TEXT
+);
+CREATE TABLE IF NOT EXISTS check_ids (
+    idx INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    title TEXT
+);
+CREATE INDEX IF NOT EXISTS reports_filename ON reports(filename, created);
+CREATE INDEX IF NOT EXISTS reports_hash ON reports(content_hash);
+CREATE INDEX IF NOT EXISTS reports_created ON reports(created);
+CREATE INDEX IF NOT EXISTS reports_score ON reports(score);
+"""
+
+def safe_filename(name: str) -> str:
+    return "".join(c for c in name if c.isalnum() or c in ("-","_",".")).strip(".")
+
+def _pack(report: Dict[str, Any]) -> bytes:
+    return zlib.compress(json.dumps(report, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), 6)
+
+def _unpack(blob: bytes) -> Dict[str, Any]:
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+class ReportStore:
+    def __init__(self, path: str = STORE_PATH):
+        self.path = path
+        d = os.path.dirname(path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("PRAGMA busy_timeout=30000")
+        self._db.executescript(_SCHEMA)
+        cols = {r[1] for r in self._db.execute("PRAGMA table_info(reports)")}
+        for col, kind in (("blocks", "BLOB"), ("outcomes", "BLOB"), ("owner", "TEXT")):
+            if col not in cols:
+                self._db.execute(f"ALTER TABLE reports ADD COLUMN {col} {kind}")
+        # بعد الـALTER: قواعد قديمة ما فيها عمود owner
+        self._db.execute("CREATE INDEX IF NOT EXISTS reports_owner_file ON reports(owner, filename, created)")
+        self._lock = threading.Lock()
+        self._check_idx: Dict[str, int] = {}
+
+    def ref(self, report_id: int) -> str:
+        return f"{self.path}#{report_id}"
+
+    # ---------- check outcomes ----------
+    def check_ids(self) -> List[Tuple[str, str]]:
+        """(id, title) لكل فحص بترتيب أعمدة outcomes."""
+        with self._lock:
+            return [(r[0], r[1]) for r in self._db.execute("SELECT name, title FROM check_ids ORDER BY idx")]
+
+    def _outcomes(self, report: Dict[str, Any]) -> Optional[bytes]:
+        """byte لكل فحص (NOT_RUN/PASSED/FAILED). لازم ينادى داخل transaction الكتابة (أرقام الفحوصات الجديدة)."""
+        checks = report.get("checks") or []
+        if not checks:
+            return b""
+        if any(c["id"] not in self._check_idx for c in checks):
+            # كاتب ثاني (process ثاني) ممكن يكون أضاف فحوصات؛ نقرأ الجدول قبل ما نضيف
+            self._check_idx = {r[0]: r[1] for r in self._db.execute("SELECT name, idx FROM check_ids")}
+            for c in checks:
+                if c["id"] not in self._check_idx:
+                    cur = self._db.execute("INSERT INTO check_ids (idx, name, title) VALUES (?, ?, ?)",
+                                           (len(self._check_idx), c["id"], c.get("title")))
+                    self._check_idx[c["id"]] = cur.lastrowid
+        row = bytearray(max(self._check_idx[c["id"]] for c in checks) + 1)
+        for c in checks:
+            row[self._check_idx[c["id"]]] = PASSED if c["passed"] else FAILED
+        return bytes(row)
+
+    def backfill_outcomes(self, batch_size: int = 1000) -> int:
+        """تقارير محفوظة قبل عمود outcomes: نفك ضغطها مرة واحدة ونعبيه."""
+        done = 0
+        while True:
+            with self._lock:
+                rows = self._db.execute("SELECT id, blob FROM reports WHERE outcomes IS NULL ORDER BY id LIMIT ?",
+                                        (batch_size,)).fetchall()
+                if not rows:
+                    return done
+                self._db.execute("BEGIN IMMEDIATE")
+                try:
+                    for rid, blob in rows:
+                        self._db.execute("UPDATE reports SET outcomes = ? WHERE id = ?",
+                                         (self._outcomes(_unpack(blob)), rid))
+                    self._db.execute("COMMIT")
+                except BaseException:
+                    self._db.execute("ROLLBACK")
+                    self._check_idx = {}
+                    raise
+            done += len(rows)
+
+    # ---------- write ----------
+    def save(self, report: Dict[str, Any], filename: str, content_hash: Optional[str] = None,
+             created: Optional[float] = None, blocks: Sequence[bytes] = (), owner: Optional[str] = None) -> int:
+        return self.save_many([(report, filename, content_hash, created, blocks)], owner=owner)[0]
+
+    def save_many(self, rows: Iterable[Tuple[Dict[str, Any], str, Optional[str], Optional[float], Sequence[bytes]]],
+                  source: Optional[List[str]] = None, owner: Optional[str] = None) -> List[int]:
+        """
+        كل الصفوف بـtransaction واحدة (BEGIN IMMEDIATE: قفل الكتابة من البداية، بدون deadlock بين الكتّاب).
+        source (اختياري) مسار الملف الأصلي: الصف المكرر يتجاهل، فالاستيراد ممكن يتعاد.
+        owner: المستخدم (جلسة الواجهة) صاحب التقارير؛ None لسطر الأوامر والاستيراد.
+        """
+        now = time.time()
+        rows = list(rows)
+        values = [
+            (safe_filename(filename), h, created or now, report.get("score"),
+             source[i] if source else None, _pack(report), b"".join(blocks) or None, owner)
+            for i, (report, filename, h, created, blocks) in enumerate(rows)
+        ]
+        ids = []
+        with span("storage.save", rows=len(values), bytes=sum(len(v[5]) for v in values)), self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                for v, row in zip(values, rows):
+                    cur = self._db.execute(
+                        "INSERT OR IGNORE INTO reports (filename, content_hash, created, score, source, blob, blocks,"
+                        " owner, outcomes) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", v + (self._outcomes(row[0]),))
+                    ids.append(cur.lastrowid if cur.rowcount else None)
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                self._check_idx = {}   # أرقام فحوصات جديدة ممكن ما انحفظت
+                raise
+        return ids
+
+    # ---------- read ----------
+    def _rows(self, sql: str, args: tuple) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT id, filename, content_hash, created, score FROM reports {sql}", args).fetchall()
+        return [{"id": r[0], "filename": r[1], "content_hash": r[2], "created": r[3], "score": r[4]} for r in rows]
+
+    def get(self, report_id: int) -> Optional[Dict[str, Any]]:
+        with span("storage.load") as sp:
+            with self._lock:
+                row = self._db.execute("SELECT blob FROM reports WHERE id = ?", (report_id,)).fetchone()
+            if not row:
+                return None
+            sp.add(bytes=len(row[0]))
+            return _unpack(row[0])
+
+    def blocks(self, report_id: int) -> Tuple[bytes, ...]:
+        """hash كل فقرة (docx) أو صفحة (pdf) للتقرير، 8 bytes لكل واحد."""
+        with self._lock:
+            row = self._db.execute("SELECT blocks FROM reports WHERE id = ?", (report_id,)).fetchone()
+        data = row[0] if row and row[0] else b""
+        return tuple(data[i:i + BLOCK_BYTES] for i in range(0, len(data), BLOCK_BYTES))
+
+    def latest_for_file(self, filename: str, owner: Any = None) -> Optional[Dict[str, Any]]:
+        """
+        آخر تقرير لنفس اسم الملف (الاسم بعد التنظيف، مثل ما ينحفظ) ولنفس المستخدم:
+        طالبين رفعوا thesis.pdf ما بيشوفوا تقارير بعض. owner=None → تقارير سطر الأوامر بس،
+        owner=ANY_OWNER → آخر تقرير للملف من أي مستخدم.
+        """
+        rows = self.history(filename, 1, owner)
+        return rows[0] if rows else None
+
+    def history(self, filename: str, limit: int = 50, owner: Any = None) -> List[Dict[str, Any]]:
+        if owner is ANY_OWNER:
+            return self._rows("WHERE filename = ? ORDER BY created DESC LIMIT ?",
+                              (safe_filename(filename), limit))
+        return self._rows("WHERE owner IS ? AND filename = ? ORDER BY created DESC LIMIT ?",
+                          (owner, safe_filename(filename), limit))
+
+    def by_hash(self, content_hash: str) -> List[Dict[str, Any]]:
+        return self._rows("WHERE content_hash = ? ORDER BY created DESC", (content_hash,))
+
+    def below_score(self, score: int, since: Optional[float] = None, limit: int = 1000) -> List[Dict[str, Any]]:
+        if since is None:
+            return self._rows("WHERE score < ? ORDER BY score LIMIT ?", (score, limit))
+        return self._rows("WHERE score < ? AND created >= ? ORDER BY score LIMIT ?", (score, since, limit))
+
+    def outcome_rows(self, after_id: int = 0) -> List[Tuple[int, str, float, Optional[int], bytes]]:
+        """(id, filename, created, score, outcomes) لكل تقرير بعد after_id — بدون فك ضغط التقارير."""
+        with self._lock:
+            return self._db.execute("SELECT id, filename, created, score, outcomes FROM reports"
+                                    " WHERE id > ? ORDER BY id", (after_id,)).fetchall()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM reports").fetchone()[0]
+
+    # ---------- import ----------
+    def import_json_dir(self, directory: str = REPORT_DIR, batch_size: int = 500) -> int:
+        """
+        استيراد ملفات reports/*.json القديمة (الاسم بصيغة {ts}_{filename}.json).
+        الملف اللي انستورد قبل هيك يتجاهل.
+        """
+        imported = 0
+        batch, sources = [], []
+
+        def flush():
+            nonlocal imported
+            if batch:
+                imported += sum(1 for i in self.save_many(batch, sources) if i is not None)
+                batch.clear()
+                sources.clear()
+
+        for entry in sorted(os.scandir(directory), key=lambda e: e.name):
+            if not entry.is_file() or not entry.name.endswith(".json"):
+                continue
+            m = _LEGACY_NAME.match(entry.name)
+            if m:
+                name = m.group("name")
+                created = time.mktime(time.strptime(m.group("ts"), "%Y%m%d_%H%M%S"))
+            else:
+                name, created = entry.name[:-5], entry.stat().st_mtime
+            try:
+                with open(entry.path, "r", encoding="utf-8") as f:
+                    report = json.load(f)
+            except (OSError, ValueError):
+                continue
+            batch.append((report, name, None, created, ()))
+            sources.append(os.path.abspath(entry.path))
+            if len(batch) >= batch_size:
+                flush()
+        flush()
+        return imported
+
+_stores: Dict[str, ReportStore] = {}
+_stores_lock = threading.Lock()
+
+def get_store(path: str = STORE_PATH) -> ReportStore:
+    """connection واحد لكل قاعدة على مستوى الـprocess."""
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = ReportStore(path)
+        return store
+
+def save_report(report: Dict[str, Any], original_filename: str, content_hash: Optional[str] = None,
+                blocks: Sequence[bytes] = (), owner: Optional[str] = None) -> str:
+    store = get_store()
+    return store.ref(store.save(report, original_filename, content_hash, blocks=blocks, owner=owner))
+
+def load_ref(ref: str) -> Optional[Dict[str, Any]]:
+    """"reports/reports.sqlite#12" → التقرير، أو None لو المرجع مش بهالصيغة."""
+    m = _REF.match(ref)
+    if not m:
+        return None
+    return get_store(m.group("db")).get(int(m.group("id")))
+
+if __name__ == "__main__":
+    import sys
+    src = sys.argv[1] if len(sys.argv) > 1 else REPORT_DIR
+    print(f"imported {get_store().import_json_dir(src)} reports into {STORE_PATH}")
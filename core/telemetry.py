@@ -0,0 +1,172 @@
+# core/telemetry.py
+"""
+قياس الوقت لكل مرحلة (extract, checks, format checks, storage, LLM) مع عدادات
+(bytes, pages, paragraphs, tokens ...)، مجمعة على مستوى الـprocess.
+
+مطفي افتراضياً (CHECKER_TELEMETRY=1 أو enable() لتشغيله). processes ثانية (workers طابور
+الفحص) ترجع snapshot() تبعها للـparent وهو يجمعها عنده بـmerge(). وهو مطفي، span() يرجع
+object ثابت ما بيعمل إشي، و @timed يستدعي الدالة مباشرة — تكلفة شبه صفر.
+
+    with span("storage.save", rows=1) as sp:
+        ...
+        sp.add(bytes=len(blob))
+
+    @timed("extract.docx", lambda doc, src, *a, **k: {"pages": doc.pages})
+    def extract_docx(src): ...
+"""
+from __future__ import annotations
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+_enabled = os.environ.get("CHECKER_TELEMETRY", "").lower() in ("1", "true", "yes", "on")
+_lock = threading.Lock()
+_stats: Dict[str, Dict[str, float]] = {}
+_recent: "deque[Dict[str, Any]]" = deque(maxlen=200)
+_active: Dict[int, tuple] = {}  # id(span) -> (stage, بداية wall clock): شو شغال هلأ ("علقت؟")
+
+def enable(on: bool = True) -> None:
+    global _enabled
+    _enabled = on
+
+def enabled() -> bool:
+    return _enabled
+
+def reset() -> None:
+    with _lock:
+        _stats.clear()
+        _recent.clear()
+
+class Span:
+    __slots__ = ("stage", "counts", "_t0")
+
+    def __init__(self, stage: str, counts: Dict[str, float]):
+        self.stage = stage
+        self.counts = counts
+        self._t0 = 0.0
+
+    def add(self, **counts: float) -> None:
+        for k, v in counts.items():
+            self.counts[k] = self.counts.get(k, 0) + v
+
+    def __enter__(self) -> "Span":
+        with _lock:
+            _active[id(self)] = (self.stage, time.time())
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        dt = time.perf_counter() - self._t0
+        with _lock:
+            _active.pop(id(self), None)
+            st = _stats.get(self.stage)
+            if st is None:
+                st = _stats[self.stage] = {"calls": 0, "errors": 0, "seconds": 0.0, "max_seconds": 0.0}
+            st["calls"] += 1
+            st["seconds"] += dt
+            st["max_seconds"] = max(st["max_seconds"], dt)
+            if exc_type is not None:
+                st["errors"] += 1
+            for k, v in self.counts.items():
+                st[k] = st.get(k, 0) + v
+            _recent.append({"stage": self.stage, "at": round(time.time(), 3), "seconds": round(dt, 5),
+                            "error": exc_type.__name__ if exc_type is not None else None, **self.counts})
+        return False
+
+class _NoSpan:
+    __slots__ = ()
+
+    def add(self, **counts: float) -> None:
+        pass
+
+    def __enter__(self) -> "_NoSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+_NOOP = _NoSpan()
+
+def span(stage: str, **counts: float):
+    return Span(stage, counts) if _enabled else _NOOP
+
+def timed(stage: str, counts: Optional[Callable[..., Dict[str, float]]] = None):
+    """decorator: span حول الدالة؛ counts(result, *args, **kwargs) ترجع عدادات إضافية."""
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with Span(stage, {}) as sp:
+                out = fn(*args, **kwargs)
+                if counts is not None:
+                    sp.add(**counts(out, *args, **kwargs))
+                return out
+        return wrapper
+    return deco
+
+def merge(snap: Dict[str, Any]) -> None:
+    """يضيف أرقام snapshot() من process ثاني (worker) لأرقام هالـprocess."""
+    with _lock:
+        for name, other in snap.get("stages", {}).items():
+            st = _stats.get(name)
+            if st is None:
+                st = _stats[name] = {"calls": 0, "errors": 0, "seconds": 0.0, "max_seconds": 0.0}
+            for k, v in other.items():
+                if k == "max_seconds":
+                    st[k] = max(st[k], v)
+                elif k != "avg_seconds":
+                    st[k] = st.get(k, 0) + v
+        _recent.extend(snap.get("recent", ()))
+
+# ---------- snapshots ----------
+def snapshot(recent: int = 50) -> Dict[str, Any]:
+    now = time.time()
+    with _lock:
+        stages = {}
+        for name, st in _stats.items():
+            s = dict(st)
+            s["avg_seconds"] = s["seconds"] / s["calls"] if s["calls"] else 0.0
+            stages[name] = s
+        active = [{"stage": stage, "running_seconds": round(now - t0, 3)} for stage, t0 in _active.values()]
+        last = list(_recent)[-recent:] if recent else []
+    return {"enabled": _enabled, "pid": os.getpid(), "stages": stages, "active": active, "recent": last}
+
+def to_json(recent: int = 50) -> str:
+    return json.dumps(snapshot(recent), ensure_ascii=False, indent=2)
+
+def _metric(name: str) -> str:
+    return "".join(c if c.isalnum() else "_" for c in name)
+
+def prometheus() -> str:
+    """نفس الأرقام بصيغة Prometheus text exposition."""
+    snap = snapshot(recent=0)
+    lines = []
+    families: Dict[str, list] = {}
+    for stage, st in sorted(snap["stages"].items()):
+        label = stage.replace("\\", "\\\\").replace('"', '\\"')
+        for key, value in st.items():
+            if key == "avg_seconds":
+                continue
+            if key == "max_seconds":
+                metric, kind = "checker_stage_seconds_max", "gauge"
+            elif key == "seconds":
+                metric, kind = "checker_stage_seconds_total", "counter"
+            else:
+                metric, kind = f"checker_stage_{_metric(key)}_total", "counter"
+            families.setdefault(metric, [kind]).append(f'{metric}{{stage="{label}"}} {value:g}')
+    for metric, (kind, *samples) in families.items():
+        lines.append(f"# TYPE {metric} {kind}")
+        lines += samples
+    # أطول span شغال حالياً لكل مرحلة
+    running: Dict[str, float] = {}
+    for a in snap["active"]:
+        running[a["stage"]] = max(running.get(a["stage"], 0.0), a["running_seconds"])
+    lines.append("# TYPE checker_stage_running_seconds gauge")
+    for stage, secs in sorted(running.items()):
+        lines.append(f'checker_stage_running_seconds{{stage="{stage}"}} {secs:g}')
+    return "\n".join(lines) + "\n"
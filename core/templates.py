@@ -0,0 +1,315 @@
+# core/templates.py
+"""
+قوالب الفحص (الأقسام المطلوبة، الأولويات، ورسائل التصحيح) من ملفات JSON/YAML بمجلد templates/،
+بدل ما تكون مكتوبة داخل run_checks. كل كلية تضيف ملف قالبها:
+
+    templates/bau.json  →  {"id": "bau", "version": "2025.1", "name": ..., "markers": [...], "checks": [...]}
+
+أنواع الفحوصات بـ"checks" (بالترتيب اللي بتطلع فيه بالتقرير):
+- section:    {"id", "phrase" (نص أو قائمة بدائل), "gap"?, "title", "priority", "fix"}
+- word_count: {"id", "section", "until", "min", "max", "title", "details" ("{n}"), "priority", "fix"}
+- list_count: نفس word_count، بس بيعد الأسطر المرقمة/النقاط داخل القسم
+- captions / citations: فحوصات الأشكال والجداول والمراجع (core.captions / core.citations)
+
+"group" (اختياري، لكل فحص): اسم المجموعة اللي بتنعرض فيها النتيجة؛ الفحوصات المتتالية بنفس
+المجموعة بتوصل للواجهة مع بعض (core.checks.iter_checks).
+
+"context" (اختياري، لـsection): حصة القسم من نص الـprompt للمستشار (core.ai_engine.context):
+{"weight", "min" (أقل حصة بالـtokens)، "within"? (id الفصل اللي القسم جزء منه)}، أو "drop"
+للأقسام اللي ما بتفيد التقييم (الإهداء، الفهارس، المراجع). بدونه: {"weight": 1, "min": 40}.
+
+بعض الـids إلها معنى خارج القالب (has_abstract، chapter_N، ch1_*/ch3_*، references،
+has_list_of_figures/tables، has_table_of_contents): الملخص وبناء الـprompt وفحص الـcaptions
+والمراجع بيعتمدوا عليها، فالقوالب الجديدة تستخدم نفس الأسماء لنفس الأقسام.
+الـid ما بيتغير بعد ما ينشر القالب (حتى لو فيه خطأ إملائي مثل ch3_none_-functional_requirments):
+التقارير المحفوظة ومقارنة النسخ والتحليلات (outcomes) مربوطة فيه؛ تصحيح العنوان بيصير بـ"phrase".
+
+القالب يتحقق منه ويترجم مرة واحدة لكل process (TemplatePlan: frozen، الـmarkers مترجمة،
+والرسائل interned ونتائج الأقسام جاهزة)، والبصمة (fingerprint) تدخل بمفتاح الكاش.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple, Union
+
+from core.rules import RuleSet, marker
+
+TEMPLATE_DIR = os.environ.get(
+    "CHECKER_TEMPLATES",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "templates"))
+DEFAULT_TEMPLATE = os.environ.get("CHECKER_TEMPLATE", "bau")
+EXTENSIONS = (".json", ".yaml", ".yml")
+
+PRIORITIES = ("high", "medium", "low")
+GROUPS = {"captions": "Figures & Tables", "citations": "Citations"}   # type → المجموعة الافتراضية
+DEFAULT_GROUP = "Checks"
+FOUND, MISSING = sys.intern("موجود"), sys.intern("غير موجود")
+
+class TemplateError(ValueError):
+    pass
+
+@dataclass(frozen=True)
+class ContextSpec:
+    weight: float
+    min: int
+    within: Optional[str] = None   # القسم الأب (أجزاء الفصل تنحسب بس داخل فصلها)
+
+DEFAULT_CONTEXT = ContextSpec(1.0, 40)
+
+@dataclass(frozen=True)
+class SectionRule:
+    group: str
+    id: str
+    title: str
+    priority: str
+    fix: str
+    passed: Any   # CheckResult جاهزة (القسم موجود)
+    failed: Any   # CheckResult جاهزة (القسم ناقص)
+    context: Optional[ContextSpec] = DEFAULT_CONTEXT   # None → "drop" (ما ينبعت للـLLM)
+
+@dataclass(frozen=True)
+class CountRule:
+    group: str
+    kind: str                 # "word_count" | "list_count"
+    id: str
+    section: str
+    until: FrozenSet[str]
+    min: int
+    max: int
+    title: str
+    details: str
+    priority: str
+    fix: str
+
+@dataclass(frozen=True)
+class GroupRule:
+    group: str
+    kind: str                 # "captions" | "citations"
+
+Rule = Union[SectionRule, CountRule, GroupRule]
+
+@dataclass(frozen=True)
+class TemplatePlan:
+    id: str
+    version: str
+    name: str
+    fingerprint: str
+    rules: RuleSet
+    checks: Tuple[Rule, ...]
+    phrases: Tuple[Tuple[str, str], ...]   # (id, أول صيغة للعنوان) لكل section بالترتيب
+
+    def info(self) -> Dict[str, str]:
+        return {"id": self.id, "version": self.version, "name": self.name}
+
+    def phrase(self, check_id: str) -> Optional[str]:
+        return dict(self.phrases).get(check_id)
+
+# ---------- load / validate / compile ----------
+def _need(obj: Dict[str, Any], name: str, kind: type, where: str) -> Any:
+    value = obj.get(name)
+    if not isinstance(value, kind) or (isinstance(value, str) and not value.strip()):
+        raise TemplateError(f"{where}: '{name}' must be a non-empty {kind.__name__}")
+    return value
+
+def _text(obj: Dict[str, Any], name: str, where: str) -> str:
+    return sys.intern(_need(obj, name, str, where))
+
+def _priority(obj: Dict[str, Any], where: str) -> str:
+    p = _text(obj, "priority", where)
+    if p not in PRIORITIES:
+        raise TemplateError(f"{where}: priority must be one of {PRIORITIES}, got {p!r}")
+    return p
+
+def _context(spec: Dict[str, Any], where: str) -> Optional[ContextSpec]:
+    ctx = spec.get("context")
+    if ctx is None:
+        return DEFAULT_CONTEXT
+    if ctx == "drop":
+        return None
+    if not isinstance(ctx, dict):
+        raise TemplateError(f"{where}: 'context' must be an object or \"drop\"")
+    weight, floor, within = ctx.get("weight", 1), ctx.get("min", 40), ctx.get("within")
+    if isinstance(weight, bool) or not isinstance(weight, (int, float)) or weight <= 0:
+        raise TemplateError(f"{where}: context weight must be a positive number")
+    if isinstance(floor, bool) or not isinstance(floor, int) or floor < 0:
+        raise TemplateError(f"{where}: context min must be a non-negative int")
+    if within is not None and not isinstance(within, str):
+        raise TemplateError(f"{where}: context within must be a section id")
+    return ContextSpec(float(weight), floor, within)
+
+def compile_template(raw: Dict[str, Any], source: str = "<template>") -> TemplatePlan:
+    """يتحقق من القالب ويرجع TemplatePlan؛ أي خطأ بالقالب → TemplateError مع مكانه."""
+    from core.checks import CheckResult
+
+    if not isinstance(raw, dict):
+        raise TemplateError(f"{source}: template must be an object")
+    tid = _text(raw, "id", source)
+    version = _text(raw, "version", source)
+    name = raw.get("name") or tid
+
+    markers, checks, phrases, seen = [], [], [], set()
+    for i, spec in enumerate(_need(raw, "checks", list, source)):
+        where = f"{source}: checks[{i}]"
+        if not isinstance(spec, dict):
+            raise TemplateError(f"{where}: must be an object")
+        kind = spec.get("type")
+        group = spec.get("group") or GROUPS.get(kind, DEFAULT_GROUP)
+        if not isinstance(group, str):
+            raise TemplateError(f"{where}: 'group' must be a string")
+        group = sys.intern(group)
+        if kind in GROUPS:
+            if kind in seen:
+                raise TemplateError(f"{where}: duplicate group {kind!r}")
+            seen.add(kind)
+            checks.append(GroupRule(group, sys.intern(kind)))
+            continue
+        cid = _text(spec, "id", where)
+        if cid in seen:
+            raise TemplateError(f"{where}: duplicate id {cid!r}")
+        seen.add(cid)
+        title, fix, priority = _text(spec, "title", where), _text(spec, "fix", where), _priority(spec, where)
+
+        if kind == "section":
+            variants = spec.get("phrase")
+            variants = [variants] if isinstance(variants, str) else variants
+            if not variants or not all(isinstance(v, str) and v.strip() for v in variants):
+                raise TemplateError(f"{where}: 'phrase' must be a string or a list of strings")
+            gap = spec.get("gap", r"\ ")
+            try:
+                markers += [marker(cid, v, gap=gap) for v in variants]
+            except (ValueError, TypeError, re.error) as e:
+                raise TemplateError(f"{where}: {e}") from None
+            phrases.append((cid, variants[0]))
+            checks.append(SectionRule(group, cid, title, priority, fix,
+                                      CheckResult(cid, title, True, FOUND, priority, fix),
+                                      CheckResult(cid, title, False, MISSING, priority, fix),
+                                      _context(spec, where)))
+        elif kind in ("word_count", "list_count"):
+            lo, hi = _need(spec, "min", int, where), _need(spec, "max", int, where)
+            if lo > hi:
+                raise TemplateError(f"{where}: min ({lo}) > max ({hi})")
+            details = _text(spec, "details", where)
+            if "{n}" not in details:
+                raise TemplateError(f"{where}: 'details' must contain {{n}}")
+            until = _need(spec, "until", list, where)
+            if not all(isinstance(k, str) for k in until):
+                raise TemplateError(f"{where}: 'until' must be a list of section ids")
+            checks.append(CountRule(group, kind, cid, _text(spec, "section", where), frozenset(until),
+                                    lo, hi, title, details, priority, fix))
+        else:
+            raise TemplateError(f"{where}: unknown type {kind!r}")
+
+    for i, spec in enumerate(raw.get("markers", ())):
+        where = f"{source}: markers[{i}]"
+        try:
+            markers.append(marker(_text(spec, "key", where), _text(spec, "phrase", where), gap=spec.get("gap", r"\ ")))
+        except (ValueError, TypeError, AttributeError, re.error) as e:
+            raise TemplateError(f"{where}: {e}") from None
+
+    # كل قسم مستخدم بـsection/until لازم يكون إله marker، و context.within قسم رئيسي بنفس القالب
+    keys = {m.key for m in markers}
+    top = {r.id for r in checks if isinstance(r, SectionRule) and (r.context is None or r.context.within is None)}
+    for rule in checks:
+        if isinstance(rule, CountRule):
+            unknown = ({rule.section} | rule.until) - keys
+            if unknown:
+                raise TemplateError(f"{source}: {rule.id}: unknown section keys {sorted(unknown)}")
+        elif isinstance(rule, SectionRule) and rule.context is not None and rule.context.within is not None:
+            if rule.context.within not in top:
+                raise TemplateError(f"{source}: {rule.id}: context within {rule.context.within!r} "
+                                    f"is not a top-level section")
+
+    canonical = json.dumps(raw, sort_keys=True, ensure_ascii=False).encode()
+    return TemplatePlan(id=tid, version=version, name=sys.intern(str(name)),
+                        fingerprint=hashlib.sha256(canonical).hexdigest()[:16],
+                        rules=RuleSet(markers), checks=tuple(checks), phrases=tuple(phrases))
+
+def _read(path: str) -> Dict[str, Any]:
+    with open(path, "rb") as f:
+        data = f.read()
+    if path.endswith(".json"):
+        try:
+            return json.loads(data)
+        except ValueError as e:
+            raise TemplateError(f"{path}: {e}") from None
+    try:
+        import yaml
+    except ImportError:
+        raise TemplateError(f"{path}: YAML templates need PyYAML (pip install pyyaml)") from None
+    try:
+        return yaml.safe_load(data)
+    except yaml.YAMLError as e:
+        raise TemplateError(f"{path}: {e}") from None
+
+def template_files(directory: Optional[str] = None) -> Dict[str, str]:
+    """id (اسم الملف بدون الامتداد) → المسار."""
+    directory = directory or TEMPLATE_DIR
+    out = {}
+    if os.path.isdir(directory):
+        for name in sorted(os.listdir(directory)):
+            stem, ext = os.path.splitext(name)
+            if ext.lower() in EXTENSIONS:
+                out.setdefault(stem, os.path.join(directory, name))
+    return out
+
+def load_template(path: str) -> TemplatePlan:
+    plan = compile_template(_read(path), path)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    if plan.id != stem:
+        raise TemplateError(f"{path}: id {plan.id!r} must match the file name")
+    return plan
+
+# ---------- process-wide catalog ----------
+_plans: Dict[str, TemplatePlan] = {}
+_plans_lock = threading.Lock()
+
+def get_template(template: Union[None, str, TemplatePlan] = None) -> TemplatePlan:
+    """القالب المترجم (مرة واحدة لكل process). None → DEFAULT_TEMPLATE."""
+    if isinstance(template, TemplatePlan):
+        return template
+    tid = template or DEFAULT_TEMPLATE
+    plan = _plans.get(tid)
+    if plan is not None:
+        return plan
+    with _plans_lock:
+        plan = _plans.get(tid)
+        if plan is None:
+            path = template_files().get(tid)
+            if path is None:
+                raise TemplateError(f"unknown template {tid!r} (in {TEMPLATE_DIR})")
+            plan = _plans[tid] = load_template(path)
+        return plan
+
+def available_templates() -> List[Dict[str, str]]:
+    """كل القوالب بالمجلد (id، version، name) للواجهة وسطر الأوامر؛ القوالب المعطوبة تنتجاهل."""
+    out = []
+    for tid in template_files():
+        try:
+            out.append(get_template(tid).info())
+        except TemplateError:
+            continue
+    return out
+
+def main(argv=None) -> int:
+    import argparse
+    ap = argparse.ArgumentParser(prog="python -m core.templates", description="Validate check templates.")
+    ap.add_argument("paths", nargs="*", help="template files (default: every file in the templates directory)")
+    args = ap.parse_args(argv)
+    errors = 0
+    for path in args.paths or list(template_files().values()):
+        try:
+            plan = load_template(path)
+        except (OSError, TemplateError) as e:
+            errors += 1
+            print(f"✗ {e}", file=sys.stderr)
+            continue
+        print(f"✓ {plan.id} {plan.version} — {len(plan.checks)} checks, {len(plan.rules)} markers, {plan.fingerprint}")
+    return 1 if errors else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
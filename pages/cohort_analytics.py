@@ -0,0 +1,74 @@
+# pages/cohort_analytics.py
+import datetime as dt
+import time
+
+import streamlit as st
+
+st.set_page_config(page_title="Cohort Analytics", layout="wide")
+
+from core.analytics import get_cohort_index
+
+
+st.title("📊 Cohort Analytics (تحليلات الدفعة)")
+st.write("أكثر الفحوصات رسوباً، توزيع النتائج، وتطورها مع اقتراب موعد التسليم — من كل التقارير المحفوظة.")
+
+# الـindex مشترك على مستوى الـprocess: كل rerun يقرأ بس التقارير الجديدة
+index = get_cohort_index()
+index.refresh()
+if not len(index):
+    st.info("لا يوجد تقارير محفوظة بعد.")
+    st.stop()
+
+everything = index.view()
+first = dt.date.fromtimestamp(float(everything.created.min()))
+last = dt.date.fromtimestamp(float(everything.created.max()))
+
+with st.sidebar:
+    period = st.date_input("الفترة", value=(first, last), min_value=first, max_value=last)
+    name = st.text_input("اسم الملف يحتوي")
+    latest = st.checkbox("آخر نسخة فقط من كل مشروع", value=True)
+    days = st.selectbox("تجميع الاتجاه", [1, 7], format_func=lambda d: "يومي" if d == 1 else "أسبوعي")
+
+# أثناء اختيار الفترة date_input يرجع تاريخ واحد
+start, end = period if len(period) == 2 else (period[0], period[0])
+since = time.mktime(start.timetuple())
+until = time.mktime((end + dt.timedelta(days=1)).timetuple())
+cohort = index.view(since, until, name or None, latest)
+if not len(cohort):
+    st.warning("لا يوجد تقارير بهذه الفلاتر.")
+    st.stop()
+
+stats = cohort.score_stats()
+c1, c2, c3, c4 = st.columns(4)
+c1.metric("التقارير", f"{len(cohort):,}")
+c2.metric("المشاريع", f"{cohort.projects:,}")
+c3.metric("متوسط النتيجة", f"{stats.get('mean', 0)}%")
+c4.metric("الوسيط (P10–P90)", f"{stats.get('median', 0):.0f}%", f"{stats.get('p10', 0):.0f}–{stats.get('p90', 0):.0f}",
+          delta_color="off")
+
+# بدون فلاتر: النسب من مجاميع الـindex (تتحدث مع كل refresh) بدل حسابها من المصفوفة كاملة
+unfiltered = (start, end) == (first, last) and not name and not latest
+rates = index.failure_rates() if unfiltered else cohort.failure_rates()
+left, right = st.columns([3, 2])
+with left:
+    st.subheader("❌ نسبة الرسوب لكل فحص")
+    top = rates[:15]
+    st.bar_chart({"check": [r["title"] for r in top], "failure rate": [r["rate"] for r in top]},
+                 x="check", y="failure rate", horizontal=True)
+with right:
+    st.subheader("📈 توزيع النتائج")
+    edges, counts = cohort.score_histogram()
+    st.bar_chart({"score": [f"{e}–{e + 9}" for e in edges], "reports": counts.tolist()}, x="score", y="reports")
+
+st.subheader("🗓️ الاتجاه مع الوقت")
+worst = [r["id"] for r in rates[:3]]
+trend = cohort.trend(days, worst)
+labels = [dt.date.fromtimestamp(t).isoformat() for t in trend["start"]]
+st.line_chart({"day": labels, "mean score": trend["mean_score"]}, x="day", y="mean score")
+st.line_chart({"day": labels, **{cid: trend["fail_rate"][cid] for cid in worst}}, x="day", y=worst)
+st.bar_chart({"day": labels, "reports": trend["reports"]}, x="day", y="reports")
+
+with st.expander("كل الفحوصات"):
+    # للمقارنة: نسبة رسوب كل فحص على كل الرفعات المحفوظة
+    overall = {r["id"]: r["rate"] for r in index.failure_rates()}
+    st.dataframe([{**r, "rate (all uploads)": overall.get(r["id"])} for r in rates], hide_index=True)
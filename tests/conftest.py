@@ -0,0 +1,24 @@
+# tests/conftest.py
+import os
+import sys
+
+# python -m pytest أو pytest من جذر المستودع: core/ لازم يكون على sys.path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """
+    مجلد عمل فاضي: reports/ و cache/ و similarity/ (مسارات نسبية) تنعمل فيه،
+    والـsingletons على مستوى الـprocess (القاعدة، الكاش، فهرس التشابه) تبدأ من جديد.
+    """
+    from core import cache, storage
+    from core.ai_engine import vector_check
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(storage, "_stores", {})
+    monkeypatch.setattr(cache, "_default", None)
+    monkeypatch.setattr(vector_check, "_default", None)
+    return tmp_path
@@ -0,0 +1,60 @@
+# tests/test_batch.py
+import io
+import json
+import multiprocessing
+import os
+
+import docx
+import pytest
+
+from core import batch
+
+
+def _write_docx(path, paragraphs):
+    d = docx.Document()
+    for text in paragraphs:
+        d.add_paragraph(text)
+    d.save(path)
+
+
+def _crash_on(name):
+    check_file = batch.check_file
+
+    def check(path, **kw):
+        if os.path.basename(path) == name:
+            os._exit(1)   # مثل segfault بالـworker
+        return check_file(path, **kw)
+    return check
+
+
+def _run(root, **kw):
+    out = io.StringIO()
+    stats = batch.run_batch(str(root), timeout=0, save=False, out=out, **kw)
+    return stats, {os.path.basename(r["file"]): r for r in map(json.loads, out.getvalue().splitlines())}
+
+
+def test_broken_file_is_an_error_record(tmp_path):
+    _write_docx(tmp_path / "good.docx", ["ABSTRACT", "CHAPTER 1", "Introduction"])
+    (tmp_path / "broken.docx").write_bytes(b"not a zip file")
+    (tmp_path / "notes.txt").write_text("ignored")
+
+    stats, records = _run(tmp_path, workers=2)
+    assert set(records) == {"good.docx", "broken.docx"}
+    assert records["good.docx"]["ok"] and records["good.docx"]["words"] == 4
+    assert not records["broken.docx"]["ok"] and records["broken.docx"]["error"]
+    assert (stats["docs"], stats["errors"]) == (2, 1)
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork", reason="workers must inherit the patch")
+def test_worker_crash_is_retried_alone(tmp_path, monkeypatch):
+    # fork: الـworkers بيورثوا check_file المعدلة
+    monkeypatch.setattr(batch, "check_file", _crash_on("crash.docx"))
+    for name in ("a.docx", "crash.docx", "b.docx"):
+        _write_docx(tmp_path / name, ["ABSTRACT", name])
+
+    stats, records = _run(tmp_path, workers=2)
+    assert records["crash.docx"] == {"file": str(tmp_path / "crash.docx"), "ok": False,
+                                     "error": "worker process crashed"}
+    # الملفات اللي كانت بنفس الـpool المكسور انعادت ونجحت
+    assert records["a.docx"]["ok"] and records["b.docx"]["ok"]
+    assert (stats["docs"], stats["errors"]) == (3, 1)
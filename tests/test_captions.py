@@ -0,0 +1,54 @@
+# tests/test_captions.py
+from core.captions import build_caption_index
+from core.checks import build_index
+
+
+def _index(text):
+    return build_caption_index(text, build_index(text))
+
+
+def test_chapter_mention_in_text_is_not_a_chapter_heading():
+    text = ("CHAPTER 3\nSystem Design\nFigure 3.1: Architecture\nSee Figure 3.1.\n"
+            "CHAPTER 4\nImplementation\nAs discussed in Chapter 3, the design holds.\n"
+            "Chapter 3, in short, covered the design.\n"
+            "Figure 4.1: Results\nSee Figure 4.1.\n")
+    cap = _index(text)
+    assert cap.chapters[("figure", "4.1")] == 4
+    assert cap.misplaced() == []
+
+
+def test_caption_under_wrong_chapter_is_misplaced():
+    text = "CHAPTER 2\nLiterature Review\nFigure 3.1: Survey\nSee Figure 3.1.\n"
+    assert _index(text).misplaced() == [(("figure", "3.1"), 2)]
+
+
+def test_fig_abbreviation_and_dash_labels_are_normalized():
+    text = "CHAPTER 1\nIntroduction\nFig. 1-1: Overview\nAs Figure 1.1 shows, and Table 1 . 2 too.\n"
+    cap = _index(text)
+    assert list(cap.captions) == [("figure", "1.1")]
+    assert cap.dangling() == [("table", "1.2")]
+    assert cap.unreferenced() == []
+
+
+def test_duplicates_and_gaps():
+    text = ("CHAPTER 1\nIntroduction\nFigure 1.1: A\nFigure 1.3: B\nFigure 1.3: C\n"
+            "Table 1: T\nTable 3: U\n")
+    cap = _index(text)
+    assert cap.duplicates() == [("figure", "1.3")]
+    assert cap.gaps() == [("figure", "1.2"), ("table", "2")]
+
+
+def test_list_of_figures_entries_are_not_captions():
+    text = ("LIST OF FIGURES\nFigure 1.1: Overview ........ 3\nFigure 1.2: Stale entry ........ 4\n"
+            "CHAPTER 1\nIntroduction\nFigure 1.1: Overview\nFigure 1.3: Unlisted\n")
+    cap = _index(text)
+    assert list(cap.captions) == [("figure", "1.1"), ("figure", "1.3")]
+    assert cap.stale() == [("figure", "1.2")]
+    assert cap.unlisted() == [("figure", "1.3")]
+
+
+def test_reference_in_running_text_is_not_a_caption():
+    text = "CHAPTER 2\nDesign\nthe flow in Figure 2.1 is simple.\nTable 2.1 lists the modules.\n"
+    cap = _index(text)
+    assert cap.captions == {}
+    assert sorted(cap.dangling()) == [("figure", "2.1"), ("table", "2.1")]
@@ -0,0 +1,70 @@
+# tests/test_citations.py
+from core.checks import build_index
+from core.citations import build_bibliography
+
+
+def _bib(text):
+    return build_bibliography(text, build_index(text))
+
+
+def test_numeric_ranges_lists_and_missing_entries():
+    text = ("CHAPTER 1\nIntroduction\nPrior work [1-3] and [5, 7].\n"
+            "References\n[1] A. One, Title.\n[2] B. Two, Title.\n[3] C. Three, Title.\n"
+            "[4] D. Four, Title.\n[5] E. Five, Title.\n")
+    bib = _bib(text)
+    assert bib.style == "n"
+    assert sorted(k[1] for k in bib.cited) == [1, 2, 3, 5, 7]
+    assert bib.uncited() == [("n", 4)]
+    assert bib.missing() == [("n", 7)]
+
+
+def test_implausible_range_counts_only_its_start():
+    bib = _bib("CHAPTER 1\nIntro\nSee [3-700].\nReferences\n[3] A. Author, Title.\n[4] B. Author, Title.\n")
+    assert list(bib.cited) == [("n", 3)]
+
+
+def test_author_year_narrative_and_parenthetical():
+    text = ("CHAPTER 1\nIntroduction\nSmith et al. (2020a) argued this (e.g., Jones & Brown, 2019, 2021).\n"
+            "In 2018 nothing changed (p. 12).\n"
+            "References\nSmith, J., Lee, K. (2020a). A study. Journal.\n"
+            "Jones, A. and Brown, B. (2019). Another.\nJones, A. (2021). Third.\n")
+    bib = _bib(text)
+    assert bib.style == "ay"
+    assert set(bib.cited) == {("ay", "smith 2020a"), ("ay", "jones 2019"), ("ay", "jones 2021")}
+    assert bib.missing() == [] and bib.uncited() == []
+
+
+def test_wrapped_entries_and_duplicates():
+    text = ("CHAPTER 1\nIntro\n[1] [2] [3]\nReferences\n[1] A. Author, \"Long title\n"
+            "continued on the next line,\" Journal, 2020.\n[2] B. Author, Other.\n[2] C. Author, Third.\n"
+            "[3] A. Author, \"Long title continued on the next line,\" Journal, 2020.\n")
+    bib = _bib(text)
+    assert len(bib.entries) == 4
+    assert bib.entries[0].text.endswith("Journal, 2020.")
+    assert [e.key for e in bib.duplicates()] == [("n", 2), ("n", 3)]
+
+
+def test_table_of_contents_references_line_is_skipped():
+    text = ("TABLE OF CONTENTS\nReferences ........ 40\nCHAPTER 1\nIntro [1].\n"
+            "References\n[1] A. Author, Title.\n[2] B. Author, Title.\n")
+    bib = _bib(text)
+    assert [e.key for e in bib.entries] == [("n", 1), ("n", 2)]
+    assert bib.uncited() == [("n", 2)]
+
+
+def test_chapter_mention_inside_an_entry_does_not_end_the_list():
+    text = ("CHAPTER 1\nIntroduction\nPrior work [1], [2] and [3].\nReferences\n"
+            "[1] A. Author, \"Design notes,\" in Chapter 4 of Foundations, 2019.\n"
+            "[2] B. Author, Title,\nChapter 2 of the proceedings, 2020.\n[3] C. Author, Title.\n")
+    bib = _bib(text)
+    assert [e.key for e in bib.entries] == [("n", 1), ("n", 2), ("n", 3)]
+    assert bib.entries[1].text.endswith("proceedings, 2020.")
+    assert bib.missing() == [] and bib.uncited() == []
+
+
+def test_list_ends_at_the_next_heading_line():
+    text = ("CHAPTER 1\nIntro [1].\nReferences\n[1] A. Author, Title.\n[2] B. Author, Title.\n"
+            "CHAPTER 5\nConclusion\nAs [2] showed.\n")
+    bib = _bib(text)
+    assert [e.key for e in bib.entries] == [("n", 1), ("n", 2)]
+    assert bib.uncited() == [] and bib.cited[("n", 2)][0] > text.index("CHAPTER 5")
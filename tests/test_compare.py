@@ -0,0 +1,61 @@
+# tests/test_compare.py
+import io
+
+import docx
+
+from core.compare import diff_revisions, load_latest
+from core.extract import extract_docx
+from core.storage import get_store
+
+
+def _doc(paragraphs):
+    d = docx.Document()
+    for text in paragraphs:
+        d.add_paragraph(text)
+    buf = io.BytesIO()
+    d.save(buf)
+    return extract_docx(buf.getvalue())
+
+
+BASE = ["ABSTRACT", "This project builds a campus assistant.", "CHAPTER 1", "Introduction",
+        "The problem is slow service.", "References", "[1] A. Author, Title."]
+
+
+def _report(score, failed=(), fixes=()):
+    return {"score": score, "checks": [{"id": c, "passed": False} for c in failed],
+            "fixes": [{"what": w} for w in fixes], "format_issues": []}
+
+
+def test_changed_paragraphs_and_sections():
+    old, new = _doc(BASE), _doc(BASE[:4] + ["The problem is slow and costly service."] + BASE[5:])
+    diff = diff_revisions(_report(60, ["has_dedication", "chapter_2"], ["a", "b"]), old.blocks,
+                          _report(75, ["chapter_2", "has_list_of_tables"], ["b", "c"]), new, old)
+    assert diff["unit"] == "paragraph"
+    assert (diff["changed"], diff["removed"], diff["unchanged"]) == (1, 1, len(BASE) - 1)
+    assert diff["changed_sections"] == diff["removed_from_sections"] == ["chapter_1"]
+    assert diff["improved_by"] == 15
+    assert diff["fixed_items"] == ["has_dedication"]
+    assert diff["regressed_items"] == ["has_list_of_tables"]
+    assert (diff["fixes_landed"], diff["new_issues"]) == (["a"], ["c"])
+
+
+def test_identical_revision_and_front_matter():
+    old = _doc(BASE)
+    diff = diff_revisions(_report(60), old.blocks, _report(60), _doc(BASE))
+    assert (diff["changed"], diff["removed"]) == (0, 0)
+    assert diff["changed_sections"] == [] and "removed_from_sections" not in diff
+
+    new = _doc(["Submitted by a student."] + BASE)
+    diff = diff_revisions(_report(60), old.blocks, _report(60), new)
+    assert diff["changed_sections"] == ["front_matter"]
+
+
+def test_load_latest_across_owners(workdir):
+    store = get_store()
+    store.save(_report(40), "thesis.pdf", created=1.0)
+    store.save(_report(70), "thesis.pdf", created=2.0, owner="s100")
+    store.save(_report(55), "thesis.pdf", created=3.0, owner="s200")
+    assert load_latest("thesis.pdf")["score"] == 55
+    assert load_latest("thesis.pdf", owner="s100")["score"] == 70
+    assert load_latest("thesis.pdf", owner=None)["score"] == 40
+    assert load_latest("other.pdf") is None
@@ -0,0 +1,70 @@
+# tests/test_extract_pdf.py
+import fitz
+
+from core.checks import build_index
+from core import extract
+from core.extract import extract_pdf
+
+
+def _pdf(lines):
+    """lines: [(y, [(نص, خط, حجم), ...])] — كل span بمكانه بعد اللي قبله على نفس السطر."""
+    doc = fitz.open()
+    page = doc.new_page()
+    for y, spans in lines:
+        x = 72
+        for text, font, size in spans:
+            page.insert_text((x, y), text, fontname=font, fontsize=size)
+            x += fitz.get_text_length(text, fontname=font, fontsize=size)
+    return doc.tobytes()
+
+
+def _book(pages):
+    doc = fitz.open()
+    for text in pages:
+        doc.new_page().insert_text((72, 100), text, fontname="helv", fontsize=12)
+    return doc.tobytes()
+
+
+def test_whitespace_spans_separate_words():
+    # خط مختلف عند كل مسافة: الـspans ["CHAPTER", " ", "1", " ", "Introduction"]
+    data = _pdf([(100, [("CHAPTER", "helv", 12), (" ", "tiro", 12), ("1", "helv", 12),
+                        (" ", "tiro", 12), ("Introduction", "helv", 12)])])
+    doc = extract_pdf(data)
+    assert doc.raw_text == "CHAPTER 1 Introduction"
+    assert "chapter_1" in {h.key for h in build_index(doc.raw_text).hits}
+    # المسافات ما بتدخل بجدول الـspans
+    assert [n for n, _, _ in doc.layout[0].runs(0)] == [7, 1, 12]
+
+
+def test_lines_fonts_and_headings():
+    body = "The system collects data from every campus service."
+    data = _pdf([(100, [("Literature Review", "hebo", 16)]),
+                 (130, [(body, "tiro", 12)]),
+                 (150, [("Results are ", "tiro", 12), ("summarized", "tibo", 12), (" below.", "tiro", 12)])])
+    doc = extract_pdf(data)
+    assert doc.raw_text.split("\n") == ["Literature Review", body, "Results are summarized below."]
+    assert doc.headings == ["literature review"]
+    lines = list(doc.pdf_lines())
+    assert [(ln.size, ln.bold, ln.heading) for ln in lines] == [(16, True, True), (12, False, False),
+                                                                 (12, False, False)]
+    assert lines[1].font == "Times-Roman"
+    assert [r[1] for r in lines[2].runs] == ["Times-Roman", "Times-Bold", "Times-Roman"]
+    assert doc.page_spans == ((0, len(doc.raw_text)),)
+
+
+def test_unchanged_pages_are_reused_from_the_previous_revision(monkeypatch):
+    pages = [f"Page {i} of the project." for i in range(6)]
+    first = extract_pdf(_book(pages))
+    # أول رفع: بدون hash الـobjects
+    assert first.page_digests == ()
+    second = extract_pdf(_book(pages), previous=first)
+    assert len(second.page_digests) == 6 and second.blocks == first.blocks
+
+    laid_out = []
+    layout = extract._page_layout
+    monkeypatch.setattr(extract, "_page_layout", lambda page: laid_out.append(page.number) or layout(page))
+    pages[3] = "Page 3 was rewritten."
+    third = extract_pdf(_book(pages), previous=second)
+    assert laid_out == [3]
+    assert third.raw_text.split("\n") == pages
+    assert [a == b for a, b in zip(third.blocks, second.blocks)] == [True] * 3 + [False] + [True] * 2
@@ -0,0 +1,58 @@
+# tests/test_format_checks.py
+import io
+
+import docx
+from docx.shared import Pt
+
+from core import format_checks
+from core.extract import extract_docx
+from core.format_checks import audit_formatting
+
+
+def _doc(body, chapters=1):
+    """body: [(نص, خط, حجم)] — None = من الـNormal style (Times New Roman 12، مسافة 1.5)."""
+    d = docx.Document()
+    normal = d.styles["Normal"]
+    normal.font.name, normal.font.size = "Times New Roman", Pt(12)
+    normal.paragraph_format.line_spacing = 1.5
+    for n in range(1, chapters + 1):
+        d.add_paragraph(f"CHAPTER {n}", style="Heading 1")
+        for text, font, size in body:
+            run = d.add_paragraph().add_run(text)
+            if font:
+                run.font.name = font
+            if size:
+                run.font.size = Pt(size)
+    buf = io.BytesIO()
+    d.save(buf)
+    return extract_docx(buf.getvalue())
+
+
+BODY = [("The system collects data.", None, None), ("Arial one.", "Arial", None),
+        ("Arial two.", "Arial", None), ("Small text.", None, 10)]
+
+
+def test_faults_are_grouped_per_section_as_paragraph_ranges():
+    issues = {i["kind"]: i for i in audit_formatting(_doc(BODY))}
+    assert set(issues) == {"font", "size"}
+    assert (issues["font"]["section"], issues["font"]["paragraphs"], issues["font"]["found"]) == \
+        ("CHAPTER 1", [[3, 4]], ["Arial"])
+    assert (issues["size"]["paragraphs"], issues["size"]["found"]) == ([[5, 5]], ["10pt"])
+
+
+def test_fault_in_most_sections_is_reported_once():
+    issues = audit_formatting(_doc(BODY, chapters=format_checks.MAX_SECTIONS_PER_KIND + 1))
+    fonts = [i for i in issues if i["kind"] == "font"]
+    assert len(fonts) == 1 and fonts[0]["section"] == f"{format_checks.MAX_SECTIONS_PER_KIND + 1} أقسام"
+
+
+def test_unchanged_paragraphs_reuse_the_previous_revision(monkeypatch):
+    first = _doc(BODY)
+    before = audit_formatting(first)
+
+    checked = []
+    faults = format_checks._paragraph_faults
+    monkeypatch.setattr(format_checks, "_paragraph_faults", lambda p, *a: checked.append(p.text) or faults(p, *a))
+    second = _doc(BODY[:3] + [("Small text, rewritten.", None, 10)])
+    assert audit_formatting(second, previous=first) == before
+    assert checked == ["Small text, rewritten."]
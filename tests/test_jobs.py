@@ -0,0 +1,111 @@
+# tests/test_jobs.py
+import io
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import docx
+import pytest
+
+from core import jobs
+from core.cache import ResultCache
+from core.storage import get_store
+
+NAME = "project.docx"
+
+
+def _docx(paragraphs):
+    d = docx.Document()
+    for text in paragraphs:
+        d.add_paragraph(text)
+    buf = io.BytesIO()
+    d.save(buf)
+    return buf.getvalue()
+
+
+class _Pool:
+    """بدل الـprocess pool: نفس الـtasks بـthread، تستنى gate قبل ما تبدأ، وملف b"boom" ما بينبعث."""
+
+    def __init__(self, gate):
+        self.gate = gate
+        self.threads = ThreadPoolExecutor(1)
+
+    def submit(self, fn, *args):
+        if fn is jobs._ping:
+            fut = Future()
+            fut.set_result(0)
+            return fut
+        if b"boom" in args:
+            raise TypeError("cannot pickle task arguments")
+        return self.threads.submit(self._run, fn, args)
+
+    def _run(self, fn, args):
+        self.gate.wait(10)
+        return fn(*args)
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.threads.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+
+class _Advisor:
+    def __init__(self, mode, key_id):
+        self.mode, self.key_id = mode, key_id
+
+
+@pytest.fixture
+def queue(workdir, monkeypatch):
+    gate = threading.Event()
+    pool = _Pool(gate)
+    monkeypatch.setattr(jobs.JobQueue, "_new_pool", lambda self: pool)
+    q = jobs.JobQueue(workers=1, cache=ResultCache("cache"))
+    monkeypatch.setattr(jobs, "_events", q._events)
+    monkeypatch.setattr(jobs, "_cache", q.cache)
+    q.gate = gate
+    yield q
+    gate.set()
+    pool.shutdown()
+
+
+def _wait(job, timeout=30):
+    deadline = time.time() + timeout
+    while job.active and time.time() < deadline:
+        time.sleep(0.02)
+    assert not job.active
+
+
+def test_shared_job_is_saved_for_every_user(queue):
+    data = _docx(["ABSTRACT", "CHAPTER 1", "Introduction", "References", "[1] A. Author, Title."])
+    job = queue.submit(data, NAME, user="s1001")
+    assert queue.submit(data, NAME, user="s2002") is job
+    assert queue.stats()["deduplicated"] == 1
+
+    queue.gate.set()
+    _wait(job)
+    assert job.status == "done", job.error
+    mine, theirs = queue.result_for(job, "s1001"), queue.result_for(job, "s2002")
+    assert (mine.owner, theirs.owner) == ("s1001", "s2002")
+    assert queue.result_for(job, "s2002") is theirs
+    store = get_store()
+    for entry, owner in ((mine, "s1001"), (theirs, "s2002")):
+        assert entry.report_path == store.ref(store.latest_for_file(NAME, owner)["id"])
+    assert len(store.history(NAME, owner="s2002")) == 1
+
+
+def test_submit_error_fails_only_that_job(queue):
+    queue.gate.set()
+    bad = queue.submit(b"boom", "broken.docx", user="a")
+    _wait(bad)
+    assert bad.status == "failed" and "TypeError" in bad.error
+
+    good = queue.submit(_docx(["ABSTRACT", "CHAPTER 1"]), NAME, user="a")
+    _wait(good)
+    assert good.status == "done", good.error
+    assert queue.stats()["running"] == 0
+
+
+def test_advise_jobs_are_keyed_on_mode_and_api_key(queue):
+    data = _docx(["ABSTRACT"])
+    job = queue.submit(data, NAME, user="a", kind="advise", advisor=_Advisor("budget", "k1"))
+    assert queue.submit(data, NAME, user="b", kind="advise", advisor=_Advisor("budget", "k1")) is job
+    assert queue.submit(data, NAME, user="c", kind="advise", advisor=_Advisor("map-reduce", "k1")) is not job
+    assert queue.submit(data, NAME, user="d", kind="advise", advisor=_Advisor("budget", "k2")) is not job
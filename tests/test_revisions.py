@@ -0,0 +1,64 @@
+# tests/test_revisions.py
+import io
+
+import docx
+
+from core.cache import ResultCache
+from core.pipeline import check_upload
+from core.storage import get_store
+
+NAME = "project.docx"
+V1 = ["ABSTRACT", "This project builds a campus assistant.", "CHAPTER 1", "Introduction",
+      "The problem is slow service.", "References", "[1] A. Author, Title."]
+V2 = V1[:4] + ["The problem is slow and costly service."] + V1[5:]
+
+
+def _docx(paragraphs):
+    d = docx.Document()
+    for text in paragraphs:
+        d.add_paragraph(text)
+    buf = io.BytesIO()
+    d.save(buf)
+    return buf.getvalue()
+
+
+def test_previous_revision_is_scoped_to_the_owner(workdir):
+    first, _ = check_upload(_docx(V1), NAME, owner="s1001")
+    assert "revision" not in first.report
+
+    second, _ = check_upload(_docx(V2), NAME, owner="s1001")
+    rev = second.report["revision"]
+    assert rev["previous"] == first.report_path
+    assert (rev["changed"], rev["changed_sections"]) == (1, ["chapter_1"])
+
+    # نفس اسم الملف من مستخدم ثاني (أو من سطر الأوامر): ما في نسخة سابقة إله
+    other, _ = check_upload(_docx(V2), NAME, owner="s2002")
+    assert "revision" not in other.report
+    anonymous, _ = check_upload(_docx(V2), NAME)
+    assert "revision" not in anonymous.report
+    assert get_store().latest_for_file(NAME, "s1001")["id"] == int(second.report_path.rpartition("#")[2])
+
+
+def test_cache_hit_from_another_owner_is_saved_for_the_current_owner(workdir):
+    cache = ResultCache("cache")
+    # نفس الـbytes لكل رفع: python-docx بيكتب وقت الحفظ (بالثواني) بخصائص الملف
+    v1, v2 = _docx(V1), _docx(V2)
+    mine, _ = check_upload(v1, NAME, cache=cache, owner="s1001")
+    check_upload(v2, NAME, cache=cache, owner="s1001")
+
+    theirs, from_cache = check_upload(v2, NAME, cache=cache, owner="s2002")
+    assert from_cache and theirs.owner == "s2002"
+    # مش مقارنة مع نسخة s1001، وتقرير محفوظ باسمه هو
+    assert "revision" not in theirs.report
+    row = get_store().latest_for_file(NAME, "s2002")
+    assert theirs.report_path == get_store().ref(row["id"])
+
+    # نسخته الجاية بتنقارن مع تقريره
+    again, _ = check_upload(v1, NAME, cache=cache, owner="s2002")
+    assert again.owner == "s2002" and again.report_path != mine.report_path
+    assert again.report["revision"]["previous"] == theirs.report_path
+
+    # نفس المحتوى مرة ثانية لنفس المستخدم: بدون صف مكرر
+    before = len(get_store().history(NAME, owner="s2002"))
+    check_upload(v1, NAME, cache=cache, owner="s2002")
+    assert len(get_store().history(NAME, owner="s2002")) == before
@@ -0,0 +1,36 @@
+# tests/test_rules.py
+from core.rules import RuleSet, marker
+
+
+def _keys(rules, text):
+    return [(h.key, text[h.start:h.end]) for h in RuleSet(rules).scan(text)]
+
+
+def test_rules_sharing_the_first_words():
+    rules = [marker("a", "system design"), marker("b", "system design review"), marker("c", "system"),
+             marker("d", "system requirements"), marker("e", "system design notes"), marker("f", "system data")]
+    text = "SYSTEM DESIGN REVIEW\nthe system designer\nsystem  design\nsystem design notes"
+    assert _keys(rules, text) == [
+        ("a", "SYSTEM DESIGN"), ("b", "SYSTEM DESIGN REVIEW"), ("c", "SYSTEM"),
+        ("c", "system"),
+        ("c", "system"),   # مسافتين: "system design" ما بتطابق الـgap
+        ("a", "system design"), ("c", "system"), ("e", "system design notes"),
+    ]
+
+
+def test_gaps_symbols_and_glued_words():
+    rules = [marker("ch1", "CHAPTER 1", gap=r"\s*"), marker("lof", "LIST OF FIGURES", gap=r"\s*"),
+             marker("nfr", "NON-FUNCTIONAL REQUIREMENTS"), marker("chapter", "CHAPTER")]
+    text = "Chapter1 and CHAPTER\n1, chapter 12, List OfFigures, non-functional requirements, non -functional requirements"
+    assert _keys(rules, text) == [
+        ("ch1", "Chapter1"), ("ch1", "CHAPTER\n1"), ("chapter", "CHAPTER"), ("chapter", "chapter"),
+        ("lof", "List OfFigures"), ("nfr", "non-functional requirements"),
+    ]
+
+
+def test_many_rules_per_anchor_match_like_separate_searches():
+    words = ["data", "model", "user", "design", "network"]
+    rules = [marker(f"r{i}", f"system {a} {b}") for i, (a, b) in enumerate((a, b) for a in words for b in words)]
+    text = "system data model. system user network system network user the system model"
+    hits = _keys(rules, text)
+    assert hits == [("r1", "system data model"), ("r14", "system user network"), ("r22", "system network user")]
@@ -0,0 +1,69 @@
+# tests/test_templates.py
+import copy
+import json
+import os
+
+import pytest
+
+from core.templates import TEMPLATE_DIR, TemplateError, compile_template, get_template, load_template
+
+
+def _section(cid="has_abstract", **extra):
+    return {"type": "section", "id": cid, "phrase": "ABSTRACT", "title": "t", "priority": "high", "fix": "f",
+            **extra}
+
+
+def _raw(*checks, **extra):
+    return {"id": "t", "version": "1", "checks": list(checks) or [_section()], **extra}
+
+
+def _count(**extra):
+    spec = {"type": "word_count", "id": "abstract_words", "section": "has_abstract", "until": ["chapter_1"],
+            "min": 150, "max": 300, "title": "t", "details": "{n} words", "priority": "low", "fix": "f"}
+    spec.update(extra)
+    return spec
+
+
+def test_shipped_templates_compile():
+    for name in os.listdir(TEMPLATE_DIR):
+        plan = load_template(os.path.join(TEMPLATE_DIR, name))
+        assert plan.id == os.path.splitext(name)[0]
+    assert get_template() is get_template("bau")
+
+
+def test_fingerprint_follows_content():
+    with open(os.path.join(TEMPLATE_DIR, "bau.json"), encoding="utf-8") as f:
+        raw = json.load(f)
+    changed = copy.deepcopy(raw)
+    changed["checks"][0]["fix"] += "!"
+    assert compile_template(raw).fingerprint == compile_template(copy.deepcopy(raw)).fingerprint
+    assert compile_template(raw).fingerprint != compile_template(changed).fingerprint
+
+
+@pytest.mark.parametrize("raw, error", [
+    ([], "template must be an object"),
+    ({"version": "1", "checks": []}, "'id' must be a non-empty str"),
+    (_raw(checks=None), "'checks' must be a non-empty list"),
+    (_raw(_section(), _section()), r"checks\[1\]: duplicate id 'has_abstract'"),
+    (_raw(_section(priority="urgent")), "priority must be one of"),
+    (_raw(_section(phrase=[])), "'phrase' must be a string or a list of strings"),
+    (_raw(_section(phrase="1. Intro")), "must start with a word"),
+    (_raw({**_section(), "type": "paragraph"}), "unknown type 'paragraph'"),
+    (_raw({"type": "captions"}, {"type": "captions"}), "duplicate group 'captions'"),
+    (_raw(_section(), _count(min=400)), r"min \(400\) > max \(300\)"),
+    (_raw(_section(), _count(details="words")), "'details' must contain {n}"),
+    (_raw(_section(), _count()), r"unknown section keys \['chapter_1'\]"),
+    (_raw(_section(context="keep")), "'context' must be an object or \"drop\""),
+    (_raw(_section(context={"weight": 0, "min": 10})), "context weight must be a positive number"),
+    (_raw(_section(context={"weight": 1, "min": 10, "within": "chapter_1"})),
+     "context within 'chapter_1' is not a top-level section"),
+    (_raw(markers=[{"key": "x"}]), r"markers\[0\]: 'phrase' must be a non-empty str"),
+])
+def test_compile_errors(raw, error):
+    with pytest.raises(TemplateError, match=error):
+        compile_template(raw, "t.json")
+
+
+def test_unknown_template_id():
+    with pytest.raises(TemplateError, match="unknown template 'nope'"):
+        get_template("nope")
@@ -0,0 +1,61 @@
+# tests/test_vector_check.py
+import os
+import random
+
+import numpy as np
+
+from core.ai_engine.vector_check import DOC, NUM_PERM, SimilarityIndex, signatures
+
+WORDS = ("system data model user design campus service student project network query table "
+         "result method test survey mobile cloud secure report").split()
+
+
+def _thesis(seed, words=400):
+    rnd = random.Random(seed)
+    body = lambda: " ".join(rnd.choice(WORDS) for _ in range(words))   # noqa: E731
+    return f"ABSTRACT\n{body()}\nCHAPTER 1\nIntroduction\n{body()}\nCHAPTER 2\nLiterature Review\n{body()}"
+
+
+def test_same_document_is_added_once(tmp_path):
+    index = SimilarityIndex(str(tmp_path))
+    sigs = signatures(_thesis(1))
+    assert [k for k, _ in sigs] == [DOC, "has_abstract", "chapter_1", "chapter_2"]
+    assert index.add_signatures("h1", sigs, name="old.pdf")
+    assert not index.add_signatures("h1", sigs, name="copy.pdf")
+    assert len(index) == 1 and len(index.items) == len(sigs)
+    assert os.path.getsize(tmp_path / "signatures.u32") == len(sigs) * NUM_PERM * 4
+
+
+def test_other_processes_see_appended_rows(tmp_path):
+    mine, theirs = SimilarityIndex(str(tmp_path)), SimilarityIndex(str(tmp_path))
+    text = _thesis(2)
+    mine.add("h2", text, name="2023/ali.pdf")
+    # theirs انبنى قبل الإضافة: query بتقرأ الصفوف الجديدة من القرص
+    block = theirs.query(text)
+    assert block["indexed_docs"] == 1 and block["max_score"] == 1.0
+    assert block["document"] == [{"match": "2023/ali.pdf", "score": 1.0}]
+    assert {s["section"] for s in block["sections"]} == {"has_abstract", "chapter_1", "chapter_2"}
+    assert "h2" in theirs and not theirs.add("h2", text)
+
+
+def test_excluded_documents_do_not_match(tmp_path):
+    index = SimilarityIndex(str(tmp_path))
+    text = _thesis(3)
+    index.add("h3", text)
+    index.add("h4", _thesis(4))
+    block = index.query(text, exclude="h3")
+    assert block["indexed_docs"] == 1 and block["document"] == [] and block["max_score"] < 0.3
+
+
+def test_partial_write_is_ignored_and_truncated(tmp_path):
+    index = SimilarityIndex(str(tmp_path))
+    index.add("h5", _thesis(5))
+    # process وقف بنص الكتابة: نص توقيع بدون سطره بـitems.jsonl
+    with open(tmp_path / "signatures.u32", "ab") as f:
+        f.write(np.zeros(NUM_PERM // 2, dtype=np.uint32).tobytes())
+
+    fresh = SimilarityIndex(str(tmp_path))
+    assert len(fresh) == 1
+    assert fresh.add("h6", _thesis(6))
+    assert len(SimilarityIndex(str(tmp_path)).items) == len(fresh.items)
+    assert os.path.getsize(tmp_path / "signatures.u32") == len(fresh.items) * NUM_PERM * 4